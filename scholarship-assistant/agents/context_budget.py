@@ -0,0 +1,225 @@
+# agents/context_budget.py
+#
+# Per-call prompt budget for every agent (orchestrator, sub-agents and AgentTool /
+# pipeline runners, which inherit the runner's plugins).
+# Before each model call the conversation is compacted, cheapest loss first:
+#   1. repeated profile dumps: an earlier turn's retrieve_userinfo result is dropped
+#      when a later call returned the same fields (or more);
+#   2. drafts from earlier turns: replaced by a reference (draft id, size, how to
+#      fetch it), since the text is stored in the review queue and the profile;
+#   3. over budget: long tool outputs and replies of older turns are summarised
+#      (scholarship lists keep their titles), oldest first;
+#   4. still over budget: the oldest turns are dropped, with a note.
+# The current turn and the previous one (KEEP_RECENT_TURNS) are never summarised or
+# dropped. Tokens are estimated as in model_pool (~4 characters per token).
+
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter, deque
+
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from agents.model_pool import estimate_tokens, part_chars
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("SCHOLARSHIP_CONTEXT_BUDGET", "6000"))
+KEEP_RECENT_TURNS = 2
+LONG_TEXT_CHARS = 600  # older texts and tool outputs above this are summarised when over budget
+SUMMARY_CHARS = 240
+TURN_HISTORY = 200  # per-turn reports kept by the plugin
+
+_DRAFT_TOOLS = {"write_document", "revise_document", "generate_application_documents",
+                "sop_agent", "cv_agent", "refiner_agent"}
+_DRAFT_FIELDS = ("draft_text", "result")
+_PROFILE_TOOL = "retrieve_userinfo"
+_TITLE_RE = re.compile(r"^\*\*(.+?)\*\*", re.MULTILINE)
+
+
+def _turn_starts(contents: list) -> list:
+    """Index of each turn's first content: a user message with text (not a tool response)."""
+    starts = [i for i, content in enumerate(contents)
+              if content.role == "user" and any(part.text for part in content.parts or [])]
+    return starts if starts and starts[0] == 0 else [0] + starts
+
+
+def summarize_text(text: str, max_chars: int = SUMMARY_CHARS) -> str:
+    """Extractive summary: the titles of a scholarship list, else the opening sentence."""
+    titles = _TITLE_RE.findall(text)
+    if len(titles) >= 2:
+        summary = f"[{len(titles)} scholarships listed: {'; '.join(titles)}]"
+    else:
+        opening = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+        summary = f"{opening} … [{len(text)} chars summarised]"
+    return summary if len(summary) <= max_chars + 40 else summary[:max_chars] + "…]"
+
+
+def _draft_reference(response: dict) -> dict:
+    reference = dict(response)
+    for field in _DRAFT_FIELDS:
+        if isinstance(reference.get(field), str) and len(reference[field]) > SUMMARY_CHARS:
+            reference[field] = (f"[draft of {len(reference[field])} chars omitted"
+                                + (f"; stored as draft_id {reference['draft_id']}, use that id with "
+                                   "revise_document or submit_draft_for_review" if reference.get("draft_id") else "")
+                                + "; approved drafts are in the profile (last_sop / last_cv)]")
+    if isinstance(reference.get("documents"), list):
+        reference["documents"] = [_draft_reference(d) if isinstance(d, dict) else d for d in reference["documents"]]
+    return reference
+
+
+def _summarize_value(value):
+    if isinstance(value, str) and len(value) > LONG_TEXT_CHARS:
+        return summarize_text(value)
+    if isinstance(value, list) and len(json.dumps(value, default=str)) > LONG_TEXT_CHARS:
+        titles = [item.get("title") for item in value if isinstance(item, dict) and item.get("title")]
+        return f"[{len(value)} items" + (f": {'; '.join(titles)}]" if titles else " omitted]")
+    if isinstance(value, dict):
+        return {key: _summarize_value(item) for key, item in value.items()}
+    return value
+
+
+def _replace_response(part, response: dict):
+    function_response = part.function_response
+    return types.Part(function_response=types.FunctionResponse(
+        id=function_response.id, name=function_response.name, response=response))
+
+
+def _rewrite(contents: list, indices, rewrite_part) -> int:
+    """Replaces parts of contents[i] for i in indices with rewrite_part(part) when it returns one."""
+    changed = 0
+    for i in indices:
+        parts = []
+        for part in contents[i].parts or []:
+            new = rewrite_part(part)
+            changed += new is not None
+            parts.append(part if new is None else new)
+        contents[i] = types.Content(role=contents[i].role, parts=parts)
+    return changed
+
+
+def _profile_dumps(contents: list) -> list:
+    """(content index, part, requested fields) of each retrieve_userinfo result, oldest first.
+
+    Fields come from the call that produced the result; None is the summary of every field.
+    """
+    requested, dumps = {}, []
+    for i, content in enumerate(contents):
+        for part in content.parts or []:
+            if part.function_call and part.function_call.name == _PROFILE_TOOL:
+                fields = (part.function_call.args or {}).get("fields")
+                requested[part.function_call.id] = frozenset(fields) if fields else None
+            elif part.function_response and part.function_response.name == _PROFILE_TOOL:
+                dumps.append((i, part, requested.get(part.function_response.id)))
+    return dumps
+
+
+def _covers(later, earlier) -> bool:
+    """Whether a result for `later` fields makes one for `earlier` fields redundant.
+
+    The summary truncates long values, so it only replaces another summary; a field
+    request is replaced by a later request for the same fields or more.
+    """
+    if later is None or earlier is None:
+        return later is None and earlier is None
+    return later >= earlier
+
+
+def apply_budget(llm_request, budget: int = CONTEXT_TOKEN_BUDGET) -> dict:
+    """Compacts `llm_request.contents` in place to fit `budget` prompt tokens; returns what was done."""
+    contents = list(llm_request.contents or [])
+    report = Counter(tokens_before=estimate_tokens(llm_request))
+    starts = _turn_starts(contents)
+    current = starts[-1]
+    recent = starts[-KEEP_RECENT_TURNS] if len(starts) >= KEEP_RECENT_TURNS else 0
+
+    # 1. A profile dump from an earlier turn is dropped when a later one covers its fields
+    dumps = _profile_dumps(contents)
+    superseded = {id(part) for n, (i, part, fields) in enumerate(dumps) if i < current
+                  and any(_covers(later, fields) for _, _, later in dumps[n + 1:])}
+    report["deduplicated"] = _rewrite(contents, sorted({i for i, part, _ in dumps if id(part) in superseded}),
+                                      lambda part: _replace_response(part, {
+                                          "status": "success",
+                                          "note": "superseded by a later retrieve_userinfo result"})
+                                      if id(part) in superseded else None)
+
+    # 2. Drafts from earlier turns become references (in tool results and in the calls that carried them)
+    def draft_reference(part):
+        if part.function_response and part.function_response.name in _DRAFT_TOOLS:
+            reference = _draft_reference(part.function_response.response or {})
+            return _replace_response(part, reference) if reference != part.function_response.response else None
+        if part.function_call and part_chars(part) > LONG_TEXT_CHARS:
+            call = part.function_call
+            return types.Part(function_call=types.FunctionCall(id=call.id, name=call.name, args={
+                key: f"[{len(value)} chars omitted]" if isinstance(value, str) and len(value) > LONG_TEXT_CHARS
+                else value for key, value in (call.args or {}).items()}))
+        return None
+    report["referenced"] = _rewrite(contents, range(current), draft_reference)
+
+    llm_request.contents = contents
+    overflow = lambda: estimate_tokens(llm_request) > budget
+
+    # 3. Summarise long texts and tool outputs of older turns, oldest first
+    def summarize(part):
+        if part.text and len(part.text) > LONG_TEXT_CHARS:
+            return types.Part(text=summarize_text(part.text))
+        if part.function_response and part_chars(part) > LONG_TEXT_CHARS:
+            return _replace_response(part, _summarize_value(part.function_response.response or {}))
+        return None
+    for i in range(recent):
+        if not overflow():
+            break
+        report["summarized"] += _rewrite(contents, [i], summarize)
+
+    # 4. Drop whole turns, oldest first (tool calls and their responses go together)
+    older = [start for start in starts if start < recent]
+    dropped = 0
+    while overflow() and dropped < len(older):
+        dropped += 1
+        first = contents[starts[dropped]]  # a user message: the note goes in front of it
+        note = types.Part(text=f"[{dropped} earlier turn(s) omitted to fit the context budget]")
+        llm_request.contents = ([types.Content(role="user", parts=[note, *(first.parts or [])])]
+                                + contents[starts[dropped] + 1:])
+    report["dropped_turns"] = dropped
+
+    report["tokens_after"] = estimate_tokens(llm_request)
+    report["tokens_saved"] = report["tokens_before"] - report["tokens_after"]
+    return dict(report)
+
+
+class ContextBudgetPlugin(BasePlugin):
+    """Applies `apply_budget` before every model call and reports the tokens saved per turn."""
+
+    def __init__(self, budget: int = CONTEXT_TOKEN_BUDGET, name: str = "context_budget"):
+        super().__init__(name=name)
+        self.budget = budget
+        self.totals = Counter()
+        self.turns = deque(maxlen=TURN_HISTORY)  # one report per finished invocation
+        self._open = {}  # invocation_id -> Counter
+        self._lock = threading.Lock()
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        report = apply_budget(llm_request, self.budget)
+        with self._lock:
+            turn = self._open.setdefault(callback_context.invocation_id, Counter())
+            turn.update(report, model_calls=1)
+            turn["largest_call"] = max(turn["largest_call"], report["tokens_after"])
+            self.totals.update(report, model_calls=1)
+        return None
+
+    async def after_run_callback(self, *, invocation_context):
+        with self._lock:
+            turn = self._open.pop(invocation_context.invocation_id, None)
+            if turn is None:
+                return
+            report = {"invocation_id": invocation_context.invocation_id, **turn}
+            self.turns.append(report)
+        logger.info("context budget: %s model calls, %s -> %s prompt tokens (%s saved)",
+                    turn["model_calls"], turn["tokens_before"], turn["tokens_after"], turn["tokens_saved"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.totals)
@@ -0,0 +1,407 @@
+# agents/document_pipeline.py
+#
+# The document pipeline: draft -> refine, paragraph by paragraph.
+# The drafter's output is streamed; every paragraph is handed to the refiner as soon
+# as it is complete, while the rest of the draft is still being written, and refined
+# paragraphs are delivered in order the moment they (and all earlier ones) are ready.
+# `write_document` streams one document to the user through the draft sink that the
+# runner registers with `stream_drafts_to`; `generate_application_documents` fans out
+# one chain per (target scholarship, document type) with bounded parallelism.
+# The applicant's profile context is built once per call and shared by every chain.
+# Finished drafts are stored under a draft id, so exactly the text the user saw is
+# what gets submitted for review. Refined paragraphs are cached by content hash and
+# refiner version: `revise_document` only sends the paragraphs that changed after a
+# rejection back to the refiner.
+
+import asyncio
+import contextvars
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools import ToolContext
+from google.genai import types
+
+from agents.registry import get_agent
+from agents.tracing import annotate
+from tools.hitl_reviewer import load_draft, save_draft
+from tools.profile_checker import profile_view
+
+MAX_PARALLEL_CHAINS = 4
+MAX_PARALLEL_REFINES = 4  # per document
+REFINE_CACHE_SIZE = 4096  # refined paragraphs
+PROFILE_CONTEXT_CHARS = 300  # per field; stored drafts are not useful context for new ones
+_EXCLUDED_FIELDS = ("last_sop", "last_cv")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_STREAMING = RunConfig(streaming_mode=StreamingMode.SSE)
+
+_DRAFTERS = {"SOP": "sop_agent", "CV": "cv_agent"}  # registry names
+_DOCUMENT_TYPES = {
+    "sop": "SOP", "statement of purpose": "SOP", "personal statement": "SOP",
+    "cv": "CV", "resume": "CV", "curriculum vitae": "CV",
+}
+
+
+def normalize_document_type(value: str) -> str:
+    document_type = _DOCUMENT_TYPES.get(str(value or "").strip().lower())
+    if document_type is None:
+        raise ValueError(f"Unknown document type '{value}'. Use 'SOP' or 'CV'.")
+    return document_type
+
+
+def build_profile_context(profile: dict) -> str:
+    """The applicant block shared by every draft request."""
+    lines = []
+    for field, value in sorted(profile.items()):
+        if field in _EXCLUDED_FIELDS or field.startswith("_"):
+            continue
+        text = str(value)
+        if len(text) > PROFILE_CONTEXT_CHARS:
+            text = text[:PROFILE_CONTEXT_CHARS] + "…"
+        lines.append(f"- {field.replace('_', ' ')}: {text}")
+    return "\n".join(lines) or "- (no saved profile details)"
+
+
+# --- Draft sink: where streamed paragraphs go ---
+_DRAFT_SINK = contextvars.ContextVar("draft_sink", default=None)
+
+
+@contextmanager
+def stream_drafts_to(callback):
+    """
+    Streams `write_document` output to `callback(document, index, paragraph)` for runs started
+    inside the block; `document` is {"target", "document_type"}. Joining the paragraphs with
+    blank lines gives exactly the text that is stored and submitted for review.
+    """
+    token = _DRAFT_SINK.set(callback)
+    try:
+        yield
+    finally:
+        _DRAFT_SINK.reset(token)
+
+
+def split_paragraphs(text: str) -> list:
+    return [p.strip() for p in _PARAGRAPH_BREAK.split(text or "") if p.strip()]
+
+
+async def stream_agent_text(agent, request: str, tool_context: ToolContext):
+    """
+    Runs `agent` on `request` in a throwaway session, as AgentTool does, yielding its text
+    as the model streams it (one chunk per partial response, or the whole reply at once).
+    """
+    invocation_context = tool_context._invocation_context
+    app_name = invocation_context.app_name or agent.name
+    runner = Runner(
+        app_name=app_name,
+        agent=agent,
+        session_service=InMemorySessionService(),
+        plugins=list(invocation_context.plugin_manager.plugins),
+    )
+    session = await runner.session_service.create_session(app_name=app_name, user_id=invocation_context.user_id)
+    message = types.Content(role="user", parts=[types.Part(text=request)])
+    streamed = False
+    try:
+        async for event in runner.run_async(user_id=session.user_id, session_id=session.id,
+                                            new_message=message, run_config=_STREAMING):
+            text = "".join(p.text for p in (event.content.parts if event.content else None) or []
+                           if p.text and not p.thought)
+            if event.partial:
+                streamed = True
+                if text:
+                    yield text
+            else:
+                if text and not streamed:  # the aggregate repeats what was streamed
+                    yield text
+                streamed = False
+    finally:
+        await runner.close()
+
+
+async def run_agent_text(agent, request: str, tool_context: ToolContext) -> str:
+    return "".join([chunk async for chunk in stream_agent_text(agent, request, tool_context)])
+
+
+# --- Refinement cache: (refiner version, paragraph hash) -> refined paragraph ---
+_REFINED = OrderedDict()
+_REFINED_LOCK = threading.Lock()
+_REFINE_STATS = Counter()
+
+
+def refiner_version() -> str:
+    """Changes whenever the refiner's instruction or model does, invalidating cached output."""
+    refiner_agent = get_agent("refiner_agent")
+    fingerprint = f"{refiner_agent.instruction}\x00{getattr(refiner_agent.model, 'model', refiner_agent.model)}"
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+
+def _refine_key(paragraph: str) -> tuple:
+    return refiner_version(), hashlib.sha256(paragraph.encode("utf-8")).hexdigest()
+
+
+def _cache_refined(paragraph: str, refined: str):
+    with _REFINED_LOCK:
+        # A refined paragraph is already final: re-submitting it unchanged is a hit too
+        for key in {_refine_key(paragraph), _refine_key(refined)}:
+            _REFINED[key] = refined
+            _REFINED.move_to_end(key)
+        while len(_REFINED) > REFINE_CACHE_SIZE:
+            _REFINED.popitem(last=False)
+
+
+def refine_cache_stats() -> dict:
+    """Paragraphs served from the refinement cache (hits) and sent to the refiner (misses)."""
+    with _REFINED_LOCK:
+        return {"hits": _REFINE_STATS["hits"], "misses": _REFINE_STATS["misses"],
+                "refiner_chars": _REFINE_STATS["refiner_chars"], "size": len(_REFINED)}
+
+
+def clear_refine_cache():
+    with _REFINED_LOCK:
+        _REFINED.clear()
+        _REFINE_STATS.clear()
+
+
+async def refine_paragraph(paragraph: str, tool_context: ToolContext) -> str:
+    """One paragraph through the refiner, or from the cache if this exact text was refined before."""
+    key = _refine_key(paragraph)
+    with _REFINED_LOCK:
+        refined = _REFINED.get(key)
+        _REFINE_STATS["hits" if refined is not None else "misses"] += 1
+        if refined is None:
+            _REFINE_STATS["refiner_chars"] += len(paragraph)
+        else:
+            _REFINED.move_to_end(key)
+    annotate(**{"cache_hits" if refined is not None else "cache_misses": 1})
+    if refined is not None:
+        return refined
+    refined = (await run_agent_text(get_agent("refiner_agent"), paragraph, tool_context)).strip() or paragraph
+    _cache_refined(paragraph, refined)
+    return refined
+
+
+async def _stream_paragraphs(agent, request: str, tool_context: ToolContext):
+    """The agent's reply, one complete paragraph at a time, as it is streamed."""
+    buffer = ""
+    async for chunk in stream_agent_text(agent, request, tool_context):
+        *complete, buffer = _PARAGRAPH_BREAK.split(buffer + chunk)
+        for paragraph in complete:
+            if paragraph.strip():
+                yield paragraph.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+async def refine_in_order(paragraphs, tool_context: ToolContext, on_paragraph=None) -> list:
+    """
+    Refines paragraphs from the async iterator `paragraphs` as they arrive, concurrently.
+    Returns them in order; `on_paragraph(index, text)` gets each one as soon as it and every
+    earlier paragraph are ready.
+    """
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_REFINES)
+
+    async def refine(paragraph: str) -> str:
+        async with semaphore:
+            return await refine_paragraph(paragraph, tool_context)
+
+    refined = []
+    pending = asyncio.Queue()
+
+    async def deliver():
+        while (task := await pending.get()) is not None:
+            refined.append(await task)
+            if on_paragraph:
+                on_paragraph(len(refined) - 1, refined[-1])
+
+    delivery = asyncio.create_task(deliver())
+    tasks = []
+    try:
+        async for paragraph in paragraphs:
+            tasks.append(asyncio.create_task(refine(paragraph)))
+            pending.put_nowait(tasks[-1])
+        pending.put_nowait(None)
+        await delivery
+    finally:
+        for task in (delivery, *tasks):
+            task.cancel()
+    return refined
+
+
+async def draft_and_refine(document_type: str, request: str, tool_context: ToolContext, on_paragraph=None) -> list:
+    """Streams the draft and refines each paragraph as soon as it is complete (see refine_in_order)."""
+    paragraphs = _stream_paragraphs(get_agent(_DRAFTERS[document_type]), request, tool_context)
+    return await refine_in_order(paragraphs, tool_context, on_paragraph)
+
+
+def _document_request(document_type: str, target: str, instructions: str, profile_context: str) -> str:
+    request = f"Write a {document_type} for: {target}."
+    if instructions:
+        request += f"\nInstructions: {instructions}"
+    return request + f"\n\nApplicant profile:\n{profile_context}"
+
+
+async def write_document(document_type: str, target: str, tool_context: ToolContext, instructions: str = "") -> dict:
+    """
+    Writes ONE SOP or CV: drafts it and refines it paragraph by paragraph, streaming the refined
+    paragraphs to the user as they are ready.
+    document_type: "SOP" or "CV".
+    target: the scholarship or programme, e.g. "PhD in Management at Oxford University".
+    instructions: extra guidance, e.g. "focus on my research experience".
+    Returns a draft_id; submit it with submit_draft_for_review(draft_id=...).
+    """
+    try:
+        kind = normalize_document_type(document_type)
+    except ValueError as e:
+        return {"status": "error", "error_message": str(e)}
+
+    request = _document_request(kind, target, instructions, build_profile_context(profile_view(tool_context)))
+    sink = _DRAFT_SINK.get()
+    document = {"target": target, "document_type": kind}
+    on_paragraph = (lambda index, paragraph: sink(document, index, paragraph)) if sink else None
+    paragraphs = await draft_and_refine(kind, request, tool_context, on_paragraph)
+    if not paragraphs:
+        return {"status": "error", "error_message": f"The {kind} drafter returned no text."}
+
+    text = "\n\n".join(paragraphs)
+    result = {"status": "success", "draft_id": save_draft(tool_context, kind, target, text), **document}
+    if sink:
+        result["message"] = ("The refined draft has already been shown to the user; do not repeat it. "
+                             "Submit it with submit_draft_for_review(draft_id=...).")
+    else:
+        result["draft_text"] = text
+    return result
+
+
+_REVISE_PARAGRAPH = (
+    "Rewrite paragraph {number} of this {document_type} following the feedback. Return ONLY the rewritten "
+    "paragraph.\nFeedback: {feedback}\n\nParagraph:\n{paragraph}\n\nFull draft for context:\n{text}"
+)
+_REVISE_DRAFT = (
+    "Revise this {document_type} following the feedback. Return the full revised text, keeping every "
+    "paragraph the feedback does not concern EXACTLY as it is.\nFeedback: {feedback}\n\nDraft:\n{text}"
+)
+
+
+async def revise_document(draft_id: str, feedback: str, tool_context: ToolContext, paragraphs: list[int] = None) -> dict:
+    """
+    Revises a draft after review feedback (e.g. when submit_draft_for_review was rejected), instead of
+    writing it again: only paragraphs that actually change are sent to the refiner.
+    draft_id: the draft to revise.
+    feedback: what the user wants changed, e.g. "mention my MBA thesis".
+    paragraphs: 1-based numbers of the paragraphs the feedback is about, if the user named them;
+    only those are rewritten. Otherwise the whole draft is revised.
+    Streams the revised draft like write_document and returns its new draft_id.
+    """
+    draft = load_draft(tool_context, draft_id)
+    if draft is None:
+        return {"status": "error", "error_message": f"Unknown draft_id '{draft_id}'."}
+    kind, current = draft["document_type"], split_paragraphs(draft["text"])
+    fields = {"document_type": kind, "feedback": feedback, "text": draft["text"]}
+
+    if paragraphs:
+        numbers = sorted({int(n) for n in paragraphs})
+        if numbers[0] < 1 or numbers[-1] > len(current):
+            return {"status": "error", "error_message": f"The draft has paragraphs 1-{len(current)}."}
+        rewrites = await asyncio.gather(*(
+            run_agent_text(get_agent(_DRAFTERS[kind]), _REVISE_PARAGRAPH.format(number=n, paragraph=current[n - 1], **fields),
+                           tool_context)
+            for n in numbers
+        ))
+        replaced = dict(zip(numbers, rewrites))
+        source = _iterate([p for n, old in enumerate(current, start=1)
+                           for p in ((split_paragraphs(replaced[n]) or [old]) if n in replaced else [old])])
+    else:
+        source = _stream_paragraphs(get_agent(_DRAFTERS[kind]), _REVISE_DRAFT.format(**fields), tool_context)
+
+    sink = _DRAFT_SINK.get()
+    document = {"target": draft["target"], "document_type": kind}
+    on_paragraph = (lambda index, paragraph: sink(document, index, paragraph)) if sink else None
+    refined = await refine_in_order(source, tool_context, on_paragraph)
+    if not refined:
+        return {"status": "error", "error_message": f"The {kind} revision returned no text."}
+
+    text = "\n\n".join(refined)
+    unchanged = set(current)
+    result = {
+        "status": "success", "draft_id": save_draft(tool_context, kind, draft["target"], text),
+        "revised_from": draft_id, **document,
+        "changed_paragraphs": [i for i, p in enumerate(refined, start=1) if p not in unchanged],
+    }
+    if sink:
+        result["message"] = ("The revised draft has already been shown to the user; do not repeat it. "
+                             "Submit it with submit_draft_for_review(draft_id=...).")
+    else:
+        result["draft_text"] = text
+    return result
+
+
+async def _chain(semaphore, tool_context, target: str, document_type: str, profile_context: str,
+                 instructions: str) -> list:
+    """Draft, then refine, one document; returns its paragraphs. The semaphore bounds concurrent chains."""
+    request = _document_request(document_type, target, instructions, profile_context)
+    async with semaphore:
+        return await draft_and_refine(document_type, request, tool_context)
+
+
+async def generate_application_documents(
+        targets: list[str], document_types: list[str], tool_context: ToolContext, instructions: str = ""
+) -> dict:
+    """
+    Drafts AND refines several application documents at once, e.g. an SOP and a CV for each of
+    five shortlisted scholarships. Use this instead of calling sop_agent/cv_agent and refiner_agent
+    one by one whenever more than one document is needed.
+    targets: the scholarships or programmes to write for, e.g. ["Chevening Scholarship", "DAAD PhD"].
+    document_types: any of "SOP" and "CV".
+    instructions: extra guidance for every document, e.g. "focus on my research experience".
+    Returns the refined drafts in order; submit them for review one at a time, in that order.
+    """
+    try:
+        kinds = list(dict.fromkeys(normalize_document_type(t) for t in document_types))
+    except ValueError as e:
+        return {"status": "error", "error_message": str(e)}
+    if not targets or not kinds:
+        return {"status": "error", "error_message": "Provide at least one target and one document type."}
+
+    profile_context = build_profile_context(profile_view(tool_context))  # built once, shared
+    jobs = [(target, document_type) for target in targets for document_type in kinds]
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_CHAINS)
+    results = await asyncio.gather(
+        *(_chain(semaphore, tool_context, target, document_type, profile_context, instructions)
+          for target, document_type in jobs),
+        return_exceptions=True,
+    )
+
+    for result in results:
+        # A cancelled chain (or interpreter exit) is not a per-document failure
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            raise result
+
+    documents = []
+    for order, ((target, document_type), result) in enumerate(zip(jobs, results), start=1):
+        document = {"order": order, "target": target, "document_type": document_type}
+        if isinstance(result, BaseException):
+            document.update(status="error", error_message=f"{type(result).__name__}: {result}")
+        elif not result:
+            document.update(status="error", error_message=f"The {document_type} drafter returned no text.")
+        else:
+            text = "\n\n".join(result)
+            document.update(status="success", draft_id=save_draft(tool_context, document_type, target, text),
+                            draft_text=text)
+        documents.append(document)
+
+    failed = sum(d["status"] == "error" for d in documents)
+    return {
+        "status": "success" if failed < len(documents) else "error",
+        "documents": documents,
+        "message": "Refined drafts in submission order. Show each draft, then call "
+                   "submit_draft_for_review(draft_id=...) for one document at a time, in this order." + (f" {failed} document(s) failed." if failed else ""),
+    }
@@ -0,0 +1,272 @@
+# agents/model_pool.py
+#
+# One place to build the Gemini model used by every agent.
+# All agents share a single model object per model name, hence one genai Client and
+# its HTTP connection pool, one retry policy, and one process-wide adaptive rate
+# limiter (requests/min and tokens/min) that smooths bursts before they turn into 429s.
+# Retries follow RETRY_CONFIG but run here rather than inside the genai client, so every
+# HTTP attempt is charged to the limiter and every 429 slows it down.
+# Limiter waits and retry backoff are added to the current trace span (agents/tracing.py).
+
+import asyncio
+import json
+import random
+import threading
+import time
+
+import httpx
+from google.adk.models.google_llm import Gemini
+from google.genai import types
+from google.genai.errors import APIError
+
+from agents.tracing import annotate
+
+MODEL_NAME = "gemini-2.5-flash-lite"
+
+# Consistent retry policy for every agent. exp_base=2 with a delay cap keeps a 429
+# burst to a few seconds of backoff (exp_base=7 grew to minutes by the 4th attempt).
+RETRY_CONFIG = types.HttpRetryOptions(
+    attempts=5,
+    exp_base=2,
+    initial_delay=1,
+    max_delay=16,
+    jitter=1,
+    http_status_codes=[429, 500, 503, 504],
+)
+
+# Process-wide budget (defaults match the gemini-2.5-flash-lite free tier)
+REQUESTS_PER_MINUTE = 15
+TOKENS_PER_MINUTE = 250_000
+MIN_RATE_FRACTION = 0.1  # adaptive backoff never drops below 10% of the configured rate
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations: `reserve` debits the bucket immediately
+    (it may go negative) and returns how long the caller must wait for its share.
+    Reservations never await, so they are atomic across asyncio tasks and threads.
+    """
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.per_minute = per_minute
+        self.capacity = capacity or per_minute
+        self.scale = 1.0  # adaptive multiplier applied to the refill rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        rate = self.per_minute * self.scale / 60
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Debits `amount` (capped at capacity) and returns the wait, in seconds, before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= min(amount, self.capacity)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / (self.per_minute * self.scale / 60)
+
+    def adjust(self, amount: float):
+        """Credits (negative) or debits (positive) a correction, e.g. actual vs estimated tokens."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class AdaptiveRateLimiter:
+    """
+    Requests/min and tokens/min budgets shared by every model call in the process.
+    Every HTTP attempt reserves budget. Each 429 cuts the refill rate multiplicatively and
+    each successful call restores it additively (AIMD), so the process settles just below
+    the real quota. Failed attempts never count as successes.
+    """
+
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        with self._lock:
+            self.calls = 0
+            self.throttled = 0
+            self.wait_seconds = 0.0
+            self.retries = 0
+            self.retry_seconds = 0.0
+            self.call_seconds = 0.0
+            self.tokens_used = 0
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Waits until both budgets allow one more call of about `estimated_tokens`. Returns the wait."""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        with self._lock:
+            self.wait_seconds += wait
+        annotate(rate_limit_wait_seconds=wait)
+        return wait
+
+    def _set_scale(self, scale: float):
+        scale = min(1.0, max(MIN_RATE_FRACTION, scale))
+        self.requests.scale = scale
+        self.tokens.scale = scale
+
+    def on_throttled(self):
+        """An attempt got a 429: slow every bucket down."""
+        with self._lock:
+            self.throttled += 1
+        self._set_scale(self.requests.scale * 0.5)
+
+    def on_retry(self, sleep_seconds: float):
+        """A failed attempt is about to be retried after `sleep_seconds` of backoff (RETRY_CONFIG)."""
+        with self._lock:
+            self.retries += 1
+            self.retry_seconds += sleep_seconds
+
+    def on_complete(self, call_seconds: float, estimated_tokens: int, actual_tokens: int = None):
+        """A call succeeded: count it, correct the token estimate and raise the rate a step."""
+        with self._lock:
+            self.calls += 1
+            self.call_seconds += call_seconds
+            self.tokens_used += actual_tokens or estimated_tokens
+        if actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+        self._set_scale(self.requests.scale + 0.05)
+
+    def metrics(self) -> dict:
+        """Time spent waiting for budget versus calling the model, plus volume and throttling."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "retries": self.retries,
+                "retry_seconds": round(self.retry_seconds, 3),
+                "call_seconds": round(self.call_seconds, 3),
+                "tokens": self.tokens_used,
+                "rate_scale": round(self.requests.scale, 3),
+            }
+
+
+def part_chars(part) -> int:
+    """Characters a content part puts in the prompt: text, or the JSON of a tool call / result."""
+    if part.function_response:
+        return len(json.dumps(part.function_response.response or {}, ensure_ascii=False, default=str))
+    if part.function_call:
+        return len(json.dumps(part.function_call.args or {}, ensure_ascii=False, default=str))
+    return len(part.text or "")
+
+
+def estimate_tokens(llm_request) -> int:
+    """Rough prompt size (~4 characters per token) used to reserve tokens/min budget up front."""
+    chars = 0
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            chars += part_chars(part)
+    if llm_request.config and llm_request.config.system_instruction:
+        chars += len(str(llm_request.config.system_instruction))
+    return chars // 4 + 1
+
+
+def is_retryable(error: Exception, retry_options: types.HttpRetryOptions) -> bool:
+    """Same rule as the genai client: listed HTTP status codes, timeouts and connection errors."""
+    if isinstance(error, APIError):
+        return error.code in (retry_options.http_status_codes or ())
+    return isinstance(error, (httpx.TimeoutException, httpx.ConnectError))
+
+
+def backoff_seconds(retry_options: types.HttpRetryOptions, attempt: int) -> float:
+    """Exponential backoff with jitter before retry number `attempt` (1-based), capped at max_delay."""
+    delay = (retry_options.initial_delay or 1) * (retry_options.exp_base or 2) ** (attempt - 1)
+    delay += random.uniform(0, retry_options.jitter or 0)
+    return min(delay, retry_options.max_delay or delay)
+
+
+class SharedGemini(Gemini):
+    """Gemini that draws on the process-wide client pool and rate limiter, and retries on its own."""
+
+    @property
+    def api_client(self):
+        return _shared_client(self._tracking_headers)
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        limiter = get_rate_limiter()
+        options = self.retry_options or types.HttpRetryOptions(attempts=1)
+        attempts = max(1, options.attempts or 1)
+        estimated = estimate_tokens(llm_request)
+
+        for attempt in range(1, attempts + 1):
+            await limiter.acquire(estimated)  # every HTTP attempt is charged, retries included
+            start = time.perf_counter()
+            usage = None
+            streamed = False
+            try:
+                async for response in super().generate_content_async(llm_request, stream):
+                    if response.usage_metadata:
+                        usage = response.usage_metadata
+                    streamed = True
+                    yield response
+            except (APIError, httpx.TimeoutException, httpx.ConnectError) as e:
+                if isinstance(e, APIError) and e.code == 429:
+                    limiter.on_throttled()
+                # A stream that already produced output cannot be replayed
+                if streamed or attempt == attempts or not is_retryable(e, options):
+                    raise
+                sleep = backoff_seconds(options, attempt)
+                limiter.on_retry(sleep)
+                annotate(retries=1, retry_seconds=sleep)
+                await asyncio.sleep(sleep)
+                continue
+            limiter.on_complete(time.perf_counter() - start, estimated, usage.total_token_count if usage else None)
+            return
+
+
+# --- Process-wide pools ---
+_CLIENT = None
+_MODELS = {}
+_LIMITER = None
+_POOL_LOCK = threading.Lock()
+
+
+def _shared_client(headers: dict):
+    """The process-wide genai Client (and HTTP connection pool), with the HTTP options of ADK's
+    Gemini.api_client. Its own retries are limited to one attempt: SharedGemini retries."""
+    from google.genai import Client
+
+    global _CLIENT
+    with _POOL_LOCK:
+        if _CLIENT is None:
+            _CLIENT = Client(http_options=types.HttpOptions(
+                headers=headers, retry_options=types.HttpRetryOptions(attempts=1)))
+        return _CLIENT
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    global _LIMITER
+    with _POOL_LOCK:
+        if _LIMITER is None:
+            _LIMITER = AdaptiveRateLimiter()
+        return _LIMITER
+
+
+def configure_rate_limits(requests_per_minute: float, tokens_per_minute: float):
+    """Replaces the process-wide limiter, e.g. for a paid-tier quota."""
+    global _LIMITER
+    with _POOL_LOCK:
+        _LIMITER = AdaptiveRateLimiter(requests_per_minute, tokens_per_minute)
+
+
+def get_model(model_name: str = MODEL_NAME) -> SharedGemini:
+    """The shared model object for `model_name`, used by every agent."""
+    with _POOL_LOCK:
+        model = _MODELS.get(model_name)
+        if model is None:
+            model = SharedGemini(model=model_name, retry_options=RETRY_CONFIG)
+            _MODELS[model_name] = model
+        return model
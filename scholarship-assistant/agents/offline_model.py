@@ -0,0 +1,379 @@
+# agents/offline_model.py
+#
+# Deterministic, offline stand-in for Gemini, for tests and benchmarks.
+# `install_offline_model(orchestrator_agent)` swaps the model of every agent in the
+# tree (sub-agents and AgentTool agents) for an OfflineLlm. Real tools, callbacks,
+# session services and the HITL review queue all still run; only the model turn is scripted:
+# either by rules that follow each agent's instruction (RuleBasedPolicy) or by
+# replaying recorded responses per agent (ReplayPolicy). Each turn can sleep for a
+# simulated latency (time to first token, plus time per output token) so benchmarks
+# see realistic interleaving; streamed requests get the text in word-sized chunks.
+
+import abc
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+from collections import Counter
+from typing import Any
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+from tools.intent_router import format_scholarships, profile_facts
+from tools.review_queue import DRAFT_ID_CHARS
+from tools.text_index import parse_query
+
+OFFLINE_MODEL_NAME = "offline-scripted"
+
+
+# --- Request helpers ---
+def _function_call(name: str, args: dict) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))])
+
+
+def _text(text: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def _last_user_text(contents: list) -> str:
+    for content in reversed(contents):
+        texts = [part.text for part in content.parts or [] if part.text and content.role == "user"]
+        if texts:
+            return "\n".join(texts)
+    return ""
+
+
+def _function_responses(content) -> list:
+    return [part.function_response for part in content.parts or [] if part.function_response]
+
+
+def _calls(contents: list, name: str) -> list:
+    """Args of every earlier call to `name`, oldest first."""
+    return [
+        dict(part.function_call.args or {})
+        for content in contents for part in content.parts or []
+        if part.function_call and part.function_call.name == name
+    ]
+
+
+def _latest_response(contents: list, name: str):
+    for content in reversed(contents):
+        for response in _function_responses(content):
+            if response.name == name:
+                return response.response or {}
+    return None
+
+
+def _result_text(response: dict) -> str:
+    """AgentTool responses are {"result": text}; function tools return their dict."""
+    if "result" in response:
+        return str(response["result"])
+    return json.dumps(response, ensure_ascii=False)
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+class OfflinePolicy(abc.ABC):
+    """Decides the model turn for every agent; shared by all OfflineLlm instances so counts add up."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0, token_latency: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency  # seconds per output token (~4 characters)
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Simulated model latency for one turn, in seconds."""
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def record(self, agent_name: str):
+        with self._lock:
+            self.calls[agent_name] += 1
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    @abc.abstractmethod
+    def respond(self, agent_name: str, llm_request) -> types.Content:
+        """The model turn of `agent_name` for this request."""
+
+
+class ReplayPolicy(OfflinePolicy):
+    """
+    Replays recorded turns per agent, in order. Each turn is {"text": ...} or
+    {"function_call": {"name": ..., "args": {...}}}. Raises once an agent runs out of turns.
+    """
+
+    def __init__(self, script: dict, **kwargs):
+        super().__init__(**kwargs)
+        self.script = {agent: list(turns) for agent, turns in script.items()}
+        self._positions = Counter()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ReplayPolicy":
+        with open(path) as f:
+            return cls(json.load(f), **kwargs)
+
+    def respond(self, agent_name: str, llm_request) -> types.Content:
+        with self._lock:
+            turns = self.script.get(agent_name, [])
+            position = self._positions[agent_name]
+            if position >= len(turns):
+                raise RuntimeError(f"Replay script has no turn {position + 1} for agent '{agent_name}'")
+            self._positions[agent_name] += 1
+        turn = turns[position]
+        if "function_call" in turn:
+            return _function_call(turn["function_call"]["name"], turn["function_call"].get("args", {}))
+        return _text(turn["text"])
+
+
+class RuleBasedPolicy(OfflinePolicy):
+    """Follows the orchestrator, scholarship, search and document agents' instructions with fixed rules."""
+
+    def respond(self, agent_name: str, llm_request) -> types.Content:
+        contents = list(llm_request.contents or [])
+        handler = getattr(self, f"_{agent_name}", None)
+        if handler is None:
+            return _text(self._draft(agent_name, _last_user_text(contents)))
+        return handler(contents)
+
+    # --- Orchestrator ---
+    def _orchestrator_agent(self, contents: list) -> types.Content:
+        responses = _function_responses(contents[-1]) if contents else []
+        if not responses:
+            # Instruction 1: check saved user data at the start of a session
+            if not _calls(contents, "retrieve_userinfo"):
+                return _function_call("retrieve_userinfo", {})
+            return self._route(contents)
+
+        response = responses[-1]
+        result = response.response or {}
+        if response.name == "retrieve_userinfo":
+            return self._route(contents)
+        if response.name in ("write_document", "revise_document"):
+            if result.get("status") != "success":
+                return _text(result.get("error_message", "The draft could not be written."))
+            return _function_call("submit_draft_for_review",
+                                  {"document_type": result["document_type"], "draft_id": result["draft_id"]})
+        if response.name == "generate_application_documents":
+            return self._submit_next(contents, result) or _text(result.get("message", "No drafts were generated."))
+        if response.name == "submit_draft_for_review":
+            batch = _latest_response(contents, "generate_application_documents")
+            if result.get("status") == "queued" and batch:
+                # Reviews do not block: queue the whole batch, in order
+                return self._submit_next(contents, batch) or _text("All drafts are queued for human review.")
+            return _text(result.get("message", "The draft was submitted for review."))
+        if response.name == "save_userinfo":
+            return _text("Thanks, I've saved that to your profile.")
+        return _text(_result_text(result))
+
+    @staticmethod
+    def _submit_next(contents: list, batch: dict):
+        """Submits the first generated draft not yet submitted, keeping the batch order."""
+        submitted = {call.get("draft_id") for call in _calls(contents, "submit_draft_for_review")}
+        for document in batch.get("documents") or []:
+            if document.get("status") == "success" and document["draft_id"] not in submitted:
+                return _function_call("submit_draft_for_review", {
+                    "draft_id": document["draft_id"], "document_type": document["document_type"],
+                })
+        return None
+
+    @staticmethod
+    def _targets(text: str) -> list:
+        """'... for these scholarships: A, B and C.' -> [A, B, C]"""
+        if ":" not in text:
+            return [text.strip()]
+        listed = re.split(r",\s*(?:and\s+)?|\s+and\s+", text.rsplit(":", 1)[1].strip().rstrip("."))
+        return [target.strip() for target in listed if target.strip()]
+
+    @staticmethod
+    def _latest_draft(contents: list):
+        for content in reversed(contents):
+            for response in _function_responses(content):
+                if response.name in ("write_document", "revise_document") and (response.response or {}).get("draft_id"):
+                    return response.response["draft_id"]
+        return None
+
+    def _route(self, contents: list) -> types.Content:
+        text = _last_user_text(contents)
+        lowered = text.lower()
+        document_types = [kind for kind, pattern in (("SOP", r"\b(sop|statement of purpose)\b"),
+                                                     ("CV", r"\b(cv|resume|curriculum vitae)\b"))
+                          if re.search(pattern, lowered)]
+        named = re.search(r"\bdraft ([0-9a-f]{%d})\b" % DRAFT_ID_CHARS, text)
+        latest = named.group(1) if named else self._latest_draft(contents)
+        if latest and re.search(r"\b(revise|rewrite|change|edit|improve)\b", lowered):
+            feedback = text.split("revise it: ", 1)[-1]  # review queue rejections carry the reviewer's words
+            numbers = [int(n) for n in re.findall(r"\bparagraphs? (\d+)", feedback.lower())]
+            args = {"draft_id": latest, "feedback": feedback}
+            if numbers:
+                args["paragraphs"] = numbers
+            return _function_call("revise_document", args)
+        targets = self._targets(text)
+        if document_types and (len(document_types) > 1 or len(targets) > 1):
+            return _function_call("generate_application_documents",
+                                  {"targets": targets, "document_types": document_types})
+        if document_types:
+            return _function_call("write_document", {"document_type": document_types[0], "target": text})
+        if "scholarship" in lowered or lowered.startswith("find"):
+            return _function_call("scholarship_agent", {"request": text})
+
+        facts = profile_facts(text)
+        if facts:
+            return _function_call("save_userinfo", {"fields": facts})
+        return _text("How can I help with your scholarship search or application documents?")
+
+    # --- Scholarship search ---
+    def _scholarship_agent(self, contents: list) -> types.Content:
+        request = _last_user_text(contents)
+        responses = _function_responses(contents[-1]) if contents else []
+        if not responses:
+            return _function_call("retrieve_userinfo", {})
+
+        response = responses[-1]
+        result = response.response or {}
+        if response.name == "retrieve_userinfo":
+            fields = parse_query(request)
+            args = {"profile": {}, "query": request}
+            if "min_amount" in fields:
+                args["min_amount"] = fields["min_amount"]
+            if "deadline" in request.lower() or "soon" in request.lower():
+                args["sort_by"] = "deadline"
+            return _function_call("agent_scholarship_finder", args)
+        if response.name == "agent_scholarship_finder":
+            scholarships = result.get("scholarships") or []
+            if not scholarships:
+                return _function_call("google_search_scholarships", {"request": request})
+            return _text(format_scholarships(scholarships)
+                         + "\n\nThese scholarships match the degree, country and funding in your request.")
+        return _text(_result_text(result))
+
+    def _google_search_scholarships(self, contents: list) -> types.Content:
+        request = _last_user_text(contents)
+        fields = parse_query(request)
+        seed = _digest(request)
+        degree = fields.get("degree", "PhD, Masters")
+        funds = fields.get("funding", "Not specified")
+        lines = [
+            f"{topic} Scholarship {seed % 97 + i} | {degree} | {funds} | {country} | 2099-0{i + 1}-15 | "
+            f"https://example.org/scholarships/{seed % 10_000}-{i}"
+            for i, (topic, country) in enumerate((("Global Excellence", "united-kingdom"),
+                                                  ("International Research", "usa"),
+                                                  ("Future Leaders", "canada")))
+        ]
+        return _text("\n".join(lines))
+
+    # --- Documents ---
+    @staticmethod
+    def _draft(agent_name: str, request: str) -> str:
+        subject = request.splitlines()[0] if request else "the programme"
+        feedback = re.search(r"^Feedback: (.*)$", request, re.MULTILINE)
+        if request.startswith("Rewrite paragraph") and feedback:
+            paragraph = request.split("Paragraph:\n", 1)[1].split("\n\nFull draft for context:", 1)[0]
+            return f"{paragraph} {feedback.group(1)}"
+        if request.startswith("Revise this") and feedback:
+            paragraphs = request.split("Draft:\n", 1)[1].split("\n\n")
+            paragraphs[-1] += f" {feedback.group(1)}"
+            return "\n\n".join(paragraphs)
+        if agent_name == "refiner_agent":
+            # Light, deterministic "edit": normalise whitespace paragraph by paragraph
+            return "\n\n".join(" ".join(p.split()) for p in request.split("\n\n") if p.strip())
+        kind = "curriculum vitae" if agent_name == "cv_agent" else "statement of purpose"
+        paragraphs = [
+            f"This {kind} responds to the following request: {subject}",
+            "My academic background has prepared me for rigorous graduate study, and my coursework "
+            "built a strong foundation in research methods and quantitative analysis.",
+            "My research experience includes designing studies, collecting and analysing data, and "
+            "presenting findings; it taught me to frame precise questions and pursue them carefully.",
+            "I am applying because the programme's faculty and resources match my goals, and I am "
+            "confident I can contribute to its research community while growing as a scholar.",
+        ]
+        return "\n\n".join(paragraphs)
+
+
+STREAM_CHUNK_WORDS = 8
+
+
+class OfflineLlm(BaseLlm):
+    """One agent's model: asks the shared policy for the turn, after a simulated latency."""
+
+    model: str = OFFLINE_MODEL_NAME
+    agent_name: str
+    policy: Any
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        delay = self.policy.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        self.policy.record(self.agent_name)
+        content = self.policy.respond(self.agent_name, llm_request)
+        text = "".join(p.text or "" for p in content.parts or [])
+
+        if stream and text:
+            # Partial responses as the text is "generated", then the aggregate, as Gemini does
+            words = re.findall(r"\s*\S+\s*", text)
+            for start in range(0, len(words), STREAM_CHUNK_WORDS):
+                chunk = "".join(words[start:start + STREAM_CHUNK_WORDS])
+                await self._generate(chunk)
+                yield LlmResponse(content=_text(chunk), partial=True)
+        else:
+            await self._generate(text)
+
+        prompt_chars = sum(len(p.text or "") for c in llm_request.contents or [] for p in c.parts or [])
+        output_chars = len(text)
+        yield LlmResponse(
+            content=content,
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_chars // 4 + 1,
+                candidates_token_count=output_chars // 4 + 1,
+                total_token_count=prompt_chars // 4 + output_chars // 4 + 2,
+            ),
+        )
+
+    async def _generate(self, text: str):
+        if self.policy.token_latency and text:
+            await asyncio.sleep(self.policy.token_latency * (len(text) / 4))
+
+
+def iter_agents(root_agent):
+    """Every agent reachable from `root_agent` through sub-agents and AgentTool tools, once each."""
+    seen = set()
+    stack = [root_agent]
+    while stack:
+        agent = stack.pop()
+        if id(agent) in seen:
+            continue
+        seen.add(id(agent))
+        yield agent
+        stack.extend(getattr(agent, "sub_agents", None) or [])
+        stack.extend(tool.agent for tool in getattr(agent, "tools", None) or [] if isinstance(tool, AgentTool))
+
+
+def install_offline_model(root_agent, policy: OfflinePolicy = None) -> list:
+    """
+    Points every agent in the tree at an OfflineLlm sharing `policy` (rule-based by default).
+    Returns [(agent, previous model)]; pass it to `restore_models` to undo.
+    """
+    policy = policy or RuleBasedPolicy()
+    previous = []
+    for agent in iter_agents(root_agent):
+        if hasattr(agent, "model"):
+            previous.append((agent, agent.model))
+            agent.model = OfflineLlm(agent_name=agent.name, policy=policy)
+    return previous
+
+
+def restore_models(previous: list):
+    for agent, model in previous:
+        agent.model = model
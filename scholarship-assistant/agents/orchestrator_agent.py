@@ -1,51 +1,70 @@
 # agents/orchestrator.py
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.adk.tools import AgentTool, FunctionTool
-from google.genai import types
+from google.adk.tools import AgentTool, FunctionTool, load_memory
+
+from agents.model_pool import get_model
+from agents.registry import get_agent, lazy_attributes
 
 # Import tools
 from tools.profile_checker import save_userinfo, retrieve_userinfo
 from tools.hitl_reviewer import submit_draft_for_review
+from tools.search_cache import SearchFallbackTool, search_cache_before_tool, search_cache_after_tool
+from tools.intent_router import fast_path_before_agent
+
+from agents.document_pipeline import generate_application_documents, revise_document, write_document
 
-# Import sub-agents
-from agents.sub_agents.scholarship_agent import scholarship_agent, google_search_agent
-from agents.sub_agents.sop_agent import sop_agent
-from agents.sub_agents.cv_agent import cv_agent
-from agents.sub_agents.refiner_agent import refiner_agent
-
-MODEL_NAME = "gemini-2.5-flash-lite"
-RETRY_CONFIG = types.HttpRetryOptions(
-    attempts=5, exp_base=7, initial_delay=1, http_status_codes=[429, 500, 503, 504]
-)
-
-orchestrator_agent = LlmAgent(
-    name="orchestrator_agent",
-    model=Gemini(model=MODEL_NAME, retry_options=RETRY_CONFIG),
-    instruction="""
+ORCHESTRATOR_INSTRUCTION = """
     You are the Orchestrator for the Scholarship System.
 
     1. At the start of a new session, ALWAYS call `retrieve_userinfo` to check for saved user data.
+       It returns a summary in which long values (e.g. stored drafts) are truncated; pass `fields` (e.g. ["last_sop"]) only when you need a value in full.
     2. If the user asks to find scholarships, call the `scholarship_agent`.
 
     3. **Document Generation Pipeline (SOP/CV):** When the user asks to generate a CV or SOP, you MUST follow this strict sequence:
-        a. **Generate Draft:** Call the appropriate sub-agent (`cv_agent` or `sop_agent`) to generate the draft text.
-        b. **Refine Draft (AITL):** Immediately call the `refiner_agent` tool, passing the generated draft text as input. The refiner will return the polished draft.
-        c. **DISPLAY DRAFT TO USER:** Immediately output the polished draft text (the result of the refiner_agent) to the user.
-        d. **Submit for HITL:** Then, immediately call the `submit_draft_for_review` tool, passing the SAME polished draft text to the tool.
-        e. Wait for the tool's status (approval or rejection) and inform the user of the outcome, asking them to confirm the submission.
-    4. Once the draft is approved by the human, call `save_userinfo` to store the final output (e.g., user:last_sop or user:last_cv).
-    5. Always return concise, clear, and action-oriented responses to the user.
-    """,
-    tools=[
-        save_userinfo,
-        retrieve_userinfo,
-        AgentTool(agent=scholarship_agent),
-        AgentTool(agent=sop_agent),
-        AgentTool(agent=cv_agent),
-        FunctionTool(func=submit_draft_for_review),
-        AgentTool(agent=refiner_agent),
-        AgentTool(agent=google_search_agent),
-    ],
-)
\ No newline at end of file
+        a. **Generate and Refine:** Call `write_document` with the document type, the target scholarship or programme and any instructions.
+           It drafts the document and has it refined paragraph by paragraph (AITL), streaming the polished paragraphs to the user as they are ready.
+        b. **DISPLAY DRAFT TO USER:** Only if the result contains `draft_text` (nothing was streamed), output that text to the user.
+        c. **Submit for HITL:** Then, immediately call the `submit_draft_for_review` tool with the `draft_id` from the result, so the exact text the user saw is reviewed.
+        d. The tool queues the draft for human review and returns at once (status "queued"). Tell the user it is in the review queue; do not wait for the decision.
+        e. **Revise after Rejection:** When a "[Review #n] ... REJECTED" message arrives with the reviewer's feedback, or the user asks for changes to a draft,
+           call `revise_document` with that `draft_id`, the feedback and, if paragraphs are named, their numbers. Do NOT write the document again from scratch.
+           Then do steps b-d with the new `draft_id`.
+       **Several documents** (e.g. an SOP and a CV, or documents for several scholarships): call `generate_application_documents` ONCE with all targets and document types instead of step a.
+       It drafts and refines every document in parallel and returns them in order. Then do steps b-c for each document in that order, without waiting for any review.
+    4. Review decisions are delivered to the conversation later; approved drafts are saved to the profile (last_sop / last_cv) automatically.
+    5. If the user refers to an earlier conversation (e.g. "the scholarships we discussed last time"), call `load_memory` with a short query.
+    6. Always return concise, clear, and action-oriented responses to the user.
+    """
+
+
+def build_orchestrator_agent() -> LlmAgent:
+    # Sub-agents come from the registry, so the pipeline and these AgentTools share one instance each
+    return LlmAgent(
+        name="orchestrator_agent",
+        model=get_model(),
+        instruction=ORCHESTRATOR_INSTRUCTION,
+        tools=[
+            save_userinfo,
+            retrieve_userinfo,
+            AgentTool(agent=get_agent("scholarship_agent")),
+            AgentTool(agent=get_agent("sop_agent")),
+            AgentTool(agent=get_agent("cv_agent")),
+            FunctionTool(func=submit_draft_for_review),
+            AgentTool(agent=get_agent("refiner_agent")),
+            SearchFallbackTool(agent=get_agent("google_search_scholarships")),
+            write_document,
+            revise_document,
+            generate_application_documents,
+            load_memory,
+        ],
+        # Profile statements and plain scholarship searches are answered without an LLM turn
+        before_agent_callback=fast_path_before_agent,
+        before_tool_callback=search_cache_before_tool,
+        after_tool_callback=search_cache_after_tool,
+    )
+
+
+# Built on first use (agents/registry.py); sub-agents are re-exported for tests and benchmarks
+__getattr__ = lazy_attributes(__name__, orchestrator_agent="orchestrator_agent",
+                              scholarship_agent="scholarship_agent")
\ No newline at end of file
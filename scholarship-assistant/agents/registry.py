@@ -0,0 +1,56 @@
+# agents/registry.py
+#
+# Agents are built on first use instead of at import. Every agent has a factory, named
+# here as "module:function" so that importing the registry (or any agent module)
+# constructs nothing; `get_agent` builds an agent once per process and returns the same
+# object afterwards, so AgentTools, the document pipeline and the offline model all see
+# one instance. Models are shared through agents/model_pool.py, whose genai client is
+# itself only created on the first model call.
+# Agent modules keep `from agents.sub_agents.sop_agent import sop_agent` working through
+# a module `__getattr__` (see `lazy_attributes`).
+
+import importlib
+import threading
+
+_FACTORIES = {
+    "orchestrator_agent": "agents.orchestrator_agent:build_orchestrator_agent",
+    "scholarship_agent": "agents.sub_agents.scholarship_agent:build_scholarship_agent",
+    "google_search_scholarships": "agents.sub_agents.scholarship_agent:build_google_search_agent",
+    "sop_agent": "agents.sub_agents.sop_agent:build_sop_agent",
+    "cv_agent": "agents.sub_agents.cv_agent:build_cv_agent",
+    "refiner_agent": "agents.sub_agents.refiner_agent:build_refiner_agent",
+}
+
+_AGENTS = {}
+_LOCK = threading.RLock()  # re-entrant: building the orchestrator builds its sub-agents
+
+
+def get_agent(name: str):
+    """The process-wide agent called `name`, built on first use."""
+    agent = _AGENTS.get(name)
+    if agent is not None:
+        return agent
+    if name not in _FACTORIES:
+        raise KeyError(f"Unknown agent '{name}'. Known agents: {', '.join(_FACTORIES)}")
+    with _LOCK:
+        agent = _AGENTS.get(name)
+        if agent is None:
+            module_name, factory = _FACTORIES[name].split(":")
+            agent = getattr(importlib.import_module(module_name), factory)()
+            _AGENTS[name] = agent
+        return agent
+
+
+def built_agents() -> list:
+    """Names of the agents constructed so far in this process."""
+    with _LOCK:
+        return list(_AGENTS)
+
+
+def lazy_attributes(module_name: str, **attributes):
+    """Module `__getattr__` that serves `attribute="agent name"` pairs from the registry."""
+    def __getattr__(attribute: str):
+        if attribute in attributes:
+            return get_agent(attributes[attribute])
+        raise AttributeError(f"module '{module_name}' has no attribute '{attribute}'")
+    return __getattr__
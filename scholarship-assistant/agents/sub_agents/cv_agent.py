@@ -1,15 +1,20 @@
 # agents/cv_agent.py
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from agents.model_pool import get_model
+from agents.registry import lazy_attributes
 
-cv_agent = LlmAgent(
-    name="cv_agent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
-    instruction="""
+CV_INSTRUCTION = """
     You are an expert CV writer.
     1. Only generate a professional CV based on the user profile and scholarship details.
     2. Do NOT call any tools.
     3. Do NOT save anything. Just output the text of the CV.
     """
-)
\ No newline at end of file
+
+
+def build_cv_agent() -> LlmAgent:
+    return LlmAgent(name="cv_agent", model=get_model(), instruction=CV_INSTRUCTION)
+
+
+# Built on first use (agents/registry.py)
+__getattr__ = lazy_attributes(__name__, cv_agent="cv_agent")
\ No newline at end of file
@@ -1,12 +1,10 @@
 # agents/refiner_agent.py
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from agents.model_pool import get_model
+from agents.registry import lazy_attributes
 
-refiner_agent = LlmAgent(
-    name="refiner_agent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
-    instruction="""
+REFINER_INSTRUCTION = """
     You are an academic editor.
     Your job is to take raw text and return:
     - grammatically correct
@@ -15,4 +13,11 @@ refiner_agent = LlmAgent(
     - logically structured
     Do NOT add new ideas. Only improve writing.
     """
-)
\ No newline at end of file
+
+
+def build_refiner_agent() -> LlmAgent:
+    return LlmAgent(name="refiner_agent", model=get_model(), instruction=REFINER_INSTRUCTION)
+
+
+# Built on first use (agents/registry.py)
+__getattr__ = lazy_attributes(__name__, refiner_agent="refiner_agent")
\ No newline at end of file
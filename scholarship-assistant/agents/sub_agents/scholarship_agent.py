@@ -1,43 +1,33 @@
 # agents/scholarship_agent.py
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.adk.tools import google_search, AgentTool
+from google.adk.tools import google_search
+from agents.model_pool import get_model
+from agents.registry import get_agent, lazy_attributes
 from tools.finder import agent_scholarship_finder
 from tools.profile_checker import save_userinfo, retrieve_userinfo
-from google.genai import types # for HttpRetryOptions
+from tools.search_cache import SearchFallbackTool, search_cache_before_tool, search_cache_after_tool
 
-# Global constants (usually better to pass via config, but fine for a module)
-MODEL_NAME = "gemini-2.5-flash-lite"
-RETRY_CONFIG = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
+SEARCH_INSTRUCTION = """Use google_search tool to find scholarships worldwide.
+    Return raw search results, listing each scholarship on its own line in exactly this format:
+    Title | Degrees | Funds | Country | Deadline (YYYY-MM-DD) | URL
+    Write "Not specified" for any unknown field.
+    """
 
-# A Google Search Agent needs to be defined for the fallback search
-google_search_agent = LlmAgent(
-    name="google_search_scholarships", # Renamed for clarity inside the agent's tool list
-    model=Gemini(model=MODEL_NAME, retry_options=RETRY_CONFIG),
-    instruction="""Use google_search tool to find scholarships worldwide.\n    Return raw search results.\n    """,
-    tools=[google_search]
-)
-
-scholarship_agent = LlmAgent(
-    name="scholarship_agent",
-    model=Gemini(model=MODEL_NAME, retry_options=RETRY_CONFIG),
-    instruction="""
+SCHOLARSHIP_INSTRUCTION = """
     You are a smart scholarship recommendation assistant.
 
 --- Memory Rules ---
-1. Whenever the user explicitly provides their name or country, you MUST call the `save_userinfo` tool to store it in session state using the `user:` prefix.
-2. Before giving any scholarship recommendations, ALWAYS call the `retrieve_userinfo` tool to check whether user information is already stored.
+1. Whenever the user explicitly provides their name or country, you MUST call the `save_userinfo` tool to store it in session state, e.g. fields={"name": ..., "country": ...}.
+2. Before giving any scholarship recommendations, ALWAYS call the `retrieve_userinfo` tool to check whether user information is already stored (e.g. fields=["name", "country", "degree"]).
 3. If the user's name or country is missing after retrieval, politely ask the user for the missing details.
 
 --- Scholarship Search Rules ---
 4. When the user provides a scholarship query (degree, preferred country, funding preference), first call the `agent_scholarship_finder` tool.
-5. If the tool returns an empty list, you MUST call the `Google Search_scholarships` tool as a fallback to find external scholarship information.
+   Always pass the user's request in their own words as `query`; the tool uses it to fill in missing fields and rank results by relevance.
+   If the user names a minimum award (e.g. "at least $10k"), pass it as `min_amount`. If they want deadlines coming up soon, pass `sort_by="deadline"`.
+5. If the tool returns an empty `scholarships` list, you MUST call the `Google Search_scholarships` tool as a fallback to find external scholarship information.
+   Entries under `related` do NOT match the user's degree or country; never present them as matches.
 6. If both searches return no results, politely inform the user.
 
 --- Output Formatting Rules ---
@@ -51,11 +41,36 @@ scholarship_agent = LlmAgent(
    * **Deadline**: [Deadline]
 
 9. If any information is missing, write "Not specified".
-10. After the list, briefly explain WHY these scholarships match the user’s profile.""",
-    tools=[
-        agent_scholarship_finder, # Local finder tool
-        save_userinfo,
-        retrieve_userinfo,
-        AgentTool(agent=google_search_agent) # External search agent as a tool
-    ]
-)
\ No newline at end of file
+10. After the list, briefly explain WHY these scholarships match the user’s profile."""
+
+
+# A Google Search Agent needs to be defined for the fallback search
+def build_google_search_agent() -> LlmAgent:
+    return LlmAgent(
+        name="google_search_scholarships", # Renamed for clarity inside the agent's tool list
+        model=get_model(),
+        instruction=SEARCH_INSTRUCTION,
+        tools=[google_search]
+    )
+
+
+def build_scholarship_agent() -> LlmAgent:
+    return LlmAgent(
+        name="scholarship_agent",
+        model=get_model(),
+        instruction=SCHOLARSHIP_INSTRUCTION,
+        tools=[
+            agent_scholarship_finder, # Local finder tool
+            save_userinfo,
+            retrieve_userinfo,
+            SearchFallbackTool(agent=get_agent("google_search_scholarships")) # External search agent as a tool
+        ],
+        # Persistent cache in front of the (expensive) search fallback
+        before_tool_callback=search_cache_before_tool,
+        after_tool_callback=search_cache_after_tool,
+    )
+
+
+# Built on first use (agents/registry.py)
+__getattr__ = lazy_attributes(__name__, scholarship_agent="scholarship_agent",
+                              google_search_agent="google_search_scholarships")
\ No newline at end of file
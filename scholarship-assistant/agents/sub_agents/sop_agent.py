@@ -1,15 +1,20 @@
 # agents/sop_agent.py
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
+from agents.model_pool import get_model
+from agents.registry import lazy_attributes
 
-sop_agent = LlmAgent(
-    name="sop_agent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
-    instruction="""
+SOP_INSTRUCTION = """
     You are an expert academic SOP writer.
     1. Only generate a professional SOP based on the user profile and scholarship details.
     2. Do NOT call any tools.
     3. Do NOT save anything. Just output the text of the SOP.
     """
-)
\ No newline at end of file
+
+
+def build_sop_agent() -> LlmAgent:
+    return LlmAgent(name="sop_agent", model=get_model(), instruction=SOP_INSTRUCTION)
+
+
+# Built on first use (agents/registry.py)
+__getattr__ = lazy_attributes(__name__, sop_agent="sop_agent")
\ No newline at end of file
@@ -0,0 +1,383 @@
+# agents/tracing.py
+#
+# Where the time goes in a turn. TracingPlugin records one span per run (turn), agent,
+# model call and tool call, for every runner that inherits the app's plugins (AgentTool
+# and document pipeline runs nest under the tool that started them). Code outside the
+# callbacks adds to the current span with `annotate` (cache hits, rate-limiter waits,
+# RETRY_CONFIG backoff) or opens a child span with `span` (session-store writes).
+#
+# Spans are written as JSON lines with OpenTelemetry field names (trace_id, span_id,
+# parent_span_id, start/end_time_unix_nano, attributes, status). Summarise a trace file,
+# from the project root:
+#   python -m agents.tracing traces.jsonl            # last 5 turns + percentiles
+#   python -m agents.tracing traces.jsonl --turns 20
+
+import argparse
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+TRACE_PATH = os.environ.get("SCHOLARSHIP_TRACE_PATH", "traces.jsonl")
+TURN_HISTORY = 200  # per-turn summaries kept by the plugin
+DURATION_SAMPLES = 10_000  # per span name, for the in-process percentiles
+PERCENTILES = (50, 90, 99)
+
+_CURRENT = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    __slots__ = ("tracer", "parent", "trace_id", "span_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "status")
+
+    def __init__(self, tracer, parent, name: str, kind: str, attributes: dict):
+        self.tracer = tracer
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "OK"
+
+    def record(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "status": self.status,
+            "attributes": dict(self.attributes),
+        }
+
+
+def _active():
+    """
+    The innermost span still open in this context. Spans set inside async generators leak into
+    the consumer's context (e.g. tasks started while streaming a pipeline run), so ended spans
+    are skipped in favour of their nearest open ancestor.
+    """
+    current = _CURRENT.get()
+    while current is not None and current.end_ns is not None:
+        current = current.parent
+    return current
+
+
+def annotate(**values):
+    """Adds to the current span's attributes: numbers are summed, anything else is set. No-op outside a span."""
+    current = _active()
+    if current is None:
+        return
+    for key, value in values.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            current.attributes[key] = current.attributes.get(key, 0) + value
+        else:
+            current.attributes[key] = value
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """Child span of the current one (recorded by the same tracer); nothing is recorded outside a trace."""
+    parent = _active()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.tracer, parent, name, kind, attributes)
+    token = _CURRENT.set(child)
+    try:
+        yield child
+    except BaseException:
+        child.status = "ERROR"
+        raise
+    finally:
+        _CURRENT.reset(token)
+        child.end_ns = time.time_ns()
+        parent.tracer.export(child)
+
+
+# --- Summaries (shared by the plugin and the CLI) ---
+def _seconds(record: dict) -> float:
+    return (record["end_time_unix_nano"] - record["start_time_unix_nano"]) / 1e9
+
+
+def critical_path(records: list) -> list:
+    """
+    [(span name, seconds)] that determined the trace's end, oldest first: starting from the root,
+    the latest-finishing child is followed, then the child that finished before it started, and
+    so on; time not covered by a child is the span's own.
+    """
+    children = defaultdict(list)
+    roots = []
+    ids = {record["span_id"] for record in records}
+    for record in records:
+        if record["parent_span_id"] in ids:
+            children[record["parent_span_id"]].append(record)
+        else:
+            roots.append(record)
+    if not roots:
+        return []
+
+    def walk(record: dict, until: int) -> list:
+        cursor = min(record["end_time_unix_nano"], until)
+        path = []
+        for child in sorted(children[record["span_id"]], key=lambda c: c["end_time_unix_nano"], reverse=True):
+            # Children running alongside the one already on the path did not delay it
+            if child["start_time_unix_nano"] >= cursor or (path and child["end_time_unix_nano"] > cursor):
+                continue
+            child_end = min(child["end_time_unix_nano"], cursor)
+            path.append((record["name"], (cursor - child_end) / 1e9))
+            path.extend(reversed(walk(child, child_end)))
+            cursor = child["start_time_unix_nano"]
+        path.append((record["name"], max(0, cursor - record["start_time_unix_nano"]) / 1e9))
+        return list(reversed(path))
+
+    root = max(roots, key=_seconds)
+    merged = []
+    for name, seconds in walk(root, root["end_time_unix_nano"]):
+        if seconds < 0.0005:
+            continue
+        if merged and merged[-1][0] == name:
+            merged[-1] = (name, merged[-1][1] + seconds)
+        else:
+            merged.append((name, seconds))
+    return merged
+
+
+def turn_summary(records: list) -> dict:
+    """Wall time, critical path and totals of one trace (one turn)."""
+    root = max((r for r in records if r["kind"] == "run"), key=_seconds, default=None)
+    totals = defaultdict(float)
+    for record in records:
+        for key, value in record["attributes"].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and key.endswith(
+                    ("_tokens", "retries", "_seconds", "cache_hits", "cache_misses")):
+                totals[key] += value
+    return {
+        "trace_id": records[0]["trace_id"] if records else None,
+        "invocation_id": root["attributes"].get("invocation_id") if root else None,
+        "seconds": round(_seconds(root), 3) if root else 0.0,
+        "spans": len(records),
+        "model_calls": sum(r["kind"] == "model" for r in records),
+        "tool_calls": sum(r["kind"] == "tool" for r in records),
+        "errors": sum(r["status"] != "OK" for r in records),
+        "critical_path": [(name, round(seconds, 3)) for name, seconds in critical_path(records)],
+        **{key: round(value, 3) for key, value in totals.items()},
+    }
+
+
+def percentiles(durations: dict) -> dict:
+    """{name: {count, p50, p90, p99, max}} in milliseconds, from {name: [seconds]}."""
+    report = {}
+    for name, samples in durations.items():
+        ordered = sorted(samples)
+        if not ordered:
+            continue
+        report[name] = {"count": len(ordered), **{
+            f"p{p}": round(ordered[int(round(p / 100 * (len(ordered) - 1)))] * 1000, 1)
+            for p in PERCENTILES}, "max": round(ordered[-1] * 1000, 1)}
+    return report
+
+
+def format_critical_path(summary: dict, limit: int = 8) -> str:
+    steps = sorted(summary["critical_path"], key=lambda step: step[1], reverse=True)[:limit]
+    shown = [step for step in summary["critical_path"] if step in steps]
+    return " › ".join(f"{name} {seconds:.2f}s" for name, seconds in shown)
+
+
+class TracingPlugin(BasePlugin):
+    """Records run/agent/model/tool spans to a JSONL file and keeps per-turn summaries."""
+
+    def __init__(self, path: str = TRACE_PATH, name: str = "tracing"):
+        super().__init__(name=name)
+        self.path = path
+        self.turns = deque(maxlen=TURN_HISTORY)  # turn_summary() per finished trace
+        self._durations = defaultdict(lambda: deque(maxlen=DURATION_SAMPLES))
+        self._open = {}  # (invocation_id, kind, name or call id) -> Span
+        self._traces = defaultdict(list)  # trace_id -> finished span records
+        self._lock = threading.Lock()
+        self._file = None  # opened on the first span, so constructing the plugin touches no file
+        self._closed = False
+        atexit.register(self.shutdown)
+
+    # --- Span bookkeeping ---
+    def _start(self, key: tuple, name: str, kind: str, **attributes) -> Span:
+        started = Span(self, _active(), name, kind, attributes)
+        with self._lock:
+            self._open[key] = started
+        _CURRENT.set(started)
+        return started
+
+    def _end(self, key: tuple, status: str = "OK", **attributes):
+        with self._lock:
+            ended = self._open.pop(key, None)
+        if ended is None:
+            return None
+        ended.attributes.update(attributes)
+        ended.status = status
+        ended.end_ns = time.time_ns()
+        if _CURRENT.get() is ended:
+            _CURRENT.set(ended.parent)
+        self.export(ended)
+        return ended
+
+    def export(self, finished: Span):
+        record = finished.record()
+        with self._lock:
+            self._durations[f"{finished.kind}:{finished.name}"].append(_seconds(record))
+            if self._file is None and self.path and not self._closed:
+                self._file = open(self.path, "a", encoding="utf-8")
+            if self._file is not None:
+                self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            if finished.parent is not None:
+                self._traces[finished.trace_id].append(record)
+                return
+            records = self._traces.pop(finished.trace_id, []) + [record]
+            self.turns.append(turn_summary(records))
+            if self._file is not None:
+                self._file.flush()
+
+    # --- Runs (turns) ---
+    async def before_run_callback(self, *, invocation_context):
+        self._start((invocation_context.invocation_id, "run"), "invocation", "run",
+                    app_name=invocation_context.app_name, user_id=invocation_context.user_id,
+                    session_id=invocation_context.session.id, invocation_id=invocation_context.invocation_id)
+        return None
+
+    async def after_run_callback(self, *, invocation_context):
+        invocation_id = invocation_context.invocation_id
+        with self._lock:
+            # Spans whose closing callback never ran (short-circuited agents, cancelled calls)
+            leftover = [key for key in self._open if key[0] == invocation_id and key[1] != "run"]
+        for key in sorted(leftover, key=lambda k: self._open[k].start_ns, reverse=True):
+            self._end(key, status="UNFINISHED")
+        self._end((invocation_id, "run"))
+
+    # --- Agents ---
+    async def before_agent_callback(self, *, agent, callback_context):
+        self._start((callback_context.invocation_id, "agent", agent.name), f"invoke_agent {agent.name}", "agent",
+                    agent=agent.name)
+        return None
+
+    async def after_agent_callback(self, *, agent, callback_context):
+        self._end((callback_context.invocation_id, "agent", agent.name))
+        return None
+
+    # --- Model calls ---
+    async def before_model_callback(self, *, callback_context, llm_request):
+        self._start((callback_context.invocation_id, "model", callback_context.agent_name),
+                    f"call_llm {callback_context.agent_name}", "model",
+                    agent=callback_context.agent_name, model=llm_request.model)
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        key = (callback_context.invocation_id, "model", callback_context.agent_name)
+        if llm_response.partial:
+            with self._lock:
+                started = self._open.get(key)
+            if started is not None:
+                started.attributes["chunks"] = started.attributes.get("chunks", 0) + 1
+                started.attributes.setdefault("first_chunk_seconds",
+                                              round((time.time_ns() - started.start_ns) / 1e9, 3))
+            return None
+        usage = llm_response.usage_metadata
+        self._end(key, status="ERROR" if llm_response.error_code else "OK",
+                  prompt_tokens=(usage.prompt_token_count or 0) if usage else 0,
+                  response_tokens=(usage.candidates_token_count or 0) if usage else 0)
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        self._end((callback_context.invocation_id, "model", callback_context.agent_name),
+                  status="ERROR", error=repr(error))
+        return None
+
+    # --- Tool calls ---
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        self._start((tool_context.invocation_id, "tool", tool_context.function_call_id),
+                    f"execute_tool {tool.name}", "tool", tool=tool.name, agent=tool_context.agent_name)
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        failed = isinstance(result, dict) and result.get("status") == "error"
+        cached = isinstance(result, dict) and bool(result.get("cached"))
+        self._end((tool_context.invocation_id, "tool", tool_context.function_call_id),
+                  status="ERROR" if failed else "OK", **({"cache_hit": True} if cached else {}))
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        self._end((tool_context.invocation_id, "tool", tool_context.function_call_id),
+                  status="ERROR", error=repr(error))
+        return None
+
+    # --- Reports ---
+    def stats(self) -> dict:
+        """Per span name ("kind:name") latency percentiles in milliseconds, over recent spans."""
+        with self._lock:
+            durations = {name: list(samples) for name, samples in self._durations.items()}
+        return percentiles(durations)
+
+    async def close(self):
+        # Called whenever a runner sharing this plugin closes (pipeline runs do, per call): flush only
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def print_report(turns: list, stats: dict, top: int = 12):
+    for turn in turns:
+        print(f"⏱️ Turn {turn['invocation_id']}: {turn['seconds']:.2f}s, {turn['model_calls']} model calls, "
+              f"{turn['tool_calls']} tool calls, {turn.get('prompt_tokens', 0):.0f}+"
+              f"{turn.get('response_tokens', 0):.0f} tokens, {turn.get('retries', 0):.0f} retries "
+              f"({turn.get('retry_seconds', 0):.1f}s backoff), {turn.get('cache_hits', 0):.0f} cache hits")
+        print(f"   critical path: {format_critical_path(turn)}")
+    print(f"{'span':<48} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, row in sorted(stats.items(), key=lambda item: item[1]["p90"] * item[1]["count"], reverse=True)[:top]:
+        print(f"{name[:48]:<48} {row['count']:>6} {row['p50']:>9} {row['p90']:>9} {row['p99']:>9} {row['max']:>9}")
+
+
+def load_traces(path: str) -> dict:
+    """{trace_id: [span records]} from a JSONL trace file, in file order."""
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                traces[record["trace_id"]].append(record)
+    return traces
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise a span file written by TracingPlugin")
+    parser.add_argument("path", nargs="?", default=TRACE_PATH)
+    parser.add_argument("--turns", type=int, default=5, help="critical paths of the last N turns")
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+    durations = defaultdict(list)
+    for records in traces.values():
+        for record in records:
+            durations[f"{record['kind']}:{record['name']}"].append(_seconds(record))
+    turns = [turn_summary(records) for records in traces.values() if any(r["kind"] == "run" for r in records)]
+    print(f"{len(traces)} traces, {sum(map(len, traces.values()))} spans in {args.path}")
+    print_report(turns[-args.turns:] if args.turns else [], percentiles(durations))
+
+
+if __name__ == "__main__":
+    main()
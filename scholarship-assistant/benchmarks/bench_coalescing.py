@@ -0,0 +1,101 @@
+"""
+bench_coalescing.py
+
+Bursts of identical requests from many sessions at once, with and without single-flight
+coalescing (tools/single_flight.py):
+  finder  N threads call agent_scholarship_finder with the same profile and query
+          (each call is a real catalog search)
+  search  N coroutines ask the search fallback the same question in slightly different
+          words (the google search agent is replaced by a fixed delay, --search-ms)
+
+Reports the wall time of the burst, how many searches actually ran and the flight counters.
+
+Run from the project root:
+python benchmarks/bench_coalescing.py [--sessions 50] [--rounds 5] [--search-ms 800]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.tools.agent_tool import AgentTool
+
+import tools.finder as finder
+import tools.search_cache as search_cache
+from agents.registry import get_agent
+
+PROFILE = {"degree": "PhD", "country": "USA", "funding": "Fully Funded"}
+QUERY = "fully funded PhD in management"
+SEARCH_WORDINGS = ["PhD scholarships in Management", "phd scholarship in management", "PhD  Scholarships in Management"]
+
+
+def finder_burst(sessions: int, coalesce: bool) -> tuple:
+    finder.finder_flight.clear()
+    computed = []
+
+    def call(_):
+        if coalesce:
+            return finder.agent_scholarship_finder(dict(PROFILE), include_expired=True, query=QUERY)
+        computed.append(1)
+        options = dict(top_k=5, min_amount=0, include_expired=True, sort_by="score", query=QUERY)
+        return finder._find_with_fallback(dict(PROFILE), options)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(call, range(sessions)))
+    ran = finder.finder_flight.stats()["misses"] if coalesce else len(computed)
+    return time.perf_counter() - start, ran
+
+
+async def search_burst(sessions: int, coalesce: bool, delay: float) -> tuple:
+    search_cache.search_flight.clear()
+    searches = []
+
+    async def fake_search(self, *, args, tool_context):
+        searches.append(args["request"])
+        await asyncio.sleep(delay)
+        return "Management PhD Fellowship | PhD | Fully Funded | usa | 2099-01-31 | https://example.org/phd"
+
+    original = AgentTool.run_async
+    AgentTool.run_async = fake_search
+    try:
+        tool_class = search_cache.SearchFallbackTool if coalesce else AgentTool
+        tool = tool_class(agent=get_agent("google_search_scholarships"))
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            tool.run_async(args={"request": SEARCH_WORDINGS[i % len(SEARCH_WORDINGS)]}, tool_context=None)
+            for i in range(sessions)
+        ))
+        return time.perf_counter() - start, len(searches)
+    finally:
+        AgentTool.run_async = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Identical concurrent requests with and without coalescing")
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent identical requests per burst")
+    parser.add_argument("--rounds", type=int, default=5, help="bursts per mode (p50 reported)")
+    parser.add_argument("--search-ms", type=float, default=800, help="simulated search fallback latency")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} identical requests per burst, p50 of {args.rounds} bursts")
+    print(f"{'scenario':>8} {'mode':>10} {'wall ms':>9} {'ran':>5}")
+    for coalesce in (False, True):
+        mode = "coalesced" if coalesce else "baseline"
+        runs = sorted(finder_burst(args.sessions, coalesce) for _ in range(args.rounds))
+        wall, ran = runs[len(runs) // 2]
+        print(f"{'finder':>8} {mode:>10} {wall * 1000:>9.1f} {ran:>5}")
+        runs = sorted(asyncio.run(search_burst(args.sessions, coalesce, args.search_ms / 1000))
+                      for _ in range(args.rounds))
+        wall, ran = runs[len(runs) // 2]
+        print(f"{'search':>8} {mode:>10} {wall * 1000:>9.1f} {ran:>5}")
+    print(f"flights: {finder.finder_flight.stats()} {search_cache.search_flight.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+bench_context_budget.py
+
+Prompt size over one long session, fully offline (agents/offline_model.py): the orchestrator
+handles searches and SOP/CV requests turn after turn, so the conversation it re-sends grows
+with scholarship lists, profile dumps and drafts. agents/context_budget.py compacts every
+model call to the per-call budget; for each turn this reports the prompt tokens of all model
+calls before and after compaction, and the tokens saved.
+
+Run from the project root: python benchmarks/bench_context_budget.py [--turns 24] [--budget 6000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.context_budget import CONTEXT_TOKEN_BUDGET, ContextBudgetPlugin
+from agents.offline_model import RuleBasedPolicy, install_offline_model
+from agents.orchestrator_agent import orchestrator_agent
+from tools import intent_router
+from tools.review_queue import ReviewQueue, set_review_queue
+
+APP_NAME = "context_budget_benchmark_app"
+MESSAGES = [
+    "Find fully funded PhD scholarships in the UK",
+    "Please write an SOP for a PhD in Management at Oxford University.",
+    "Find Masters scholarships in Germany with a monthly stipend",
+    "Please write a CV for the DAAD scholarship.",
+    "Find PhD scholarships in the USA with deadlines soon",
+    "Please write an SOP for the Chevening Scholarship.",
+]
+
+
+async def main(turns: int, budget: int):
+    intent_router.FAST_PATH_ENABLED = False  # every turn goes through the orchestrator's model
+    set_review_queue(ReviewQueue(":memory:"))
+    install_offline_model(orchestrator_agent, RuleBasedPolicy())
+    plugin = ContextBudgetPlugin(budget=budget)
+    app = App(name=APP_NAME, root_agent=orchestrator_agent, plugins=[plugin],
+              resumability_config=ResumabilityConfig(is_resumable=True))
+    runner = Runner(app=app, session_service=InMemorySessionService())
+    session = await runner.session_service.create_session(app_name=APP_NAME, user_id="u")
+
+    print(f"per-call budget: {budget} tokens")
+    print(f"{'turn':>5} {'calls':>6} {'tokens before':>14} {'tokens after':>13} {'saved':>7} {'max call after':>15}")
+    for turn in range(1, turns + 1):
+        message = types.Content(role="user", parts=[types.Part(text=MESSAGES[(turn - 1) % len(MESSAGES)])])
+        before = dict(plugin.totals)
+        plugin.turns.clear()
+        async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+            pass
+        delta = {key: plugin.totals[key] - before.get(key, 0) for key in plugin.totals}
+        largest = max((t["largest_call"] for t in plugin.turns), default=0)
+        print(f"{turn:5d} {delta['model_calls']:6d} {delta['tokens_before']:14d} {delta['tokens_after']:13d} "
+              f"{delta['tokens_saved']:7d} {largest:15d}")
+
+    totals = plugin.stats()
+    print(f"total: {totals['tokens_before']} -> {totals['tokens_after']} prompt tokens "
+          f"({totals['tokens_saved'] / max(1, totals['tokens_before']):.0%} saved); "
+          f"{totals.get('deduplicated', 0)} profile dumps deduplicated, {totals.get('referenced', 0)} drafts "
+          f"referenced, {totals.get('summarized', 0)} outputs summarised, {totals.get('dropped_turns', 0)} turns dropped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt tokens per turn over a long session, with the context budget")
+    parser.add_argument("--turns", type=int, default=24)
+    parser.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET, help="prompt tokens per model call")
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.budget))
@@ -0,0 +1,112 @@
+"""
+bench_finder.py
+
+Finder latency against catalog size: the indexed/heap path in tools/finder.py versus
+a plain linear scan with a full sort (the pre-index behaviour), and throughput of
+find_scholarships_batch versus one find_scholarships call per profile, and the
+latency of free-text (BM25-ranked) queries on the bundled dataset.
+The bundled dataset is replicated to build larger synthetic catalogs.
+
+Run from the project root: python benchmarks/bench_finder.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.catalog import get_catalog, normalize_funds
+from tools.finder import DATASET_PATH, find_scholarships, find_scholarships_batch
+
+SIZES = [558, 5_000, 50_000, 200_000]
+BATCH_PROFILES = 2_000
+REPEATS = 50
+PROFILES = [
+    {"degree": "PhD", "country": "USA", "funding": "Fully Funded"},
+    {"degree": "Masters", "country": "united-kingdom", "funding": "any"},
+    {"degree": "any", "country": "Canada", "funding": "$1,000"},
+]
+
+
+def linear_find(profile: dict, records: list, top_k: int = 5) -> list:
+    """Pre-index behaviour: scan every (pre-normalized) record, then sort all matches."""
+    any_degree = str(profile.get("degree", "")).lower() == "any"
+    any_country = str(profile.get("country", "")).lower() == "any"
+    funding_pref = normalize_funds(profile.get("funding", ""))
+    eligible = []
+    for index, (degrees, location, funds) in enumerate(records):
+        if (any_degree or profile["degree"] in degrees) and (any_country or profile["country"].lower() in location):
+            score = 1 if funding_pref == "any" or funding_pref in funds else 0
+            eligible.append((score, index))
+    eligible.sort(key=lambda x: x[0], reverse=True)
+    return eligible[:top_k]
+
+
+def time_ms(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) * 1000 / REPEATS
+
+
+def main():
+    with open(DATASET_PATH) as f:
+        base = json.load(f)
+
+    print(f"{'records':>10} {'linear ms':>12} {'indexed ms':>12} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            items = [dict(base[i % len(base)], title=f"{base[i % len(base)]['title']} #{i}") for i in range(size)]
+            path = os.path.join(tmp, f"catalog_{size}.json")
+            with open(path, "w") as f:
+                json.dump(items, f)
+            get_catalog(path)
+            records = [(s["degrees"], s["location"].lower(), normalize_funds(s["funds"])) for s in items]
+
+            linear = sum(time_ms(lambda: linear_find(p, records)) for p in PROFILES) / len(PROFILES)
+            indexed = sum(time_ms(lambda: find_scholarships(p, path, include_expired=True)) for p in PROFILES) / len(PROFILES)
+            print(f"{size:>10} {linear:>12.3f} {indexed:>12.3f} {linear / indexed:>8.1f}x")
+
+        bench_batch(base)
+        bench_text_queries()
+
+
+def bench_batch(base: list):
+    degrees = ["PhD", "Masters", "Bachelor", "Course", "any"]
+    countries = ["USA", "united-kingdom", "canada", "india", "any"]
+    fundings = ["any", "Fully Funded", "$1,000", "partially"]
+    profiles = [
+        {"degree": degrees[i % 5], "country": countries[(i // 5) % 5], "funding": fundings[(i // 25) % 4]}
+        for i in range(BATCH_PROFILES)
+    ]
+    find_scholarships_batch(profiles[:1])  # warm up: NumPy import and columnar encoding
+
+    start = time.perf_counter()
+    looped = [find_scholarships(p, DATASET_PATH) for p in profiles]
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = find_scholarships_batch(profiles)
+    batch_s = time.perf_counter() - start
+
+    assert batched == looped
+    print(f"\n{BATCH_PROFILES} profiles x {len(base)} records: "
+          f"per-profile loop {loop_s * 1000:.1f} ms, batch {batch_s * 1000:.1f} ms")
+
+
+def bench_text_queries():
+    queries = [
+        "fully funded Management PhD in the UK",
+        "Masters in computer science in Canada, at least $10k",
+        "undergraduate engineering scholarship USA",
+    ]
+    find_scholarships({}, DATASET_PATH, query=queries[0])  # warm up: build the BM25 index
+    ms = sum(time_ms(lambda: find_scholarships({}, DATASET_PATH, query=q)) for q in queries) / len(queries)
+    print(f"free-text query (parse + filter + BM25 rank): {ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+bench_memory.py
+
+Long-term memory for many users in one process: ADK's InMemoryMemoryService (keeps
+every session, scans every remembered event of the user on each search) versus
+runner/memory_store.py (per-user cap, SQLite spill of inactive users, n-gram index).
+
+Each user remembers --sessions sessions of --turns text events. Reports the time to add
+them all, the Python heap held by the service once the active users have searched
+(tracemalloc, which also slows the adds of both services), and search latency p50/p99 for
+active users and, for the bounded service, for users it has to load from disk.
+
+Run from the project root:
+python benchmarks/bench_memory.py [--users 2000] [--sessions 20] [--turns 4] [--hot-users 200]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events.event import Event
+from google.adk.memory import InMemoryMemoryService
+from google.adk.sessions import Session
+from google.genai import types
+
+from runner.memory_store import BoundedMemoryService
+
+WORDS = ("phd master bachelor management finance physics biology law medicine engineering "
+         "uk usa canada germany japan australia funded partial deadline essay interview "
+         "professor research proposal ielts gre transcript recommendation budget visa").split()
+QUERIES = 200
+
+
+def make_session(user: int, session: int, turns: int, rng: random.Random) -> Session:
+    events = [
+        Event(invocation_id=f"inv-{session}-{turn}", author="user" if turn % 2 == 0 else "orchestrator_agent",
+              content=types.Content(role="user", parts=[types.Part(text=" ".join(rng.choices(WORDS, k=12)))]))
+        for turn in range(turns)
+    ]
+    return Session(app_name="bench", user_id=f"user-{user}", id=f"s-{user}-{session}", events=events)
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[round(p / 100 * (len(values) - 1))]
+
+
+async def measure(service, args) -> dict:
+    rng = random.Random(7)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for session in range(args.sessions):
+        for user in range(args.users):
+            await service.add_session_to_memory(make_session(user, session, args.turns, rng))
+    add_seconds = time.perf_counter() - start
+
+    async def latencies(users) -> list:
+        samples = []
+        for user in users:
+            query = " ".join(rng.choices(WORDS, k=3))
+            start = time.perf_counter()
+            await service.search_memory(app_name="bench", user_id=f"user-{user}", query=query)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    # The last users are the recently active ones (searched once already); the first half
+    # has never been searched, so the bounded service loads them from disk
+    active = range(max(args.users // 2, args.users - args.hot_users), args.users)
+    await latencies(active)
+    heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    hot = await latencies(rng.choices(active, k=QUERIES))
+    cold = await latencies(rng.sample(range(args.users // 2), min(QUERIES, args.users // 2)))
+    return {"add": add_seconds, "heap": heap, "hot": hot, "cold": cold}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory service: add time, search latency and heap size")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=20, help="sessions remembered per user")
+    parser.add_argument("--turns", type=int, default=4, help="text events per session")
+    parser.add_argument("--hot-users", type=int, default=200, help="users the bounded service keeps in memory")
+    parser.add_argument("--cap", type=int, default=50, help="entries the bounded service keeps per user")
+    args = parser.parse_args()
+
+    entries = args.users * args.sessions * args.turns
+    print(f"{args.users} users x {args.sessions} sessions x {args.turns} events = {entries} memories")
+    print(f"{'service':>12} {'add s':>7} {'heap MB':>8} {'search p50/p99 ms':>18} {'spilled p50/p99 ms':>19}")
+    with tempfile.TemporaryDirectory() as tmp:
+        services = {
+            "in-memory": InMemoryMemoryService(),
+            "bounded": BoundedMemoryService(os.path.join(tmp, "memory.db"), max_entries_per_user=args.cap,
+                                            max_hot_users=args.hot_users),
+        }
+        for name, service in services.items():
+            result = asyncio.run(measure(service, args))
+
+            def column(samples: list) -> str:
+                return f"{percentile(samples, 50) * 1000:.3f} / {percentile(samples, 99) * 1000:.3f}"
+
+            print(f"{name:>12} {result['add']:>7.2f} {result['heap'] / 2**20:>8.1f} {column(result['hot']):>18} "
+                  f"{column(result['cold']) if name == 'bounded' else '-':>19}")
+        print(f"bounded: {services['bounded'].stats()}")
+        services["bounded"].close()
+
+
+if __name__ == "__main__":
+    main()
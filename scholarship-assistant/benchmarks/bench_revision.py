@@ -0,0 +1,88 @@
+"""
+bench_revision.py
+
+Cost of a revision turn after a HITL rejection, fully offline (agents/offline_model.py with a
+simulated time to first token and generation speed). An SOP is written and queued for review;
+the reviewer rejects it with feedback about one paragraph, and delivering the decision runs the
+revision turn. With the paragraph refinement cache on and off:
+
+  paragraph   "Mention ... in paragraph 2."   -> only paragraph 2 is rewritten
+  whole       "End by mentioning ..."         -> the drafter returns the full revised draft
+
+Reports the revision turn's latency, refiner calls and characters sent to the refiner.
+
+Run from the project root: python benchmarks/bench_revision.py [--latency 0.5] [--tokens-per-second 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents import document_pipeline
+from agents.offline_model import RuleBasedPolicy, install_offline_model
+from agents.orchestrator_agent import orchestrator_agent
+from runner.review_dispatch import deliver_review_decisions
+from tools import intent_router
+from tools.review_queue import ReviewQueue, get_review_queue, set_review_queue
+
+APP_NAME = "revision_benchmark_app"
+REVISIONS = {
+    "paragraph": "Mention my MBA thesis on supply chains in paragraph 2.",
+    "whole": "End by mentioning the faculty I would like to work with.",
+}
+
+
+def user_text(text: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+async def revision_turn(policy, feedback: str) -> tuple:
+    install_offline_model(orchestrator_agent, policy)
+    app = App(name=APP_NAME, root_agent=orchestrator_agent, resumability_config=ResumabilityConfig(is_resumable=True))
+    runner = Runner(app=app, session_service=InMemorySessionService())
+    session = await runner.session_service.create_session(app_name=APP_NAME, user_id="u")
+
+    message = user_text("Please write an SOP for a PhD in Management at Oxford University.")
+    async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+        pass
+    queue = get_review_queue()
+    queue.decide([(queue.pending()[-1]["review_id"], False, feedback)])
+
+    refiner_calls = policy.calls["refiner_agent"]
+    refiner_chars = document_pipeline.refine_cache_stats()["refiner_chars"]
+    start = time.perf_counter()
+    await deliver_review_decisions(runner, queue)
+    return (time.perf_counter() - start, policy.calls["refiner_agent"] - refiner_calls,
+            document_pipeline.refine_cache_stats()["refiner_chars"] - refiner_chars)
+
+
+async def main(latency: float, tokens_per_second: float):
+    intent_router.FAST_PATH_ENABLED = False
+    set_review_queue(ReviewQueue(":memory:"))
+    print(f"model: {latency:.2f} s to first token, {tokens_per_second:.0f} tokens/s")
+    print(f"{'revision':>10} {'cache':>6} {'turn s':>7} {'refiner calls':>14} {'refiner chars':>14}")
+    cache_size = document_pipeline.REFINE_CACHE_SIZE
+    for name, feedback in REVISIONS.items():
+        for cached in (False, True):
+            document_pipeline.REFINE_CACHE_SIZE = cache_size if cached else 0
+            document_pipeline.clear_refine_cache()
+            policy = RuleBasedPolicy(latency=latency, token_latency=1 / tokens_per_second)
+            seconds, calls, chars = await revision_turn(policy, feedback)
+            print(f"{name:>10} {'on' if cached else 'off':>6} {seconds:7.2f} {calls:14d} {chars:14d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Revision turn cost with and without the refinement cache")
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="simulated generation speed")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.tokens_per_second))
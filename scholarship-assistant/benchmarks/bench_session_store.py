@@ -0,0 +1,116 @@
+"""
+bench_session_store.py
+
+Session-store cost as one session's history grows from 10 to 10,000 events:
+ADK's DatabaseSessionService on SQLite (one transaction per event, full history on
+every load) versus runner/session_store.py (WAL, one transaction per turn, and
+compaction of old events), with compaction both enabled and disabled.
+
+For each size it reports the write cost per event while building the history, the
+latency of one more turn, get_session (what every runner turn and HITL resume does),
+and create_session in the same database.
+
+Run from the project root: python benchmarks/bench_session_store.py [--max-events 10000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from runner.session_store import SqliteSessionStore
+
+SIZES = [10, 100, 1_000, 10_000]
+EVENTS_PER_TURN = 4  # user message, tool call, tool response, final answer
+REPEATS = 20
+TEXT = "A fully funded PhD scholarship in Management at a UK university. " * 4
+
+
+def make_turn(turn: int) -> list:
+    """One turn's events; the last one is the final response and carries a state change."""
+    invocation_id = f"inv-{turn}"
+    call = types.FunctionCall(name="agent_scholarship_finder", args={"query": TEXT})
+    response = types.FunctionResponse(name="agent_scholarship_finder", response={"scholarships": [TEXT] * 3})
+    return [
+        Event(invocation_id=invocation_id, author="user",
+              content=types.Content(role="user", parts=[types.Part(text=TEXT)])),
+        Event(invocation_id=invocation_id, author="scholarship_agent",
+              content=types.Content(role="model", parts=[types.Part(function_call=call)])),
+        Event(invocation_id=invocation_id, author="scholarship_agent",
+              content=types.Content(role="user", parts=[types.Part(function_response=response)])),
+        Event(invocation_id=invocation_id, author="scholarship_agent",
+              content=types.Content(role="model", parts=[types.Part(text=TEXT)]),
+              actions=EventActions(state_delta={"last_turn": turn})),
+    ]
+
+
+STORES = {
+    "adk DatabaseSessionService": lambda path: DatabaseSessionService(db_url=f"sqlite+aiosqlite:///{path}"),
+    "session_store (no compaction)": lambda path: SqliteSessionStore(path, compact_after=10 ** 9),
+    "session_store": lambda path: SqliteSessionStore(path),
+}
+
+
+async def median_ms(fn) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+async def bench_size(make_store, directory: str, events: int) -> tuple:
+    store = make_store(os.path.join(directory, f"sessions-{events}.db"))
+    session = await store.create_session(app_name="bench", user_id="u", session_id="long")
+
+    start = time.perf_counter()
+    for turn in range(events // EVENTS_PER_TURN):
+        for event in make_turn(turn):
+            await store.append_event(session, event)
+    build_us = (time.perf_counter() - start) * 1e6 / events
+
+    next_turn = events // EVENTS_PER_TURN
+    start = time.perf_counter()
+    for event in make_turn(next_turn):
+        await store.append_event(session, event)
+    turn_ms = (time.perf_counter() - start) * 1000
+
+    get_ms = await median_ms(lambda: store.get_session(app_name="bench", user_id="u", session_id="long"))
+    created = iter(range(REPEATS))
+    create_ms = await median_ms(lambda: store.create_session(app_name="bench", user_id="u",
+                                                             session_id=f"new-{next(created)}"))
+    loaded = len((await store.get_session(app_name="bench", user_id="u", session_id="long")).events)
+    if hasattr(store, "close"):
+        store.close()
+    return build_us, turn_ms, get_ms, create_ms, loaded
+
+
+async def main(max_events: int):
+    print(f"{'store':>30} {'events':>7} {'write us/event':>15} {'turn ms':>8} "
+          f"{'get ms':>8} {'create ms':>10} {'loaded':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for events in [size for size in SIZES if size <= max_events]:
+            for name, make_store in STORES.items():
+                directory = os.path.join(tmp, name.replace(" ", "_"))
+                os.makedirs(directory, exist_ok=True)
+                build_us, turn_ms, get_ms, create_ms, loaded = await bench_size(make_store, directory, events)
+                print(f"{name:>30} {events:>7} {build_us:15.0f} {turn_ms:8.2f} "
+                      f"{get_ms:8.2f} {create_ms:10.2f} {loaded:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Session store latency against session length")
+    parser.add_argument("--max-events", type=int, default=SIZES[-1], help="largest session to build")
+    args = parser.parse_args()
+    asyncio.run(main(args.max_events))
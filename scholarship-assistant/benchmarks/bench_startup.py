@@ -0,0 +1,117 @@
+"""
+bench_startup.py
+
+Cold start of a worker, each sample in a fresh interpreter (and a fresh working directory,
+so no session database exists yet):
+  finder      import tools.finder, then the first find_scholarships call (catalog load)
+  runner      import runner.main, build the runner (get_runner), then the first response to
+              a plain scholarship search (answered by the fast path, no model call)
+  runner_llm  as runner, but the first response needs the orchestrator and the document
+              pipeline (offline model with no simulated latency, so only our own cost shows)
+
+Reports p50/max over the samples of: import time, runner build time, time to first
+response (measured from the end of the import) and the total, plus whether the import
+pulled in google.adk and how many agents it constructed (none, since agents/registry.py).
+
+Run from the project root:
+python benchmarks/bench_startup.py [--samples 5]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = {
+    "finder": None,
+    "runner": "Can you find 5 fully-funded PhD scholarships for Management in the UK?",
+    "runner_llm": "Please write an SOP for a PhD at Oxford.",
+}
+
+
+def child(scenario: str) -> dict:
+    """One cold start, inside the child process."""
+    report = {}
+    start = time.perf_counter()
+    if scenario == "finder":
+        from tools.finder import DATASET_PATH, find_scholarships
+        report["import"] = time.perf_counter() - start
+        report["adk_imported"] = "google.adk" in sys.modules
+        first = time.perf_counter()
+        find_scholarships({"degree": "PhD", "country": "United Kingdom", "funding": "Fully Funded"}, DATASET_PATH)
+        report["first_response"] = time.perf_counter() - first
+        report["total"] = time.perf_counter() - start
+        return report
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import runner.main as main
+    report["import"] = time.perf_counter() - start
+    report["adk_imported"] = "google.adk" in sys.modules
+    from agents.registry import built_agents, get_agent
+    report["agents_built_at_import"] = len(built_agents())
+
+    from google.genai import types
+    from agents.offline_model import RuleBasedPolicy, install_offline_model
+
+    first = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner = main.get_runner()
+    report["build"] = time.perf_counter() - first
+    install_offline_model(get_agent("orchestrator_agent"), RuleBasedPolicy())
+
+    async def first_reply() -> None:
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id="bench")
+        message = types.Content(role="user", parts=[types.Part(text=SCENARIOS[scenario])])
+        async for event in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+            if event.is_final_response():
+                return
+
+    asyncio.run(first_reply())
+    report["first_response"] = time.perf_counter() - first
+    report["total"] = time.perf_counter() - start
+    return report
+
+
+def sample(scenario: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "PYTHONPATH": ROOT, "SCHOLARSHIP_REVIEW_DB": os.path.join(tmp, "reviews.db"),
+               "SCHOLARSHIP_TRACE_PATH": os.path.join(tmp, "traces.jsonl")}
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", scenario], cwd=tmp, env=env,
+                                capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker cold start: import time and time to first response")
+    parser.add_argument("--samples", type=int, default=5, help="fresh processes per scenario")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(child(args.child)))
+        return
+
+    print(f"{args.samples} cold starts per scenario (p50 / max, ms)")
+    print(f"{'scenario':>11} {'import':>15} {'build':>13} {'first reply':>15} {'total':>15} {'adk':>5} {'agents':>7}")
+    for scenario in SCENARIOS:
+        reports = [sample(scenario) for _ in range(args.samples)]
+
+        def column(key: str) -> str:
+            values = sorted(r[key] * 1000 for r in reports if key in r)
+            return f"{values[len(values) // 2]:.0f} / {values[-1]:.0f}" if values else "-"
+
+        print(f"{scenario:>11} {column('import'):>15} {column('build'):>13} {column('first_response'):>15} "
+              f"{column('total'):>15} {'yes' if reports[0]['adk_imported'] else 'no':>5} "
+              f"{reports[0].get('agents_built_at_import', '-'):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+bench_streaming.py
+
+Time until the user sees the first refined SOP paragraph, fully offline (agents/offline_model.py
+with a simulated time to first token and generation speed):
+
+  blocking   the previous pipeline: sop_agent writes the whole draft, refiner_agent rewrites the
+             whole draft, and only then is any text shown.
+  streaming  write_document: the draft is streamed, each paragraph is refined as soon as it is
+             complete, and refined paragraphs reach the user's sink as they are ready.
+
+Reports time to first paragraph and time until the draft is complete, and checks that the
+streamed text is exactly the text submitted for review.
+
+Run from the project root: python benchmarks/bench_streaming.py [--iterations 5] [--latency 0.5]
+                                                                [--tokens-per-second 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.document_pipeline import stream_drafts_to
+from agents.offline_model import RuleBasedPolicy, _function_call, _function_responses, _result_text, \
+    install_offline_model
+from agents.orchestrator_agent import orchestrator_agent
+from tools.review_queue import ReviewQueue, get_review_queue, set_review_queue
+
+APP_NAME = "streaming_benchmark_app"
+REQUEST = "Please write an SOP for a PhD in Management at Oxford University."
+
+
+class BlockingPipelinePolicy(RuleBasedPolicy):
+    """The orchestrator as it was before write_document: whole draft, then whole refinement."""
+
+    def _orchestrator_agent(self, contents: list) -> types.Content:
+        responses = _function_responses(contents[-1]) if contents else []
+        if not responses:
+            return _function_call("sop_agent", {"request": REQUEST})
+        response = responses[-1]
+        if response.name == "sop_agent":
+            return _function_call("refiner_agent", {"request": _result_text(response.response or {})})
+        return super()._orchestrator_agent(contents)
+
+
+async def run_once(policy, streaming: bool) -> tuple:
+    install_offline_model(orchestrator_agent, policy)
+    app = App(name=APP_NAME, root_agent=orchestrator_agent, resumability_config=ResumabilityConfig(is_resumable=True))
+    runner = Runner(app=app, session_service=InMemorySessionService())
+    session = await runner.session_service.create_session(app_name=APP_NAME, user_id="u")
+    message = types.Content(role="user", parts=[types.Part(text=REQUEST)])
+
+    paragraphs, first = [], None
+    start = time.perf_counter()
+
+    def sink(document, index, paragraph):
+        nonlocal first
+        first = first or time.perf_counter() - start
+        paragraphs.append(paragraph)
+
+    done, submitted = None, None
+    with stream_drafts_to(sink if streaming else None):
+        async for event in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+            for response in event.get_function_responses():
+                if response.name in ("write_document", "refiner_agent"):
+                    done = time.perf_counter() - start
+                    first = first or done  # blocking: the whole draft appears at once
+                if response.name == "submit_draft_for_review" and response.response.get("draft_id"):
+                    submitted = get_review_queue().draft_text(response.response["draft_id"])
+    if streaming and "\n\n".join(paragraphs) != submitted:
+        raise AssertionError("streamed text differs from the text submitted for review")
+    return first, done
+
+
+async def main(iterations: int, latency: float, tokens_per_second: float):
+    set_review_queue(ReviewQueue(":memory:"))
+    print(f"model: {latency:.2f} s to first token, {tokens_per_second:.0f} tokens/s")
+    print(f"{'pipeline':>10} {'first paragraph s':>18} {'complete draft s':>17}")
+    for name, policy_class, streaming in (("blocking", BlockingPipelinePolicy, False),
+                                          ("streaming", RuleBasedPolicy, True)):
+        runs = [await run_once(policy_class(latency=latency, token_latency=1 / tokens_per_second), streaming)
+                for _ in range(iterations)]
+        print(f"{name:>10} {statistics.median(r[0] for r in runs):18.2f} "
+              f"{statistics.median(r[1] for r in runs):17.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time to first refined paragraph, blocking vs streaming")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="simulated generation speed")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.latency, args.tokens_per_second))
@@ -0,0 +1,190 @@
+"""
+bench_workflow.py
+
+End-to-end latency of the orchestrator flows, fully offline: every agent runs on the
+scripted model from agents/offline_model.py (with a simulated per-call latency), while
+the real tools, callbacks, session service and HITL review queue all execute.
+
+Flows, each on a fresh session:
+  profile_save      "My name is ... I am from ..."            -> retrieve + save_userinfo
+  scholarship_find  "Can you find ... PhD scholarships ..."   -> scholarship_agent -> local finder
+  sop_pipeline      "Please write an SOP ..."                 -> write_document (streamed draft, refined
+                                                                 paragraph by paragraph) -> review queue,
+                                                                 then approval and delivery
+  document_fanout   "... an SOP and a CV for each of: ..."    -> generate_application_documents (parallel
+                                                                 draft -> refine chains), every draft
+                                                                 queued, then one batch approval
+
+Reports p50/p99 latency per flow, and per run: LLM calls, tool calls and time spent in
+the session store. --no-fast-path sends every message through the orchestrator's LLM
+instead of the rule-based intent router (tools/intent_router.py). --trace records every
+run through agents/tracing.py and prints per-span percentiles and the last turn's critical path.
+
+Run from the project root:
+python benchmarks/bench_workflow.py [--iterations 20] [--latency 0.05] [--session-store store|adk|memory]
+                                    [--no-fast-path] [--max-parallel-chains 4] [--trace traces.jsonl]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService, InMemorySessionService
+from google.genai import types
+
+from agents import document_pipeline
+from agents.offline_model import RuleBasedPolicy, install_offline_model
+from agents.orchestrator_agent import orchestrator_agent
+from agents.tracing import TracingPlugin, print_report
+from tools import intent_router
+from runner.concurrent import _percentile
+from runner.review_dispatch import deliver_review_decisions
+from runner.session_store import SqliteSessionStore
+from tools.review_queue import ReviewQueue, get_review_queue, set_review_queue
+
+APP_NAME = "scholarship_benchmark_app"
+USER_ID = "bench_user"
+FLOWS = {
+    "profile_save": ["My name is Rifat Hasan. I am from Bangladesh."],
+    "scholarship_find": ["Can you find 5 fully-funded PhD scholarships for Management in the UK?"],
+    "sop_pipeline": [
+        "Using my profile, please write an excellent Statement of Purpose (SOP) for a PhD at "
+        "Oxford University. Focus on my research experience."
+    ],
+    "document_fanout": [
+        "Using my profile, please write an SOP and a CV for each of these scholarships: "
+        "Chevening, Fulbright, DAAD, Erasmus Mundus and Commonwealth."
+    ],
+}
+_SESSION_METHODS = ("create_session", "get_session", "append_event")
+
+
+class ToolCallCounter(BasePlugin):
+    """Counts tool calls by name, including calls made inside AgentTool sub-agents."""
+
+    def __init__(self):
+        super().__init__(name="tool_call_counter")
+        self.calls = Counter()
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        self.calls[tool.name] += 1
+        return None
+
+
+def time_session_store(session_service) -> dict:
+    """Wraps the session service's hot methods to accumulate the seconds spent in them."""
+    totals = {"seconds": 0.0, "calls": 0}
+
+    def timed(method):
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                totals["seconds"] += time.perf_counter() - start
+                totals["calls"] += 1
+        return wrapper
+
+    for name in _SESSION_METHODS:
+        setattr(session_service, name, timed(getattr(session_service, name)))
+    return totals
+
+
+async def run_flow(runner: Runner, session_id: str, messages: list) -> int:
+    """
+    Sends the flow's messages, then the reviewer approves every draft the session queued in one
+    batch and the decisions are delivered. Returns the number of approvals.
+    """
+    await runner.session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    for message in messages:
+        new_message = types.Content(role="user", parts=[types.Part(text=message)])
+        async for _ in runner.run_async(user_id=USER_ID, session_id=session_id, new_message=new_message):
+            pass
+    queue = get_review_queue()
+    queued = [review["review_id"] for review in queue.pending(limit=1000) if review["session_id"] == session_id]
+    if queued:
+        queue.decide([(review_id, True) for review_id in queued])
+        await deliver_review_decisions(runner, queue)
+    return len(queued)
+
+
+def make_session_service(kind: str, directory: str):
+    if kind == "store":
+        return SqliteSessionStore(os.path.join(directory, "bench.db"))
+    if kind == "adk":
+        return DatabaseSessionService(db_url=f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+    return InMemorySessionService()
+
+
+async def bench(iterations: int, latency: float, session_store: str, trace_path: str = None):
+    policy = RuleBasedPolicy(latency=latency, jitter=latency / 5)
+    install_offline_model(orchestrator_agent, policy)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        set_review_queue(ReviewQueue(os.path.join(tmp, "reviews.db")))
+        session_service = make_session_service(session_store, tmp)
+        store = time_session_store(session_service)
+        tools = ToolCallCounter()
+        tracing = TracingPlugin(trace_path) if trace_path else None
+        runner = Runner(
+            app=App(
+                name=APP_NAME,
+                root_agent=orchestrator_agent,
+                plugins=[tools] + ([tracing] if tracing else []),
+                resumability_config=ResumabilityConfig(is_resumable=True),
+            ),
+            session_service=session_service,
+        )
+
+        await run_flow(runner, "warm-up", FLOWS["scholarship_find"])  # catalog load, BM25 index
+
+        print(f"session store: {type(session_service).__name__}, simulated model latency {latency * 1000:.0f} ms, "
+              f"{iterations} runs per flow")
+        print(f"{'flow':>18} {'p50 ms':>9} {'p99 ms':>9} {'llm calls':>10} {'tool calls':>11} {'store ms':>9}")
+        for flow, messages in FLOWS.items():
+            latencies = []
+            policy.reset()
+            tools.calls.clear()
+            store.update(seconds=0.0, calls=0)
+            for i in range(iterations):
+                start = time.perf_counter()
+                await run_flow(runner, f"{flow}-{i}", messages)
+                latencies.append(time.perf_counter() - start)
+
+            print(f"{flow:>18} {_percentile(latencies, 50) * 1000:9.1f} {_percentile(latencies, 99) * 1000:9.1f} "
+                  f"{sum(policy.calls.values()) / iterations:10.1f} {sum(tools.calls.values()) / iterations:11.1f} "
+                  f"{store['seconds'] * 1000 / iterations:9.1f}")
+
+        if tracing:
+            tracing.shutdown()
+            print(f"\nspans written to {trace_path}")
+            print_report(list(tracing.turns)[-1:], tracing.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the orchestrator flows")
+    parser.add_argument("--iterations", type=int, default=20, help="runs per flow")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per model call")
+    parser.add_argument("--max-parallel-chains", type=int, default=document_pipeline.MAX_PARALLEL_CHAINS,
+                        help="concurrent draft -> refine chains in document_fanout")
+    parser.add_argument("--no-fast-path", action="store_true", help="disable the rule-based intent router")
+    parser.add_argument("--session-store", choices=("store", "adk", "memory"), default="store",
+                        help="runner.session_store (default), ADK's DatabaseSessionService, or in-memory")
+    parser.add_argument("--trace", default=None, help="write spans to this JSONL file and print a summary")
+    args = parser.parse_args()
+    intent_router.FAST_PATH_ENABLED = not args.no_fast_path
+    document_pipeline.MAX_PARALLEL_CHAINS = args.max_parallel_chains
+    asyncio.run(bench(args.iterations, args.latency, args.session_store, args.trace))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# runner/concurrent.py
+#
+# Bounded-concurrency multi-session runner: drives many users' sessions in parallel
+# from one process (real traffic or load tests) while keeping each session's
+# messages strictly ordered, and reports per-session latency and throughput.
+
+import asyncio
+import time
+
+from google.adk.runners import Runner
+from google.genai import types
+
+# Jobs read ahead of the free slots (waiting for a slot or for their session's previous job)
+PENDING_PER_SLOT = 4
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _ensure_session(runner_instance: Runner, user_id: str, session_id: str):
+    session_service_instance = runner_instance.session_service
+    session = await session_service_instance.get_session(
+        app_name=runner_instance.app_name, user_id=user_id, session_id=session_id
+    )
+    if session is None:
+        session = await session_service_instance.create_session(
+            app_name=runner_instance.app_name, user_id=user_id, session_id=session_id
+        )
+    return session
+
+
+async def _run_job(runner_instance: Runner, user_id: str, session_id: str, messages: list, verbose: bool) -> dict:
+    """Runs one job's messages strictly in order and reports its latencies."""
+    report = {"user_id": user_id, "session_id": session_id, "messages": len(messages),
+              "message_latencies": [], "latency": 0.0, "error": None}
+    start = time.perf_counter()
+    try:
+        session = await _ensure_session(runner_instance, user_id, session_id)
+        for message in messages:
+            sent = time.perf_counter()
+            content = types.Content(role="user", parts=[types.Part(text=message)])
+            async for event in runner_instance.run_async(
+                    user_id=user_id, session_id=session.id, new_message=content
+            ):
+                if verbose and event.content and event.content.parts and event.content.parts[0].text:
+                    print(f"[{session_id}] {event.author} > ", event.content.parts[0].text)
+            report["message_latencies"].append(time.perf_counter() - sent)
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+    report["latency"] = time.perf_counter() - start
+    return report
+
+
+async def _iterate(jobs):
+    if hasattr(jobs, "__aiter__"):
+        async for job in jobs:
+            yield job
+    else:
+        for job in jobs:
+            yield job
+
+
+async def run_concurrent_sessions(
+        runner_instance: Runner,
+        jobs,
+        max_concurrency: int = 8,
+        verbose: bool = False,
+) -> dict:
+    """
+    Drives many sessions in parallel from one process.
+    `jobs` is an iterable or async iterable of (user_id, session_id, messages) tuples.
+    At most `max_concurrency` jobs run at once; jobs for the same session run one after another
+    in stream order, so its messages stay ordered. A job waits for its session's previous job
+    before taking a slot, so queued turns of one session never hold slots other sessions need.
+    The stream is read at most `PENDING_PER_SLOT * max_concurrency` jobs ahead.
+    Returns per-session reports plus latency percentiles and throughput.
+    """
+    slots = asyncio.Semaphore(max_concurrency)
+    pending = asyncio.Semaphore(PENDING_PER_SLOT * max_concurrency)
+    session_tails = {}  # (user_id, session_id) -> task of the latest job for that session
+    tasks = []
+
+    async def run_in_slot(user_id, session_id, messages, previous):
+        acquired = False
+        try:
+            if previous is not None:
+                # Wait for the earlier job of this session, whatever its outcome, before taking a slot
+                await asyncio.wait([previous])
+            await slots.acquire()
+            acquired = True
+            return await _run_job(runner_instance, user_id, session_id, messages, verbose)
+        finally:
+            if acquired:
+                slots.release()
+            pending.release()
+
+    start = time.perf_counter()
+    async for user_id, session_id, messages in _iterate(jobs):
+        if isinstance(messages, str):
+            messages = [messages]
+        await pending.acquire()
+        key = (user_id, session_id)
+        task = asyncio.create_task(run_in_slot(user_id, session_id, list(messages), session_tails.get(key)))
+        session_tails[key] = task
+
+        def forget_tail(done, key=key):
+            if session_tails.get(key) is done:
+                del session_tails[key]
+
+        task.add_done_callback(forget_tail)
+        tasks.append(task)
+
+    reports = list(await asyncio.gather(*tasks))
+    wall_time = time.perf_counter() - start
+
+    latencies = [r["latency"] for r in reports]
+    message_latencies = [t for r in reports for t in r["message_latencies"]]
+    return {
+        "sessions": reports,
+        "jobs": len(reports),
+        "errors": sum(1 for r in reports if r["error"]),
+        "wall_time": wall_time,
+        "jobs_per_second": len(reports) / wall_time if wall_time else 0.0,
+        "messages_per_second": len(message_latencies) / wall_time if wall_time else 0.0,
+        "session_latency_p50": _percentile(latencies, 50),
+        "session_latency_p95": _percentile(latencies, 95),
+        "message_latency_p50": _percentile(message_latencies, 50),
+        "message_latency_p95": _percentile(message_latencies, 95),
+    }
+
+
+def print_concurrency_report(summary: dict):
+    print(f"\n ### Concurrent run: {summary['jobs']} jobs, {summary['errors']} errors, "
+          f"{summary['wall_time']:.2f}s wall")
+    print(f"Throughput: {summary['jobs_per_second']:.2f} sessions/s, {summary['messages_per_second']:.2f} messages/s")
+    print(f"Session latency p50/p95: {summary['session_latency_p50']:.2f}s / {summary['session_latency_p95']:.2f}s")
+    print(f"Message latency p50/p95: {summary['message_latency_p50']:.2f}s / {summary['message_latency_p95']:.2f}s")
+    for report in summary["sessions"]:
+        status = f"❌ {report['error']}" if report["error"] else "✅"
+        print(f"  {report['user_id']}/{report['session_id']}: {report['messages']} messages "
+              f"in {report['latency']:.2f}s {status}")
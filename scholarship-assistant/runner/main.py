@@ -1,33 +1,47 @@
 # runner/main.py
 
-import os
 import asyncio
+import argparse
+import threading
 from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
-from google.adk.memory import InMemoryMemoryService
 from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.genai import types
 
 # --- 1. CONFIGURATION ---
 APP_NAME = "scholarship_orchestrator_app"
 USER_ID = "default"
-DB_URL = "sqlite:///scholarship_orchestrator.db"
-MODEL_NAME = "gemini-2.5-flash-lite"
+# Sessions persist across runs; delete this file for a fresh start
+DB_PATH = "scholarship_orchestrator.db"
+# Long-term memory of past sessions (bounded per user, spilled to disk)
+MEMORY_DB_PATH = "scholarship_memory.db"
 # Ensure GOOGLE_API_KEY is set in your environment variables for local testing
 # os.environ["GOOGLE_API_KEY"] = "YOUR_API_KEY_HERE"
 
-# Clean up old database files for a fresh start if needed
-if os.path.exists(DB_URL.replace("sqlite:///", "")):
-    os.remove(DB_URL.replace("sqlite:///", ""))
-    print(f"✅ Cleaned up old database file: {DB_URL.replace('sqlite:///', '')}")
-
 # --- 2. IMPORT AGENT ---
-# The Orchestrator agent should be imported from the agents package
-from agents.orchestrator import orchestrator_agent
+# Agents are built on first use through the registry (agents/registry.py): importing this
+# module constructs no agent, opens no database and creates no model client.
+from agents.registry import get_agent
+from agents.model_pool import MODEL_NAME, get_rate_limiter
+from agents.document_pipeline import stream_drafts_to
+from agents.context_budget import ContextBudgetPlugin
+from agents.tracing import TracingPlugin, format_critical_path, print_report
+from runner.concurrent import run_concurrent_sessions, print_concurrency_report
+from runner.review_dispatch import deliver_review_decisions
+from runner.memory_store import BoundedMemoryService, RememberSessionsPlugin
+from runner.session_store import SqliteSessionStore
+from tools.intent_router import router_stats
+from tools.single_flight import single_flight_stats
+
+
+# --- 3. HELPER FUNCTIONS (From Notebook) ---
+def print_draft_paragraph(document: dict, index: int, paragraph: str):
+    """Draft sink: refined paragraphs are printed as soon as they are ready."""
+    if index == 0:
+        print(f"\n📝 {document['document_type']} draft ({document['target']}):\n")
+    print(paragraph, end="\n\n", flush=True)
 
 
-# --- 3. HELPER FUNCTION (From Notebook) ---
-# Note: This function requires 'session_service' to be defined later.
 async def run_session(
         runner_instance: Runner,
         user_queries: list[str] | str = None,
@@ -36,6 +50,9 @@ async def run_session(
     print(f"\n ### Session: {session_name}")
 
     app_name = runner_instance.app_name
+    session_service = runner_instance.session_service
+    context_budget = runner_instance.plugin_manager.get_plugin("context_budget")
+    tracing = runner_instance.plugin_manager.get_plugin("tracing")
 
     try:
         session = await session_service.create_session(
@@ -54,42 +71,88 @@ async def run_session(
             print(f"\nUser > {query}")
             query = types.Content(role="user", parts=[types.Part(text=query)])
 
-            async for event in runner_instance.run_async(
-                    user_id=USER_ID, session_id=session.id, new_message=query
-            ):
-                if event.content and event.content.parts:
-                    if (
-                            event.content.parts[0].text != "None"
-                            and event.content.parts[0].text
-                    ):
-                        print(f"{MODEL_NAME} > ", event.content.parts[0].text)
+            # Partial events stream the orchestrator's replies; drafts stream through the sink
+            streaming = False
+            with stream_drafts_to(print_draft_paragraph):
+                async for event in runner_instance.run_async(
+                        user_id=USER_ID, session_id=session.id, new_message=query,
+                        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+                ):
+                    if event.content and event.content.parts:
+                        text = event.content.parts[0].text
+                        if not text or text == "None":
+                            continue
+                        if event.partial:
+                            if not streaming:
+                                print(f"{MODEL_NAME} > ", end="")
+                            print(text, end="", flush=True)
+                            streaming = True
+                        elif streaming:
+                            print()  # the aggregate repeats the streamed text
+                            streaming = False
+                        else:
+                            print(f"{MODEL_NAME} > ", text)
+            turn = context_budget.turns[-1] if context_budget and context_budget.turns else None
+            if turn and turn["tokens_saved"]:
+                print(f"🧮 Context budget: {turn['tokens_before']} -> {turn['tokens_after']} prompt tokens "
+                      f"({turn['tokens_saved']} saved over {turn['model_calls']} model calls)")
+            trace = tracing.turns[-1] if tracing and tracing.turns else None
+            if trace:
+                print(f"⏱️ {trace['seconds']:.2f}s, critical path: {format_critical_path(trace)}")
     else:
         print("No queries!")
 
 
 # --- 4. SERVICES AND RUNNER SETUP ---
+_RUNNER = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_runner() -> Runner:
+    """The orchestrator runner, with its services and plugins, built on first use."""
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is not None:
+            return _RUNNER
+
+        # Initialize Session Service (Persistent: WAL-mode SQLite, batched writes, compaction)
+        session_service = SqliteSessionStore(DB_PATH)
+
+        # Initialize Memory Service (Bounded: per-user cap with LRU/age eviction, SQLite spill, n-gram recall)
+        memory_service = BoundedMemoryService(MEMORY_DB_PATH)
+
+        # Wrap Orchestrator in a resumable App
+        orchestrator_app = App(
+            name=APP_NAME,
+            root_agent=get_agent("orchestrator_agent"),
+            plugins=[
+                # Spans for every turn, agent, model and tool call (python -m agents.tracing traces.jsonl)
+                TracingPlugin(),
+                # Per-call prompt budget for every agent: old drafts and tool outputs are compacted
+                ContextBudgetPlugin(),
+                # Every turn is remembered; the orchestrator recalls past sessions with load_memory
+                RememberSessionsPlugin(memory_service),
+            ],
+            resumability_config=ResumabilityConfig(is_resumable=True),
+        )
 
-# Initialize Session Service (Persistent)
-session_service = DatabaseSessionService(db_url=DB_URL)
-
-# Initialize Memory Service (In-memory, for now)
-memory_service = InMemoryMemoryService()
-
-# Wrap Orchestrator in a resumable App
-orchestrator_app = App(
-    name=APP_NAME,
-    root_agent=orchestrator_agent,
-    resumability_config=ResumabilityConfig(is_resumable=True),
-)
+        # Initialize the Runner
+        _RUNNER = Runner(
+            app=orchestrator_app,
+            session_service=session_service,
+            memory_service=memory_service,
+        )
+        print("✅ Orchestrator Runner initialized successfully!")
+        return _RUNNER
 
-# Initialize the Runner
-orchestrator_runner = Runner(
-    app=orchestrator_app,
-    session_service=session_service,
-    memory_service=memory_service,
-)
 
-print("✅ Orchestrator Runner initialized successfully!")
+def print_runner_stats(runner_instance: Runner):
+    print(f"📊 Model calls (rate limiter): {get_rate_limiter().metrics()}")
+    print(f"🧭 Fast-path router: {router_stats()}")
+    print(f"🪢 Coalesced calls: {single_flight_stats()}")
+    print(f"🧠 Memory: {runner_instance.memory_service.stats()}")
+    print(f"🧮 Context budget: {runner_instance.plugin_manager.get_plugin('context_budget').stats()}")
+    print_report([], runner_instance.plugin_manager.get_plugin("tracing").stats())
 
 
 # --- 5. MAIN EXECUTION BLOCK ---
@@ -97,6 +160,7 @@ async def main():
     """Runs a comprehensive test workflow for the Scholarship Orchestrator."""
 
     session_id = "full-workflow-test-01"
+    orchestrator_runner = get_runner()
 
     print("\n--- 📝 Step 1: User Profile and Application Input ---")
 
@@ -132,14 +196,49 @@ async def main():
         session_id
     )
 
-    # The HITL tool will PAUSE here.
-    # If we run this in a real scenario, the Human Reviewer's decision must be input in the subsequent prompt.
-    # E.g.: "The SOP draft is approved."
+    # The draft is now in the review queue; nothing is paused.
+    # Review it with `python -m tools.review_queue list|approve|reject`, then deliver the decision
+    # to this session with `python -m runner.main --deliver-reviews`.
 
     print("\n✅ Request sent to test all main functionalities (Save, Find, Generate).")
-    print("Next step: Continue the session by responding to the HITL (Human-in-the-Loop) request in your environment.")
+    print("Next step: review the queued draft (python -m tools.review_queue list), then run with --deliver-reviews.")
+    print_runner_stats(orchestrator_runner)
+
+
+async def main_concurrent(sessions: int, concurrency: int):
+    """Load test: the profile + search conversation for many synthetic users at once."""
+    messages = [
+        "My name is Rifat Hasan. I am from Bangladesh.",
+        "Can you find 5 fully-funded PhD scholarships for Management in the USA or UK?",
+    ]
+    jobs = ((f"load-user-{i}", f"load-session-{i}", messages) for i in range(sessions))
+    orchestrator_runner = get_runner()
+    summary = await run_concurrent_sessions(orchestrator_runner, jobs, max_concurrency=concurrency)
+    print_concurrency_report(summary)
+    print_runner_stats(orchestrator_runner)
+
+
+async def main_deliver_reviews(concurrency: int):
+    """Delivers decided reviews to their sessions (approvals saved, rejections with feedback revised)."""
+    summary = await deliver_review_decisions(get_runner(), max_concurrency=concurrency)
+    print(f"📬 Review decisions delivered: {', '.join(f'{k}={v}' for k, v in summary.items() if k != 'revisions')}")
+    if "revisions" in summary:
+        print_concurrency_report(summary["revisions"])
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scholarship Orchestrator runner")
+    parser.add_argument("--concurrent-sessions", type=int, default=0,
+                        help="run a load test with this many parallel sessions instead of the demo workflow")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum sessions in flight at once")
+    parser.add_argument("--deliver-reviews", action="store_true",
+                        help="deliver the review queue's decisions to their sessions and exit")
+    args = parser.parse_args()
+
     # Ensure all asynchronous components are run
-    asyncio.run(main())
\ No newline at end of file
+    if args.deliver_reviews:
+        asyncio.run(main_deliver_reviews(args.concurrency))
+    elif args.concurrent_sessions:
+        asyncio.run(main_concurrent(args.concurrent_sessions, args.concurrency))
+    else:
+        asyncio.run(main())
\ No newline at end of file
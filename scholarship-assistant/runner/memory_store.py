@@ -0,0 +1,326 @@
+# runner/memory_store.py
+#
+# Bounded memory service (ADK BaseMemoryService) for a long-lived process serving many users.
+# - Every remembered event (one with text) is written through to a local SQLite store, at
+#   most `max_entries_per_user` per user: past the cap the least recently recalled entries
+#   are deleted, and entries older than `max_age` expire. A session added again only adds
+#   the events after the last one remembered, so evicted entries never come back.
+# - Recall runs on an in-process word n-gram index (unigrams and bigrams of
+#   tools/text_index.tokenize, so "UK" finds "United Kingdom"): a query only touches the
+#   postings of its own terms, never every entry. Matches are ranked by summed IDF, so
+#   rare words and whole phrases count more than common words.
+# - Only the `max_hot_users` most recently searched users stay indexed in memory; the
+#   others spill to disk and are reloaded (one indexed read of at most the cap, re-tokenized)
+#   on their next search. Sessions added for a spilled user are written and capped in SQL
+#   without loading it. Memory use is bounded by hot users x per-user cap.
+# - Adds and searches run in a worker thread (asyncio.to_thread), so their SQLite reads
+#   and writes never stall the event loop.
+# - RememberSessionsPlugin adds the session to the runner's memory after every turn; the
+#   orchestrator recalls it with ADK's load_memory tool.
+
+import asyncio
+import atexit
+import heapq
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from google.adk.memory.base_memory_service import BaseMemoryService, SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from agents.tracing import annotate
+from runner.session_store import PRAGMAS
+from tools.text_index import tokenize
+
+MAX_ENTRIES_PER_USER = 500
+MAX_HOT_USERS = 1000
+MAX_AGE = 180 * 24 * 3600  # seconds
+MAX_RESULTS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, id TEXT NOT NULL, session_id TEXT NOT NULL,
+    author TEXT, timestamp REAL NOT NULL, last_used REAL NOT NULL, text TEXT NOT NULL, content TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS remembered_sessions (
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL, last_timestamp REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)) WITHOUT ROWID;
+"""
+
+
+def memory_terms(text: str) -> set:
+    """Index terms of a text: its tokens and each pair of adjacent tokens."""
+    tokens = tokenize(text)
+    return set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def _text(content: types.Content) -> str:
+    return " ".join(part.text for part in content.parts or () if part.text)
+
+
+class _Entry:
+    """One remembered event; its content is kept as JSON and only parsed when recalled."""
+
+    __slots__ = ("id", "session_id", "author", "timestamp", "last_used", "text", "content_json", "_content")
+
+    def __init__(self, entry_id, session_id, author, timestamp, last_used, text, content_json, content=None):
+        self.id = entry_id
+        self.session_id = session_id
+        self.author = author
+        self.timestamp = timestamp
+        self.last_used = last_used
+        self.text = text
+        self.content_json = content_json
+        self._content = content
+
+    @classmethod
+    def from_event(cls, event, session_id: str, now: float):
+        return cls(event.id, session_id, event.author, event.timestamp, now, _text(event.content),
+                   event.content.model_dump_json(exclude_none=True), event.content)
+
+    @property
+    def content(self) -> types.Content:
+        if self._content is None:
+            self._content = types.Content.model_validate_json(self.content_json)
+        return self._content
+
+    def row(self, key: tuple) -> tuple:
+        return (*key, self.id, self.session_id, self.author, self.timestamp, self.last_used, self.text,
+                self.content_json)
+
+
+class _UserMemory:
+    """
+    One user's entries in recall order (least recently used first) and their term postings.
+    Postings are lists (most terms occur in one or two entries) and an entry's terms are
+    not kept: eviction, the only removal, tokenizes its text again.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()  # id -> _Entry
+        self.postings = {}  # term -> list of entry ids
+        self.touched = set()  # ids whose last_used is newer in memory than on disk
+
+    def add(self, entry: _Entry):
+        self.entries[entry.id] = entry
+        for term in memory_terms(entry.text):
+            self.postings.setdefault(term, []).append(entry.id)
+
+    def remove(self, entry_id: str):
+        entry = self.entries.pop(entry_id)
+        self.touched.discard(entry_id)
+        for term in memory_terms(entry.text):
+            ids = self.postings[term]
+            ids.remove(entry_id)
+            if not ids:
+                del self.postings[term]
+
+    def search(self, query: str, limit: int, oldest: float) -> list:
+        """Best `limit` entries for the query; entries older than `oldest` have expired and are skipped."""
+        scores = {}
+        n = len(self.entries)
+        for term in memory_terms(query):
+            ids = self.postings.get(term)
+            if ids:
+                idf = math.log(1 + n / len(ids))
+                for entry_id in ids:
+                    if self.entries[entry_id].timestamp >= oldest:
+                        scores[entry_id] = scores.get(entry_id, 0.0) + idf
+        best = heapq.nsmallest(limit, scores, key=lambda i: (-scores[i], -self.entries[i].timestamp))
+        return [self.entries[entry_id] for entry_id in best]
+
+
+class BoundedMemoryService(BaseMemoryService):
+    """Memory service with a per-user entry cap, LRU and age eviction, SQLite spill and n-gram recall."""
+
+    def __init__(self, path: str, max_entries_per_user: int = MAX_ENTRIES_PER_USER,
+                 max_hot_users: int = MAX_HOT_USERS, max_age: float = MAX_AGE, max_results: int = MAX_RESULTS):
+        self.path = path
+        self.max_entries_per_user = max_entries_per_user
+        self.max_hot_users = max_hot_users
+        self.max_age = max_age
+        self.max_results = max_results
+        self.hits = self.loads = self.spills = self.evictions = self.expired = 0
+        self._users = OrderedDict()  # (app_name, user_id) -> _UserMemory, least recently active first
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        for pragma in PRAGMAS:
+            self._db.execute(pragma)
+        self._db.executescript(SCHEMA)
+        atexit.register(self.close)
+
+    # --- Hot users ---
+    def _user(self, app_name: str, user_id: str) -> _UserMemory:
+        """The user's index, loaded from disk if it was spilled; call with the lock held."""
+        key = (app_name, user_id)
+        memory = self._users.get(key)
+        if memory is not None:
+            self._users.move_to_end(key)
+            self.hits += 1
+            annotate(cache_hits=1)
+            return memory
+
+        self.loads += 1
+        annotate(cache_misses=1)
+        memory = _UserMemory()
+        rows = self._db.execute(
+            "SELECT id, session_id, author, timestamp, last_used, text, content FROM memories"
+            " WHERE app_name = ? AND user_id = ? AND timestamp >= ? ORDER BY last_used",
+            (*key, time.time() - self.max_age),
+        ).fetchall()
+        for row in rows:
+            memory.add(_Entry(*row))
+        self._users[key] = memory
+        while len(self._users) > self.max_hot_users:
+            spilled_key, spilled = self._users.popitem(last=False)
+            self._save_last_used(spilled_key, spilled)
+            self.spills += 1
+        return memory
+
+    def _save_last_used(self, key: tuple, memory: _UserMemory):
+        """Writes recall times that only changed in memory (they order the LRU eviction)."""
+        if memory.touched:
+            self._db.executemany(
+                "UPDATE memories SET last_used = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                [(memory.entries[i].last_used, *key, i) for i in memory.touched],
+            )
+            memory.touched.clear()
+
+    def _evict_hot(self, memory: _UserMemory, now: float) -> list:
+        """Expired entries, then least recently used ones past the cap; returns the removed ids."""
+        removed = [i for i, entry in memory.entries.items() if entry.timestamp < now - self.max_age]
+        self.expired += len(removed)
+        overflow = len(memory.entries) - len(removed) - self.max_entries_per_user
+        if overflow > 0:
+            gone = set(removed)
+            removed += [i for i in memory.entries if i not in gone][:overflow]
+            self.evictions += overflow
+        for entry_id in removed:
+            memory.remove(entry_id)
+        return removed
+
+    def _evict_spilled(self, key: tuple, now: float):
+        """The same eviction in SQL, for a user that is not loaded."""
+        self.expired += self._db.execute(
+            "DELETE FROM memories WHERE app_name = ? AND user_id = ? AND timestamp < ?", (*key, now - self.max_age),
+        ).rowcount
+        self.evictions += self._db.execute(
+            "DELETE FROM memories WHERE app_name = ? AND user_id = ? AND id IN (SELECT id FROM memories"
+            " WHERE app_name = ? AND user_id = ? ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (*key, *key, self.max_entries_per_user),
+        ).rowcount
+
+    # --- BaseMemoryService ---
+    async def add_session_to_memory(self, session):
+        """Remembers the session's text events added since it was last remembered."""
+        await asyncio.to_thread(self._add_session, session)
+
+    def _add_session(self, session):
+        key = (session.app_name, session.user_id)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT last_timestamp FROM remembered_sessions WHERE app_name = ? AND user_id = ?"
+                    " AND session_id = ?", (*key, session.id),
+                ).fetchone()
+                events = [
+                    event for event in session.events
+                    if (row is None or event.timestamp > row[0]) and event.content and _text(event.content)
+                ]
+                if events:
+                    self._add(key, session.id, events, now)
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO remembered_sessions VALUES (?, ?, ?, ?)",
+                        (*key, session.id, max(event.timestamp for event in events)),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _add(self, key: tuple, session_id: str, events: list, now: float):
+        memory = self._users.get(key)
+        if memory is None:
+            # Spilled user: write and cap on disk, the index is rebuilt on its next search
+            self._db.executemany(
+                "INSERT OR IGNORE INTO memories VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*key, event.id, session_id, event.author, event.timestamp, now, _text(event.content),
+                  event.content.model_dump_json(exclude_none=True)) for event in events],
+            )
+            self._evict_spilled(key, now)
+        else:
+            new = [_Entry.from_event(event, session_id, now) for event in events if event.id not in memory.entries]
+            for entry in new:
+                memory.add(entry)
+            removed = self._evict_hot(memory, now)
+            self._db.executemany("INSERT OR IGNORE INTO memories VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 [entry.row(key) for entry in new if entry.id in memory.entries])
+            self._db.executemany("DELETE FROM memories WHERE app_name = ? AND user_id = ? AND id = ?",
+                                 [(*key, entry_id) for entry_id in removed])
+        self._db.execute("DELETE FROM remembered_sessions WHERE app_name = ? AND user_id = ? AND last_timestamp < ?",
+                         (*key, now - self.max_age))
+
+    async def search_memory(self, *, app_name: str, user_id: str, query: str) -> SearchMemoryResponse:
+        return await asyncio.to_thread(self._search, app_name, user_id, query)
+
+    def _search(self, app_name: str, user_id: str, query: str) -> SearchMemoryResponse:
+        now = time.time()
+        with self._lock:
+            memory = self._user(app_name, user_id)
+            matches = memory.search(query, self.max_results, now - self.max_age)
+            for entry in matches:
+                entry.last_used = now
+                memory.entries.move_to_end(entry.id)
+                memory.touched.add(entry.id)
+        return SearchMemoryResponse(memories=[
+            MemoryEntry(content=entry.content, author=entry.author, id=entry.id,
+                        timestamp=datetime.fromtimestamp(entry.timestamp).isoformat(),
+                        custom_metadata={"session_id": entry.session_id})
+            for entry in matches
+        ])
+
+    # --- Reports and shutdown ---
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hot_users": len(self._users),
+                "hot_entries": sum(len(memory.entries) for memory in self._users.values()),
+                "hits": self.hits,
+                "loads": self.loads,
+                "spills": self.spills,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is None:
+                return
+            for key, memory in self._users.items():
+                self._save_last_used(key, memory)
+            self._db.close()
+            self._db = None
+        atexit.unregister(self.close)
+
+
+class RememberSessionsPlugin(BasePlugin):
+    """
+    Adds the session to `memory_service` after every turn of the runner that owns it.
+    AgentTool and pipeline runners inherit the plugins but have throwaway memories, so their
+    turns are skipped.
+    """
+
+    def __init__(self, memory_service: BaseMemoryService, name: str = "remember_sessions"):
+        super().__init__(name=name)
+        self.memory_service = memory_service
+
+    async def after_run_callback(self, *, invocation_context):
+        if invocation_context.memory_service is self.memory_service:
+            await self.memory_service.add_session_to_memory(invocation_context.session)
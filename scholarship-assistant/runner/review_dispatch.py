@@ -0,0 +1,99 @@
+# runner/review_dispatch.py
+#
+# Delivers review decisions from the queue (tools/review_queue.py) to the sessions
+# that submitted the drafts, in bulk and without any paused invocation to resume.
+# - Approvals, and rejections without feedback, need no model turn: one event per
+#   review is appended to the session directly and the review is marked delivered right
+#   away, so a failure later in the batch never delivers it twice; an approved SOP or CV
+#   is also saved to the profile (user:last_sop / user:last_cv).
+# - Rejections with feedback start a new turn in that session, so the orchestrator
+#   revises the draft and queues the revision. These turns run concurrently through
+#   runner/concurrent.py, one job per session so each session's turns stay ordered.
+
+import uuid
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.runners import Runner
+from google.genai import types
+
+from runner.concurrent import run_concurrent_sessions
+from tools.profile_checker import PROFILE_VERSION_KEY, USER_PREFIX
+from tools.review_queue import APPROVED, get_review_queue
+
+REVIEW_AUTHOR = "review_queue"
+# Profile field an approved draft is saved to, per document type; other types are only announced
+PROFILE_FIELDS = {"SOP": "last_sop", "CV": "last_cv"}
+
+
+def revision_request(review: dict) -> str:
+    return (f"[Review #{review['review_id']}] The reviewer REJECTED {review['document_type']} draft "
+            f"{review['draft_id']}. Please revise it: {review['feedback']}")
+
+
+def _notice(review: dict) -> str:
+    what = f"{review['document_type']} draft" + (f" for {review['target']}" if review["target"] else "")
+    if review["status"] == APPROVED:
+        return f"✅ Your {what} was approved by the reviewer and saved to your profile."
+    return f"❌ Your {what} was rejected by the reviewer. Tell me what you would like to change."
+
+
+async def deliver_review_decisions(runner: Runner, queue=None, max_concurrency: int = 8, limit: int = 500) -> dict:
+    """
+    Delivers every decided, undelivered review of the runner's app. Returns counts per outcome,
+    plus the concurrent-run summary of the revision turns (if any).
+    """
+    queue = queue or get_review_queue()
+    reviews = queue.undelivered(runner.app_name, limit=limit)
+    session_service = runner.session_service
+    revisions = {}  # (user_id, session_id) -> rejected reviews with feedback, in review order
+    approved = rejected = missing = 0
+
+    for review in reviews:
+        key = (review["user_id"], review["session_id"])
+        if review["status"] == APPROVED:
+            approved += 1
+        else:
+            rejected += 1
+        if review["status"] != APPROVED and review["feedback"]:
+            revisions.setdefault(key, []).append(review)
+            continue
+
+        session = await session_service.get_session(app_name=runner.app_name, user_id=key[0], session_id=key[1])
+        if session is None:
+            # Dropped sessions cannot be told; mark them so they are not retried forever
+            queue.mark_delivered([review["review_id"]])
+            missing += 1
+            continue
+        state_delta = {}
+        field = PROFILE_FIELDS.get(str(review["document_type"]).upper())
+        if review["status"] == APPROVED and field:
+            state_delta = {f"{USER_PREFIX}{field}": queue.draft_text(review["draft_id"]),
+                           PROFILE_VERSION_KEY: uuid.uuid4().hex}
+        await session_service.append_event(session, Event(
+            invocation_id=f"review-{review['review_id']}",
+            author=REVIEW_AUTHOR,
+            content=types.Content(role="model", parts=[types.Part(text=_notice(review))]),
+            actions=EventActions(state_delta=state_delta),
+        ))
+        queue.mark_delivered([review["review_id"]])
+
+    summary = {
+        "approved": approved,
+        "rejected": rejected,
+        "revision_turns": sum(len(pending) for pending in revisions.values()),
+        "missing_sessions": missing,
+    }
+    if revisions:
+        jobs = [(user_id, session_id, [revision_request(review) for review in pending])
+                for (user_id, session_id), pending in revisions.items()]
+        result = await run_concurrent_sessions(runner, jobs, max_concurrency=max_concurrency)
+        # Turns that completed are delivered; a failed turn and the ones after it in its
+        # session stay undelivered and are retried on the next run
+        queue.mark_delivered([
+            review["review_id"]
+            for report in result["sessions"]
+            for review in revisions[(report["user_id"], report["session_id"])][:len(report["message_latencies"])]
+        ])
+        summary["revisions"] = result
+    return summary
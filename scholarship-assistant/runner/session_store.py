@@ -0,0 +1,348 @@
+# runner/session_store.py
+#
+# SQLite session store tuned for long-lived sessions (ADK BaseSessionService).
+# - One connection per process in WAL mode with synchronous=NORMAL, so readers never
+#   block the writer and a commit costs no fsync of the main database file.
+# - Events are buffered per session and written in one transaction per turn: at the
+#   turn's final response (or HITL pause), when the buffer fills, and before any read.
+# - Session state is stored as a snapshot row (app, user and session scopes), never
+#   replayed from events. Once a session holds more than `compact_after` events, all
+#   but the most recent `keep_events` (rounded to whole invocations) move to an
+#   archive table, so loading a session costs the same at 100 or 100,000 events.
+# - Every SQLite call runs in a worker thread (asyncio.to_thread), so a slow disk or a
+#   busy writer never stalls the event loop; buffering an event only takes a short lock.
+
+import asyncio
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from google.adk.events.event import Event
+from google.adk.sessions import Session
+from google.adk.sessions.base_session_service import BaseSessionService, GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+from agents.tracing import span
+
+COMPACT_AFTER_EVENTS = 2000
+KEEP_EVENTS = 500
+MAX_BUFFERED_EVENTS = 64
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # KiB
+    "PRAGMA mmap_size=268435456",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY, state TEXT NOT NULL, update_time REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, state TEXT NOT NULL, update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id));
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, id TEXT NOT NULL, state TEXT NOT NULL,
+    create_time REAL NOT NULL, update_time REAL NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0, archived_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (app_name, user_id, id));
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL,
+    invocation_id TEXT, timestamp REAL NOT NULL, event_data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS events_archive (
+    seq INTEGER PRIMARY KEY,
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL,
+    invocation_id TEXT, timestamp REAL NOT NULL, event_data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS events_archive_by_session ON events_archive (app_name, user_id, session_id, seq);
+"""
+
+
+def _split_state(state: dict) -> tuple:
+    """(app, user, session) deltas from a prefixed state dict; temp: keys are dropped."""
+    app, user, session = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+
+def _merge_state(app: dict, user: dict, session: dict) -> dict:
+    merged = dict(session)
+    merged.update({State.APP_PREFIX + key: value for key, value in app.items()})
+    merged.update({State.USER_PREFIX + key: value for key, value in user.items()})
+    return merged
+
+
+class _PendingTurn:
+    """Events and state changes of one session that are not written yet."""
+
+    def __init__(self):
+        self.rows = []
+        self.app = {}
+        self.user = {}
+        self.session = {}
+
+
+class SqliteSessionStore(BaseSessionService):
+    """WAL-mode SQLite session service with per-turn batched event writes and event compaction."""
+
+    def __init__(self, path: str, compact_after: int = COMPACT_AFTER_EVENTS, keep_events: int = KEEP_EVENTS,
+                 max_buffered_events: int = MAX_BUFFERED_EVENTS):
+        self.path = path
+        self.compact_after = compact_after
+        self.keep_events = keep_events
+        self.max_buffered_events = max_buffered_events
+        self.flushes = 0
+        self.compactions = 0
+        self._pending = {}  # (app_name, user_id, session_id) -> _PendingTurn
+        self._pending_lock = threading.Lock()  # guards _pending; never held during I/O
+        self._lock = threading.RLock()  # guards the connection; batches are taken and written under it
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        for pragma in PRAGMAS:
+            self._db.execute(pragma)
+        self._db.executescript(SCHEMA)
+        atexit.register(self.close)
+
+    # --- Reads ---
+    def _state_row(self, table: str, where: str, params: tuple) -> dict:
+        row = self._db.execute(f"SELECT state FROM {table} WHERE {where}", params).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _scoped_state(self, app_name: str, user_id: str) -> tuple:
+        return (
+            self._state_row("app_states", "app_name = ?", (app_name,)),
+            self._state_row("user_states", "app_name = ? AND user_id = ?", (app_name, user_id)),
+        )
+
+    async def create_session(self, *, app_name: str, user_id: str, state: dict = None,
+                             session_id: str = None) -> Session:
+        return await asyncio.to_thread(self._create_session, app_name, user_id, state, session_id)
+
+    def _create_session(self, app_name: str, user_id: str, state: dict, session_id: str) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        app_delta, user_delta, session_state = _split_state(state)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                exists = self._db.execute(
+                    "SELECT 1 FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (app_name, user_id, session_id),
+                ).fetchone()
+                if exists:
+                    raise ValueError(f"Session with id {session_id} already exists.")
+                self._upsert_scoped(app_name, user_id, app_delta, user_delta, now)
+                self._db.execute(
+                    "INSERT INTO sessions (app_name, user_id, id, state, create_time, update_time)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, json.dumps(session_state), now, now),
+                )
+                app_state, user_state = self._scoped_state(app_name, user_id)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return Session(app_name=app_name, user_id=user_id, id=session_id,
+                       state=_merge_state(app_state, user_state, session_state), events=[], last_update_time=now)
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: GetSessionConfig = None) -> Session | None:
+        return await asyncio.to_thread(self._get_session, app_name, user_id, session_id, config)
+
+    def _get_session(self, app_name: str, user_id: str, session_id: str, config: GetSessionConfig) -> Session | None:
+        with self._lock:
+            self._flush((app_name, user_id, session_id))
+            row = self._db.execute(
+                "SELECT state, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if row is None:
+                return None
+
+            query = "SELECT event_data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            params = [app_name, user_id, session_id]
+            if config and config.after_timestamp:
+                query += " AND timestamp >= ?"
+                params.append(config.after_timestamp)
+            query += " ORDER BY seq DESC"
+            if config and config.num_recent_events:
+                query += " LIMIT ?"
+                params.append(config.num_recent_events)
+            event_rows = self._db.execute(query, params).fetchall()
+            app_state, user_state = self._scoped_state(app_name, user_id)
+
+        events = [Event.model_validate_json(data) for (data,) in reversed(event_rows)]
+        return Session(app_name=app_name, user_id=user_id, id=session_id,
+                       state=_merge_state(app_state, user_state, json.loads(row[0])),
+                       events=events, last_update_time=row[1])
+
+    async def list_sessions(self, *, app_name: str, user_id: str = None) -> ListSessionsResponse:
+        return await asyncio.to_thread(self._list_sessions, app_name, user_id)
+
+    def _list_sessions(self, app_name: str, user_id: str) -> ListSessionsResponse:
+        with self._lock:
+            self._flush()
+            query = "SELECT user_id, id, state, update_time FROM sessions WHERE app_name = ?"
+            params = [app_name]
+            if user_id is not None:
+                query += " AND user_id = ?"
+                params.append(user_id)
+            rows = self._db.execute(query, params).fetchall()
+            app_state = self._state_row("app_states", "app_name = ?", (app_name,))
+            user_states = {
+                uid: json.loads(state) for uid, state in self._db.execute(
+                    "SELECT user_id, state FROM user_states WHERE app_name = ?", (app_name,)
+                )
+            }
+        return ListSessionsResponse(sessions=[
+            Session(app_name=app_name, user_id=uid, id=sid,
+                    state=_merge_state(app_state, user_states.get(uid, {}), json.loads(state)),
+                    events=[], last_update_time=update_time)
+            for uid, sid, state, update_time in rows
+        ])
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(self._delete_session, (app_name, user_id, session_id))
+
+    def _delete_session(self, key: tuple):
+        with self._lock:
+            with self._pending_lock:
+                self._pending.pop(key, None)
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for table, id_column in (("events", "session_id"), ("events_archive", "session_id"),
+                                         ("sessions", "id")):
+                    self._db.execute(
+                        f"DELETE FROM {table} WHERE app_name = ? AND user_id = ? AND {id_column} = ?", key
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    # --- Writes ---
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+
+        key = (session.app_name, session.user_id, session.id)
+        row = (event.invocation_id, event.timestamp, event.model_dump_json(exclude_none=True))
+        with self._pending_lock:
+            pending = self._pending.setdefault(key, _PendingTurn())
+            pending.rows.append(row)
+            if event.actions and event.actions.state_delta:
+                app, user, scoped = _split_state(event.actions.state_delta)
+                pending.app.update(app)
+                pending.user.update(user)
+                pending.session.update(scoped)
+            buffered = len(pending.rows)
+        # One transaction per turn: the final response (or a HITL pause) closes the turn
+        if event.is_final_response() or buffered >= self.max_buffered_events:
+            with span("session_store.flush", kind="session", events=buffered):
+                await asyncio.to_thread(self._flush_locked, key)
+        session.last_update_time = event.timestamp
+        return event
+
+    def flush(self):
+        """Writes every buffered event now."""
+        self._flush_locked()
+
+    def _flush_locked(self, key: tuple = None):
+        with self._lock:
+            self._flush(key)
+
+    def _flush(self, key: tuple = None):
+        """Writes the buffered events of `key` (or of every session); call with `_lock` held."""
+        with self._pending_lock:
+            keys = [key] if key is not None else list(self._pending)
+            batches = [(k, self._pending.pop(k)) for k in keys if k in self._pending]
+        if not batches:
+            return
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for (app_name, user_id, session_id), pending in batches:
+                self._upsert_scoped(app_name, user_id, pending.app, pending.user, now)
+                state = None
+                if pending.session:
+                    state = self._state_row("sessions", "app_name = ? AND user_id = ? AND id = ?",
+                                            (app_name, user_id, session_id))
+                    state.update(pending.session)
+                self._db.executemany(
+                    "INSERT INTO events (app_name, user_id, session_id, invocation_id, timestamp, event_data)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(app_name, user_id, session_id, *row) for row in pending.rows],
+                )
+                self._db.execute(
+                    "UPDATE sessions SET state = COALESCE(?, state), update_time = ?, event_count = event_count + ?"
+                    " WHERE app_name = ? AND user_id = ? AND id = ?",
+                    (json.dumps(state) if state is not None else None, now, len(pending.rows),
+                     app_name, user_id, session_id),
+                )
+                self._maybe_compact(app_name, user_id, session_id)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self.flushes += 1
+
+    def _upsert_scoped(self, app_name: str, user_id: str, app_delta: dict, user_delta: dict, now: float):
+        if app_delta:
+            state = self._state_row("app_states", "app_name = ?", (app_name,))
+            state.update(app_delta)
+            self._db.execute("INSERT OR REPLACE INTO app_states VALUES (?, ?, ?)",
+                             (app_name, json.dumps(state), now))
+        if user_delta:
+            state = self._state_row("user_states", "app_name = ? AND user_id = ?", (app_name, user_id))
+            state.update(user_delta)
+            self._db.execute("INSERT OR REPLACE INTO user_states VALUES (?, ?, ?, ?)",
+                             (app_name, user_id, json.dumps(state), now))
+
+    def _maybe_compact(self, app_name: str, user_id: str, session_id: str):
+        """Archives all but the most recent `keep_events` events, never splitting an invocation."""
+        key = (app_name, user_id, session_id)
+        count = self._db.execute(
+            "SELECT event_count FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+        ).fetchone()[0]
+        if count <= self.compact_after:
+            return
+        boundary = self._db.execute(
+            "SELECT seq, invocation_id FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            " ORDER BY seq DESC LIMIT 1 OFFSET ?", (*key, self.keep_events - 1),
+        ).fetchone()
+        if boundary is None:
+            return
+        # Keep the whole invocation the boundary event belongs to
+        cutoff = self._db.execute(
+            "SELECT MIN(seq) FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? AND invocation_id IS ?",
+            (*key, boundary[1]),
+        ).fetchone()[0]
+        where = "app_name = ? AND user_id = ? AND session_id = ? AND seq < ?"
+        self._db.execute(f"INSERT INTO events_archive SELECT * FROM events WHERE {where}", (*key, cutoff))
+        moved = self._db.execute(f"DELETE FROM events WHERE {where}", (*key, cutoff)).rowcount
+        self._db.execute(
+            "UPDATE sessions SET event_count = event_count - ?, archived_count = archived_count + ?"
+            " WHERE app_name = ? AND user_id = ? AND id = ?", (moved, moved, *key),
+        )
+        self.compactions += 1
+
+    def close(self):
+        with self._lock:
+            if self._db is None:
+                return
+            self._flush()
+            self._db.close()
+            self._db = None
+        atexit.unregister(self.close)
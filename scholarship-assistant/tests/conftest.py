@@ -0,0 +1,35 @@
+# tests/conftest.py
+#
+# Runs `async def` tests on a fresh event loop, so the async workflow tests need no pytest plugin,
+# and gives every test its own review queue database.
+
+import asyncio
+import gc
+import inspect
+
+import pytest
+
+from tools import review_queue
+
+
+@pytest.fixture(autouse=True)
+def review_queue_db(tmp_path):
+    queue = review_queue.ReviewQueue(str(tmp_path / "review_queue.db"))
+    review_queue.set_review_queue(queue)
+    yield queue
+    review_queue.set_review_queue(None)
+    queue.close()
+
+
+def pytest_collection_finish(session):
+    # Objects created while importing the test modules live for the whole run; keep them out of
+    # the cyclic GC so the timing tests do not depend on how many modules were collected
+    gc.freeze()
+
+
+def pytest_pyfunc_call(pyfuncitem):
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        args = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+        asyncio.run(pyfuncitem.obj(**args))
+        return True
+    return None
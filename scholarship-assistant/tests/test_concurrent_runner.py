@@ -0,0 +1,74 @@
+"""
+test_concurrent_runner.py
+
+Tests for the bounded-concurrency multi-session runner (runner/concurrent.py),
+driven by a stand-in runner so no model calls are made.
+Run from the project root: python -m pytest tests/test_concurrent_runner.py
+"""
+
+import asyncio
+
+from google.adk.sessions import InMemorySessionService
+
+from runner.concurrent import run_concurrent_sessions
+
+
+class RecordingRunner:
+    """Minimal Runner stand-in: sleeps per message and records ordering and concurrency."""
+
+    app_name = "test_app"
+
+    def __init__(self, delay: float = 0.01):
+        self.session_service = InMemorySessionService()
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.seen = []
+
+    async def run_async(self, user_id, session_id, new_message):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.seen.append((session_id, new_message.parts[0].text))
+        self.in_flight -= 1
+        return
+        yield
+
+
+def test_concurrency_is_bounded_and_sessions_stay_ordered():
+    runner = RecordingRunner()
+    jobs = [(f"user-{i % 3}", f"session-{i % 3}", [f"{i}-a", f"{i}-b"]) for i in range(12)]
+    summary = asyncio.run(run_concurrent_sessions(runner, jobs, max_concurrency=4))
+
+    assert summary["jobs"] == 12 and summary["errors"] == 0
+    assert 1 < runner.max_in_flight <= 3  # only three distinct sessions can progress at once
+    for session in ("session-0", "session-1", "session-2"):
+        texts = [text for sid, text in runner.seen if sid == session]
+        expected = [f"{i}-{part}" for i in range(12) if f"session-{i % 3}" == session for part in "ab"]
+        assert texts == expected
+    assert summary["messages_per_second"] > 0
+
+
+def test_parallel_sessions_overlap():
+    runner = RecordingRunner(delay=0.05)
+
+    async def jobs():
+        for i in range(8):
+            yield f"user-{i}", f"session-{i}", "hello"
+
+    summary = asyncio.run(run_concurrent_sessions(runner, jobs(), max_concurrency=8))
+    assert runner.max_in_flight == 8
+    assert summary["wall_time"] < 8 * 0.05
+    assert all(report["messages"] == 1 for report in summary["sessions"])
+
+
+def test_queued_turns_of_one_session_do_not_block_other_sessions():
+    runner = RecordingRunner(delay=0.05)
+    # Four turns of one busy session arrive before any other session's job
+    jobs = [("busy", "busy", f"turn-{i}") for i in range(4)] + [(f"user-{i}", f"session-{i}", "hi") for i in range(3)]
+    asyncio.run(run_concurrent_sessions(runner, jobs, max_concurrency=4))
+
+    finished = [sid for sid, _ in runner.seen]
+    # The other sessions run beside the busy one instead of after all of its turns
+    assert max(finished.index(f"session-{i}") for i in range(3)) < finished.index("busy", 2)
+    assert runner.max_in_flight == 4
@@ -0,0 +1,103 @@
+"""
+test_context_budget.py
+
+Tests for the per-call prompt budget (agents/context_budget.py).
+Run from the project root: python -m pytest tests/test_context_budget.py
+"""
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from agents.context_budget import apply_budget, summarize_text
+from agents.model_pool import estimate_tokens
+
+DRAFT = "\n\n".join(f"Paragraph {i} of my statement of purpose. " + "Research matters. " * 40 for i in range(4))
+LISTING = "\n".join(f"**Scholarship {i}**\n* **Degrees**: PhD\n* **Funds**: Fully Funded\n" for i in range(12))
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def model(text):
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def tool_turn(name, args, response):
+    call = types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(id=name, name=name, args=args))])
+    result = types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+        id=name, name=name, response=response))])
+    return [call, result]
+
+
+def session_contents(turns: int) -> list:
+    contents = []
+    for i in range(turns):
+        contents += [user(f"Turn {i}: find scholarships and write my SOP")]
+        contents += tool_turn("retrieve_userinfo", {}, {"status": "success", "data": {"name": "Imon", "bio": "x" * 400}})
+        contents += tool_turn("write_document", {"document_type": "SOP", "target": "Oxford"},
+                              {"status": "success", "draft_id": f"d{i}", "draft_text": DRAFT})
+        contents += [model(LISTING)]
+    return contents
+
+
+def test_profile_dumps_are_deduplicated_and_old_drafts_referenced():
+    request = LlmRequest(contents=session_contents(3))
+    report = apply_budget(request, budget=10 ** 6)
+    responses = [p.function_response for c in request.contents for p in c.parts if p.function_response]
+
+    profiles = [r.response for r in responses if r.name == "retrieve_userinfo"]
+    assert [("data" in p) for p in profiles] == [False, False, True]
+    drafts = [r.response for r in responses if r.name == "write_document"]
+    assert [d["draft_text"] == DRAFT for d in drafts] == [False, False, True]  # the current turn keeps its draft
+    assert "d0" in drafts[0]["draft_text"]
+    assert report["deduplicated"] == 2 and report["referenced"] == 2
+    assert report["tokens_saved"] == report["tokens_before"] - estimate_tokens(request) > 0
+
+
+def profile_results(contents):
+    request = LlmRequest(contents=contents)
+    report = apply_budget(request, budget=10 ** 6)
+    return [p.function_response.response for c in request.contents for p in c.parts
+            if p.function_response and p.function_response.name == "retrieve_userinfo"], report
+
+
+def test_field_retrievals_survive_later_summaries_and_the_current_turn_is_kept():
+    sop = {"status": "success", "data": {"last_sop": DRAFT}, "missing": []}
+    summary = {"status": "success", "data": {"name": "Imon", "last_sop": DRAFT[:200] + "…"}}
+    contents = [user("Revise my saved SOP")]
+    contents += tool_turn("retrieve_userinfo", {"fields": ["last_sop"]}, sop)
+    contents += [model("Here is the revision."), user("What's my name?")]
+    contents += tool_turn("retrieve_userinfo", {}, summary)
+    contents += [model("Imon."), user("Thanks")]
+    contents += tool_turn("retrieve_userinfo", {}, summary)
+    contents += tool_turn("retrieve_userinfo", {}, summary)
+
+    # The summary only truncates the stored SOP; nothing in the current turn is superseded
+    profiles, report = profile_results(list(contents))
+    assert profiles[0] == sop and "data" not in profiles[1] and profiles[2:] == [summary, summary]
+    assert report["deduplicated"] == 1
+
+    # A later request for the same fields (or more) does replace it
+    profiles, report = profile_results(contents + tool_turn("retrieve_userinfo", {"fields": ["name", "last_sop"]}, sop))
+    assert "data" not in profiles[0] and report["deduplicated"] == 2
+
+
+def test_over_budget_summarises_then_drops_old_turns_but_keeps_recent_ones():
+    contents = session_contents(8)
+    current = contents[-6:]  # a turn is a message, two tool calls with results, and a reply
+    request = LlmRequest(contents=contents)
+    report = apply_budget(request, budget=1500)
+
+    assert report["summarized"] > 0 and 0 < report["dropped_turns"] < 7
+    assert estimate_tokens(request) <= 1500
+    assert request.contents[-6:] == current  # the current turn is untouched
+    assert request.contents[0].role == "user" and "omitted" in request.contents[0].parts[0].text
+    calls = [p.function_call.id for c in request.contents for p in c.parts if p.function_call]
+    results = [p.function_response.id for c in request.contents for p in c.parts if p.function_response]
+    assert calls == results  # no tool call loses its result
+
+
+def test_summaries_keep_scholarship_titles():
+    assert summarize_text(LISTING).startswith("[12 scholarships listed: Scholarship 0; Scholarship 1")
+    assert summarize_text(DRAFT).startswith("Paragraph 0 of my statement of purpose. …")
@@ -0,0 +1,199 @@
+"""
+test_document_pipeline.py
+
+Tests for the streamed draft -> refine pipeline and its parallel fan-out (agents/document_pipeline.py),
+on the offline model.
+Run from the project root: python -m pytest tests/test_document_pipeline.py
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.state import State
+from google.genai import types
+
+from agents import document_pipeline
+from agents.offline_model import RuleBasedPolicy, install_offline_model, restore_models
+from agents.orchestrator_agent import orchestrator_agent
+from agents.registry import get_agent
+from runner.review_dispatch import deliver_review_decisions
+from tools import intent_router
+
+REQUEST = "Please write an SOP and a CV for each of these scholarships: Chevening, Fulbright and DAAD."
+
+
+async def run_fanout(monkeypatch, max_parallel: int):
+    monkeypatch.setattr(document_pipeline, "MAX_PARALLEL_CHAINS", max_parallel)
+    document_pipeline.clear_refine_cache()
+    contexts = []
+    build = document_pipeline.build_profile_context
+    monkeypatch.setattr(document_pipeline, "build_profile_context", lambda p: contexts.append(p) or build(p))
+
+    previous = install_offline_model(orchestrator_agent, RuleBasedPolicy(latency=0.05))
+    try:
+        app = App(name="fanout_test", root_agent=orchestrator_agent,
+                  resumability_config=ResumabilityConfig(is_resumable=True))
+        runner = Runner(app=app, session_service=InMemorySessionService())
+        session = await runner.session_service.create_session(
+            app_name="fanout_test", user_id="u", state={"user:name": "Imon", "user:last_sop": "x" * 5000}
+        )
+        start = time.perf_counter()
+        events = [e async for e in runner.run_async(
+            user_id="u", session_id=session.id, new_message=types.Content(role="user", parts=[types.Part(text=REQUEST)])
+        )]
+        elapsed = time.perf_counter() - start
+    finally:
+        restore_models(previous)
+
+    batch = next(r.response for e in events for r in e.get_function_responses()
+                 if r.name == "generate_application_documents")
+    first_review = next(c.args for e in events for c in e.get_function_calls() if c.name == "submit_draft_for_review")
+    return batch, first_review, elapsed, contexts
+
+
+async def test_fanout_returns_ordered_refined_drafts_with_one_shared_context(monkeypatch):
+    batch, first_review, _, contexts = await run_fanout(monkeypatch, max_parallel=6)
+    documents = batch["documents"]
+    assert [(d["target"], d["document_type"]) for d in documents] == [
+        (t, k) for t in ("Chevening", "Fulbright", "DAAD") for k in ("SOP", "CV")
+    ]
+    assert all(d["status"] == "success" and d["target"] in d["draft_text"] for d in documents)
+    assert len(contexts) == 1
+    assert "x" * 400 not in documents[0]["draft_text"]  # stored drafts are not part of the shared context
+    # HITL submissions start with the first document in order, by draft id
+    assert first_review["draft_id"] == documents[0]["draft_id"]
+
+
+async def test_chains_run_concurrently_within_the_bound(monkeypatch):
+    _, _, parallel, _ = await run_fanout(monkeypatch, max_parallel=6)
+    _, _, sequential, _ = await run_fanout(monkeypatch, max_parallel=1)
+    # 6 chains x 2 model calls x 50 ms: ~0.6 s one at a time, ~0.1 s all at once (+ orchestrator turns)
+    assert sequential - parallel > 0.35
+
+
+async def test_write_document_streams_refined_paragraphs_and_submits_the_same_text(review_queue_db):
+    document_pipeline.clear_refine_cache()
+    streamed, first_at = [], []
+    start = time.perf_counter()
+
+    def sink(document, index, paragraph):
+        first_at.append(first_at[0] if first_at else time.perf_counter() - start)
+        streamed.append((document["document_type"], index, paragraph))
+
+    previous = install_offline_model(orchestrator_agent, RuleBasedPolicy(token_latency=0.002))
+    try:
+        app = App(name="stream_test", root_agent=orchestrator_agent,
+                  resumability_config=ResumabilityConfig(is_resumable=True))
+        runner = Runner(app=app, session_service=InMemorySessionService())
+        session = await runner.session_service.create_session(app_name="stream_test", user_id="u")
+        message = types.Content(role="user", parts=[types.Part(text="Please write an SOP for a PhD at Oxford.")])
+        with document_pipeline.stream_drafts_to(sink):
+            events = [e async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message)]
+        total = time.perf_counter() - start
+        session = await runner.session_service.get_session(app_name="stream_test", user_id="u", session_id=session.id)
+    finally:
+        restore_models(previous)
+
+    written = next(r.response for e in events for r in e.get_function_responses() if r.name == "write_document")
+    assert "draft_text" not in written  # already streamed, not echoed through the model
+    review = review_queue_db.pending()[0]
+    assert review["draft_id"] == written["draft_id"] and review["session_id"] == session.id
+    submitted = review_queue_db.draft_text(review["draft_id"])
+
+    assert [index for _, index, _ in streamed] == list(range(len(streamed))) and len(streamed) == 4
+    assert "\n\n".join(p for _, _, p in streamed) == submitted
+    assert "text" not in session.state[f"draft:{written['draft_id']}"]  # the text is stored once, in the queue
+    # The first refined paragraph arrives while the rest of the draft is still being written
+    assert first_at[0] < total / 2
+
+
+async def test_revision_after_rejection_only_refines_changed_paragraphs(monkeypatch, review_queue_db):
+    monkeypatch.setattr(intent_router, "FAST_PATH_ENABLED", False)
+    document_pipeline.clear_refine_cache()
+    policy = RuleBasedPolicy()
+    previous = install_offline_model(orchestrator_agent, policy)
+    try:
+        app = App(name="revise_test", root_agent=orchestrator_agent,
+                  resumability_config=ResumabilityConfig(is_resumable=True))
+        runner = Runner(app=app, session_service=InMemorySessionService())
+        session = await runner.session_service.create_session(app_name="revise_test", user_id="u")
+
+        async def reject_latest(feedback: str) -> list:
+            """Rejects the pending review from the queue and returns the revision that gets queued."""
+            review = review_queue_db.pending()[-1]
+            review_queue_db.decide([(review["review_id"], False, feedback)])
+            summary = await deliver_review_decisions(runner)
+            assert summary["revision_turns"] == 1 and summary["revisions"]["errors"] == 0
+            revision = review_queue_db.pending()[-1]
+            assert revision["review_id"] != review["review_id"]
+            return review_queue_db.draft_text(revision["draft_id"]).split("\n\n")
+
+        message = types.Content(role="user", parts=[types.Part(text="Please write an SOP for a PhD at Oxford.")])
+        [e async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message)]
+        original = review_queue_db.draft_text(review_queue_db.pending()[-1]["draft_id"]).split("\n\n")
+        assert policy.calls["refiner_agent"] == 4
+
+        revised = await reject_latest("Mention my MBA thesis in paragraph 2.")
+        assert policy.calls["refiner_agent"] == 5 and policy.calls["sop_agent"] == 2
+        assert revised[0] == original[0] and revised[2:] == original[2:]
+        assert revised[1] != original[1] and "MBA thesis" in revised[1]
+
+        final = await reject_latest("End by mentioning Oxford's faculty.")
+        assert policy.calls["refiner_agent"] == 6  # only the changed last paragraph
+        assert final[:-1] == revised[:-1]
+    finally:
+        restore_models(previous)
+    assert document_pipeline.refine_cache_stats()["hits"] == 6
+
+
+def test_refiner_version_tracks_the_instruction(monkeypatch):
+    version = document_pipeline.refiner_version()
+    monkeypatch.setattr(get_agent("refiner_agent"), "instruction", "Only fix spelling.")
+    assert document_pipeline.refiner_version() != version
+
+
+def test_unknown_document_type_is_rejected():
+    try:
+        document_pipeline.normalize_document_type("poem")
+        assert False, "unknown document type accepted"
+    except ValueError:
+        pass
+    assert document_pipeline.normalize_document_type("Statement of Purpose") == "SOP"
+
+
+async def test_a_cancelled_chain_cancels_the_batch_instead_of_becoming_a_draft(monkeypatch):
+    async def chain(semaphore, tool_context, target, document_type, profile_context, instructions):
+        if target == "Fulbright":
+            raise ValueError("model overloaded")
+        if target == "DAAD":
+            raise asyncio.CancelledError()
+        return [f"{document_type} for {target}"]
+
+    monkeypatch.setattr(document_pipeline, "_chain", chain)
+    context = SimpleNamespace(state=State(value={}, delta={}))
+    batch = await document_pipeline.generate_application_documents(["Chevening", "Fulbright"], ["SOP"], context)
+    assert [d["status"] for d in batch["documents"]] == ["success", "error"]
+    assert batch["documents"][1]["error_message"] == "ValueError: model overloaded"
+
+    with pytest.raises(asyncio.CancelledError):
+        await document_pipeline.generate_application_documents(["Chevening", "DAAD"], ["SOP"], context)
+
+
+async def test_an_empty_draft_is_reported_instead_of_saved(monkeypatch):
+    async def chain(semaphore, tool_context, target, document_type, profile_context, instructions):
+        return [] if target == "Fulbright" else [f"{document_type} for {target}"]
+
+    monkeypatch.setattr(document_pipeline, "_chain", chain)
+    context = SimpleNamespace(state=State(value={}, delta={}))
+    batch = await document_pipeline.generate_application_documents(["Chevening", "Fulbright"], ["SOP"], context)
+    saved, empty = batch["documents"]
+    assert saved["status"] == "success" and saved["draft_text"] == "SOP for Chevening"
+    assert empty["status"] == "error" and "draft_id" not in empty
+    assert empty["error_message"] == "The SOP drafter returned no text."
+    assert "1 document(s) failed." in batch["message"]
@@ -0,0 +1,260 @@
+"""
+test_finder.py
+
+Unit tests for the local scholarship finder (tools/finder.py) and its shared catalog.
+Run from the project root: python -m pytest tests/test_finder.py
+"""
+
+import json
+import os
+import struct
+from datetime import date
+
+from tools.catalog import clear_catalog_cache, get_catalog
+from tools.compiled_catalog import MAGIC, _RecordBlobs, compile_catalog
+from tools.finder import DATASET_PATH, find_scholarships, find_scholarships_batch
+from tools.text_index import parse_query
+
+
+def reference_find(profile: dict, scholarships: list, top_k: int = 5) -> list:
+    """The original linear-scan matcher, kept as the oracle for the optimized paths."""
+    eligible = []
+    funding_pref = str(profile.get("funding", "")).lower().replace("$", "").replace(",", "")
+    for s in scholarships:
+        s = dict(s)
+        degree_ok = (
+                str(profile.get("degree", "")).lower() == "any"
+                or profile.get("degree") in s.get("degrees", "")
+        )
+        country_ok = (
+                str(profile.get("country", "")).lower() == "any"
+                or profile.get("country", "").lower() in s.get("location", "").lower()
+        )
+        if degree_ok and country_ok:
+            funds = str(s.get("funds", "")).lower().replace("$", "").replace(",", "")
+            s["score"] = 1 if funding_pref == "any" or funding_pref in funds else 0
+            eligible.append(s)
+    return sorted(eligible, key=lambda x: x["score"], reverse=True)[:top_k]
+
+
+PROFILES = [
+    {"degree": "PhD", "country": "USA", "funding": "Fully Funded"},
+    {"degree": "Masters", "country": "united-kingdom", "funding": "any"},
+    {"degree": "Bachelor", "country": "any", "funding": "$1,000"},
+    {"degree": "any", "country": "Canada", "funding": "partially"},
+    {"degree": "any", "country": "any", "funding": "any"},
+    {"degree": "Course", "country": "India", "funding": "100%"},
+    {"degree": "PhD", "country": "Mars", "funding": "any"},
+    {"degree": "Master", "country": "kingdom", "funding": "£"},
+]
+
+
+def load_items() -> list:
+    with open(DATASET_PATH) as f:
+        return json.load(f)
+
+
+def test_matches_reference_implementation():
+    items = load_items()
+    for profile in PROFILES:
+        for top_k in (1, 5, 50, 1000):
+            result = find_scholarships(profile, DATASET_PATH, top_k=top_k, include_expired=True)
+            assert result["status"] == "success"
+            assert result["scholarships"] == reference_find(profile, items, top_k), profile
+
+
+def test_results_do_not_mutate_shared_catalog():
+    profile = {"degree": "PhD", "country": "USA", "funding": "any"}
+    first = find_scholarships(profile, DATASET_PATH)["scholarships"]
+    first[0]["title"] = "changed"
+    catalog = get_catalog(DATASET_PATH)
+    assert all("score" not in catalog.result(i) for i in range(len(catalog)))
+    second = find_scholarships(profile, DATASET_PATH)["scholarships"]
+    assert second[0]["title"] != "changed"
+
+
+def test_catalog_reloads_when_file_changes(tmp_path):
+    clear_catalog_cache()
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps([{"title": "A", "degrees": "PhD", "funds": "$100", "location": "USA"}]))
+    first = get_catalog(str(path))
+    assert get_catalog(str(path)) is first
+
+    path.write_text(json.dumps([
+        {"title": "A", "degrees": "PhD", "funds": "$100", "location": "USA"},
+        {"title": "B", "degrees": "Masters", "funds": "Fully Funded", "location": "Canada"},
+    ]))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert len(get_catalog(str(path))) == 2
+
+
+def test_missing_dataset_returns_error(tmp_path):
+    result = find_scholarships({"degree": "PhD"}, str(tmp_path / "missing.json"))
+    assert result["status"] == "error"
+
+
+def test_batch_matches_single_profile_path():
+    profiles = PROFILES + [{"degree": "PhD"}, {"country": "nigeria", "funding": "any"}]
+    options = [
+        {},
+        {"include_expired": True},
+        {"include_expired": True, "sort_by": "deadline"},
+        {"deadline_after": "2022-09-01", "min_amount": 2000, "sort_by": "deadline"},
+    ]
+    for kwargs in options:
+        for top_k in (0, 1, 5, 1000):
+            expected = [find_scholarships(p, DATASET_PATH, top_k=top_k, **kwargs) for p in profiles]
+            assert find_scholarships_batch(profiles, top_k=top_k, **kwargs) == expected, kwargs
+
+
+def test_expired_scholarships_excluded_by_default():
+    profile = {"degree": "any", "country": "any", "funding": "any"}
+    today = date.today().isoformat()
+    results = find_scholarships(profile, DATASET_PATH, top_k=1000)["scholarships"]
+    assert results and all(s["date"] is None or s["date"] >= today for s in results)
+    assert len(find_scholarships(profile, DATASET_PATH, top_k=1000, include_expired=True)["scholarships"]) > len(results)
+
+
+def test_min_amount_and_deadline_sort():
+    profile = {"degree": "any", "country": "any", "funding": "any"}
+    results = find_scholarships(
+        profile, DATASET_PATH, top_k=1000, min_amount=10000, deadline_after="2022-01-01", sort_by="deadline"
+    )["scholarships"]
+    assert results
+    assert all(s["date"] is None or s["date"] >= "2022-01-01" for s in results)
+    dated = [s["date"] for s in results if s["date"] is not None]
+    assert dated == sorted(dated)
+    assert all(s["date"] is None for s in results[len(dated):])
+    assert {"Fully Funded", "£10,000", "$10,000 - $30,000"} <= {s["funds"] for s in results}
+    assert "$1000" not in {s["funds"] for s in results}
+
+
+def test_invalid_filters_return_error():
+    profile = {"degree": "PhD", "country": "any", "funding": "any"}
+    assert find_scholarships(profile, DATASET_PATH, deadline_after="soon")["status"] == "error"
+    assert find_scholarships(profile, DATASET_PATH, sort_by="title")["status"] == "error"
+
+
+def test_compiled_catalog_matches_json(tmp_path):
+    source = tmp_path / "scholarships.json"
+    source.write_text(json.dumps(load_items()))
+    options = [{"include_expired": True}, {"min_amount": 5000, "sort_by": "deadline", "deadline_after": "2022-06-01"}]
+
+    clear_catalog_cache()
+    expected = [find_scholarships(p, str(source), top_k=50, **kw) for p in PROFILES for kw in options]
+    expected_batch = find_scholarships_batch(PROFILES, top_k=50, dataset_path=str(source), **options[1])
+
+    compile_catalog(str(source))
+    clear_catalog_cache()
+    assert isinstance(get_catalog(str(source)).sources, _RecordBlobs)
+    assert [find_scholarships(p, str(source), top_k=50, **kw) for p in PROFILES for kw in options] == expected
+    assert find_scholarships_batch(PROFILES, top_k=50, dataset_path=str(source), **options[1]) == expected_batch
+
+
+def test_stale_compiled_catalog_falls_back_to_json(tmp_path):
+    source = tmp_path / "scholarships.json"
+    source.write_text(json.dumps([{"title": "A", "degrees": "PhD", "funds": "$100", "location": "USA"}]))
+    compiled = compile_catalog(str(source))
+    stat = os.stat(compiled)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    clear_catalog_cache()
+    assert not isinstance(get_catalog(str(source)).sources, _RecordBlobs)
+
+
+def test_truncated_or_corrupt_compiled_catalog_falls_back_to_json(tmp_path):
+    source = tmp_path / "scholarships.json"
+    source.write_text(json.dumps([{"title": "A", "degrees": "PhD", "funds": "$100", "location": "USA"}]))
+    compiled = compile_catalog(str(source))
+    with open(compiled, "rb") as f:
+        artifact = f.read()
+    header_offset, header_length = struct.unpack_from("<QQ", artifact, len(MAGIC))
+    header = json.loads(artifact[header_offset:])
+
+    def with_header(**changes):
+        body = json.dumps({**header, **changes}).encode()
+        prefix = MAGIC + struct.pack("<QQ", header_offset, len(body))
+        return prefix + artifact[len(prefix):header_offset] + body
+
+    records = header["sections"]["records"]
+    corrupt = [
+        artifact[:len(MAGIC) + 4],  # inside the prefix
+        artifact[:header_offset // 2],  # inside the sections
+        artifact[:header_offset + header_length - 1],  # inside the header
+        with_header(sections={k: v for k, v in header["sections"].items() if k != "records"}),
+        with_header(sections={**header["sections"], "records": [records[0], records[1] * 1000, records[2]]}),
+        with_header(sections={**header["sections"], "records": [records[0], None, records[2]]}),
+        with_header(values={}),
+    ]
+    for content in corrupt:
+        with open(compiled, "wb") as f:
+            f.write(content)
+        clear_catalog_cache()
+        catalog = get_catalog(str(source))
+        assert not isinstance(catalog.sources, _RecordBlobs) and len(catalog) == 1
+
+
+def test_parse_query_extracts_unambiguous_fields():
+    locations = ("usa", "united-kingdom", "canada")
+    fields = parse_query("Fully funded Management PhD in the UK, at least $10k", locations)
+    assert fields["degree"] == "PhD"
+    assert fields["country"] == "united-kingdom"
+    assert fields["funding"] == "Fully Funded"
+    assert fields["min_amount"] == 10000
+    assert {"management", "phd", "united", "kingdom"} <= set(fields["terms"])
+
+    ambiguous = parse_query("PhD or Masters in USA or UK", locations)
+    assert "degree" not in ambiguous and "country" not in ambiguous
+
+    assert parse_query("Find PhD scholarships in Japan", locations)["unresolved_place"] == "japan"
+    assert parse_query("fully funded PhD in Germany", locations)["unresolved_place"] == "germany"
+    assert parse_query("Masters in Computer Science at the University of Tokyo", locations)["unresolved_place"] \
+        == "university of tokyo"
+    # Fields of study, amounts and known countries are not unresolved places
+    for text in ("PhD in Management", "Masters in Law in the UK", "at least $10k", "scholarships in Canada",
+                 "PhD scholarships for international students in Management"):
+        assert "unresolved_place" not in parse_query(text, locations), text
+
+
+def test_parse_query_reports_negation_and_unparsed_words():
+    locations = ("usa", "united-kingdom", "canada")
+    assert "unparsed" not in parse_query("Show me the top 3 fully funded PhD scholarships in the UK by deadline",
+                                         locations)
+    negated = parse_query("I want a Masters scholarship, not in the USA", locations)
+    assert negated["degree"] == "Masters" and "country" not in negated
+    assert negated["excluded_countries"] == ["usa"] and "not" in negated["unparsed"]
+    assert "usa" not in negated["terms"]
+    assert parse_query("PhD scholarships with deadlines after 2027", locations)["unparsed"] == ["after"]
+    assert parse_query("Fully funded Management PhD in the UK", locations)["unparsed"] == ["management"]
+
+
+def test_negated_country_is_excluded_from_results():
+    result = find_scholarships({}, DATASET_PATH, top_k=20, query="Masters scholarships, not in the USA",
+                               include_expired=True)
+    assert result["scholarships"]
+    assert all(s["location"].lower() != "usa" for s in result["scholarships"])
+
+
+def test_query_fills_profile_and_ranks_by_relevance():
+    result = find_scholarships({}, DATASET_PATH, top_k=5, query="fully funded PhD in the UK", include_expired=True)
+    scholarships = result["scholarships"]
+    assert scholarships and "message" not in result
+    assert all("PhD" in s["degrees"] and s["location"] == "united-kingdom" for s in scholarships)
+    assert all(s["funds"] == "Fully Funded" for s in scholarships)
+    assert [s["relevance"] for s in scholarships] == sorted((s["relevance"] for s in scholarships), reverse=True)
+
+
+def test_filter_miss_stays_empty_and_lists_text_matches_apart():
+    profile = {"degree": "Doctor of Management", "country": "any", "funding": "any"}
+    assert find_scholarships(profile, DATASET_PATH, include_expired=True)["scholarships"] == []
+
+    result = find_scholarships(profile, DATASET_PATH, include_expired=True, query="Commonwealth PhD")
+    assert result["scholarships"] == [] and "related" in result["message"]
+    assert result["related"] and all(s["relevance"] > 0 for s in result["related"])
+
+
+def test_unknown_place_is_not_widened_to_every_country():
+    result = find_scholarships({}, DATASET_PATH, include_expired=True, query="fully funded PhD in Germany")
+    assert result["scholarships"] == []
+    assert all(s["location"] != "germany" for s in result.get("related", []))
@@ -0,0 +1,112 @@
+"""
+test_intent_router.py
+
+Tests for the rule-based fast path in front of the orchestrator (tools/intent_router.py).
+Run from the project root: python -m pytest tests/test_intent_router.py
+"""
+
+from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.offline_model import RuleBasedPolicy, install_offline_model, restore_models
+from agents.orchestrator_agent import orchestrator_agent
+from tools.intent_router import (INTENT_DOCUMENT, INTENT_FIND, INTENT_LLM, INTENT_PROFILE, classify,
+                                 saved_preferences)
+
+
+def test_classify_extracts_intents_and_slots():
+    (profile,) = classify("My name is Rifat Hasan. I am from Bangladesh.")
+    assert profile.name == INTENT_PROFILE
+    assert profile.slots == {"name": "Rifat Hasan", "country": "Bangladesh"}
+
+    profile, find = classify("I'm from Nepal. Show me the top 3 fully funded PhD scholarships in the UK by deadline")
+    assert profile.slots == {"country": "Nepal"} and find.name == INTENT_FIND
+    assert find.slots["top_k"] == 3 and find.slots["sort_by"] == "deadline"
+
+    assert find.slots["query"] == "Show me the top 3 fully funded PhD scholarships in the UK by deadline"
+    (find,) = classify("Any Masters scholarships in Canada worth at least $10k?")
+    assert find.slots["min_amount"] == 10000
+
+    assert classify("Please write an SOP for Oxford")[0].name == INTENT_DOCUMENT
+
+
+def test_ambiguous_messages_go_to_the_llm():
+    for text in ["", "Hello", "What is a PhD?", "Tell me more about the first one",
+                 "Why do those scholarships fit me?", "I want a scholarship on Mars",
+                 "Find PhD scholarships in Japan", "Fully funded postdoc scholarships"]:
+        assert classify(text) == [], text
+
+
+def test_searches_with_words_the_parser_did_not_understand_go_to_the_llm():
+    for text in ["I want a Masters scholarship, not in the USA", "PhD scholarships with deadlines after 2027",
+                 "PhD scholarships for international students in Management"]:
+        assert classify(text) == [], text
+
+
+def test_facts_are_saved_and_the_rest_of_the_message_goes_to_the_llm():
+    profile, rest = classify("I am from Bangladesh. Tell me about studying in Germany.")
+    assert profile.slots == {"country": "Bangladesh"} and rest.name == INTENT_LLM
+    profile, rest = classify("My name is Rifat. Help me prepare for my visa interview.")
+    assert profile.slots == {"name": "Rifat"} and rest.name == INTENT_LLM
+    profile, rest = classify("I'm from Nepal. Find PhD scholarships in Japan")
+    assert profile.slots == {"country": "Nepal"} and rest.name == INTENT_LLM
+    # Small talk around the facts is not a request
+    assert [intent.name for intent in classify("Hi, my name is Imon. Thanks!")] == [INTENT_PROFILE]
+
+
+def test_saved_profile_fills_fields_the_request_leaves_open():
+    profile = {"name": "Imon", "country": "Bangladesh", "target_degree": "PhD in Management", "funding": "Fully Funded"}
+    assert saved_preferences(profile, "Scholarships in the UK") == {"degree": "PhD", "funding": "Fully Funded"}
+    assert saved_preferences(profile, "Partially funded Masters scholarships") == {}
+
+
+async def test_fast_path_answers_without_model_calls():
+    policy = RuleBasedPolicy()
+    previous = install_offline_model(orchestrator_agent, policy)
+    try:
+        app = App(name="router_test", root_agent=orchestrator_agent,
+                  resumability_config=ResumabilityConfig(is_resumable=True))
+        runner = Runner(app=app, session_service=InMemorySessionService())
+        session = await runner.session_service.create_session(app_name="router_test", user_id="u")
+
+        async def send(text: str) -> str:
+            message = types.Content(role="user", parts=[types.Part(text=text)])
+            texts = [p.text async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message)
+                     if e.content for p in e.content.parts or [] if p.text]
+            return "\n".join(texts)
+
+        reply = await send("Find 2 fully funded PhD scholarships in the UK")
+        assert reply.count("**Degrees**: PhD") == 2 and "name and country" in reply
+        assert "saved your name, country" in await send("My name is Imon. I am from Bangladesh.")
+        assert "saved your target degree" in await send("I want to apply for a Masters.")
+        reply = await send("Find 3 scholarships in the UK")  # the saved target degree applies
+        degrees = [line for line in reply.splitlines() if "**Degrees**" in line]
+        assert len(degrees) == 3 and all("Masters" in line for line in degrees)
+        assert sum(policy.calls.values()) == 0
+
+        stored = await runner.session_service.get_session(app_name="router_test", user_id="u", session_id=session.id)
+        assert stored.state["user:name"] == "Imon"
+
+        await send("Please write a CV for the Chevening scholarship")
+        assert policy.calls["orchestrator_agent"] > 0 and policy.calls["cv_agent"] == 1
+    finally:
+        restore_models(previous)
+
+
+async def test_mixed_message_saves_the_facts_and_reaches_the_llm():
+    policy = RuleBasedPolicy()
+    previous = install_offline_model(orchestrator_agent, policy)
+    try:
+        runner = Runner(app_name="router_test", agent=orchestrator_agent, session_service=InMemorySessionService())
+        session = await runner.session_service.create_session(app_name="router_test", user_id="u")
+        message = types.Content(role="user", parts=[types.Part(text="My name is Rifat. Help me prepare for my visa interview.")])
+        texts = [p.text async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message)
+                 if e.content for p in e.content.parts or [] if p.text]
+        assert policy.calls["orchestrator_agent"] > 0
+        assert not any(text.startswith("Thanks! I've saved") for text in texts)
+        stored = await runner.session_service.get_session(app_name="router_test", user_id="u", session_id=session.id)
+        assert stored.state["user:name"] == "Rifat"
+    finally:
+        restore_models(previous)
@@ -0,0 +1,128 @@
+"""
+test_memory_store.py
+
+Tests for the bounded memory service: per-user cap, LRU and age eviction, spill to SQLite
+and n-gram recall (runner/memory_store.py).
+Run from the project root: python -m pytest tests/test_memory_store.py
+"""
+
+import time
+
+from google.adk.apps.app import App
+from google.adk.events.event import Event
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService, Session
+from google.genai import types
+
+from agents.offline_model import install_offline_model, restore_models
+from agents.orchestrator_agent import orchestrator_agent
+from runner.memory_store import BoundedMemoryService, RememberSessionsPlugin
+
+
+def make_session(session_id: str, texts: list, user_id: str = "u", timestamp: float = None) -> Session:
+    events = [
+        Event(invocation_id=f"inv-{i}", author="user", timestamp=timestamp or time.time(),
+              content=types.Content(role="user", parts=[types.Part(text=text)]))
+        for i, text in enumerate(texts)
+    ]
+    return Session(app_name="app", user_id=user_id, id=session_id, events=events)
+
+
+async def recall(service, query: str, user_id: str = "u") -> list:
+    response = await service.search_memory(app_name="app", user_id=user_id, query=query)
+    return [entry.content.parts[0].text for entry in response.memories]
+
+
+async def test_recall_ranks_phrases_and_synonyms_and_survives_reopen(tmp_path):
+    path = str(tmp_path / "memory.db")
+    service = BoundedMemoryService(path)
+    await service.add_session_to_memory(make_session("s1", [
+        "I want a PhD in Management in the United Kingdom",
+        "My management experience is five years",
+        "I prefer Canada for a masters",
+    ]))
+    assert await recall(service, "UK management PhD") == [
+        "I want a PhD in Management in the United Kingdom", "My management experience is five years"]
+    assert await recall(service, "Australia") == []
+    assert await recall(service, "canada", user_id="someone else") == []
+    service.close()
+
+    service = BoundedMemoryService(path)
+    assert await recall(service, "canada") == ["I prefer Canada for a masters"]
+    assert service.stats()["loads"] == 1
+    service.close()
+
+
+async def test_adding_a_session_again_stores_only_new_events(tmp_path):
+    service = BoundedMemoryService(str(tmp_path / "memory.db"), max_entries_per_user=2)
+    session = make_session("s1", ["PhD in Management", "PhD in Law"])
+    await service.add_session_to_memory(session)
+    assert await recall(service, "management") == ["PhD in Management"]  # "PhD in Law" is least recently used
+    session.events += make_session("s1", ["Masters in Finance"]).events
+    await service.add_session_to_memory(session)
+    await service.add_session_to_memory(session)
+    assert service.stats()["hot_entries"] == 2 and service.stats()["evictions"] == 1
+    # The evicted event is not brought back by adding its session again
+    assert sorted(await recall(service, "phd law finance")) == ["Masters in Finance", "PhD in Management"]
+    service.close()
+
+
+async def test_cap_evicts_least_recently_recalled_and_old_entries_expire(tmp_path):
+    path = str(tmp_path / "memory.db")
+    service = BoundedMemoryService(path, max_entries_per_user=2, max_age=3600)
+    await service.add_session_to_memory(make_session("s1", ["alpha note", "beta note"]))
+    assert await recall(service, "alpha") == ["alpha note"]  # beta is now least recently used
+    await service.add_session_to_memory(make_session("s2", ["gamma note"]))
+    assert sorted(await recall(service, "note")) == ["alpha note", "gamma note"]
+    await service.add_session_to_memory(make_session("s3", ["ancient note"], timestamp=time.time() - 7200))
+    assert service.stats()["evictions"] == 1 and service.stats()["expired"] == 1
+    service.close()
+
+    service = BoundedMemoryService(path, max_entries_per_user=2, max_age=3600)
+    assert sorted(await recall(service, "note")) == ["alpha note", "gamma note"]
+    service.close()
+
+
+async def test_hot_entries_past_max_age_are_not_recalled(tmp_path, monkeypatch):
+    service = BoundedMemoryService(str(tmp_path / "memory.db"), max_age=3600)
+    await service.add_session_to_memory(make_session("s1", ["old note"], timestamp=time.time() - 3000))
+    await service.add_session_to_memory(make_session("s2", ["new note"]))
+    assert sorted(await recall(service, "note")) == ["new note", "old note"]
+
+    later = time.time() + 1800  # "old note" expires; no add runs the eviction in between
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert await recall(service, "note") == ["new note"]
+    service.close()
+
+
+async def test_inactive_users_spill_to_disk_and_reload(tmp_path):
+    service = BoundedMemoryService(str(tmp_path / "memory.db"), max_hot_users=2, max_entries_per_user=2)
+    for user in ("a", "b", "c"):
+        await service.add_session_to_memory(make_session(f"s-{user}", [f"scholarship notes of {user}"], user_id=user))
+        assert await recall(service, "notes", user_id=user) == [f"scholarship notes of {user}"]
+    assert service.stats()["hot_users"] == 2 and service.stats()["spills"] == 1
+
+    # Adding for a spilled user writes and caps on disk without loading it
+    await service.add_session_to_memory(make_session("s-a2", ["more notes", "even more notes"], user_id="a"))
+    assert service.stats()["loads"] == 3 and service.stats()["evictions"] == 1
+    assert len(await recall(service, "notes", user_id="a")) == 2
+    assert service.stats()["loads"] == 4
+    service.close()
+
+
+async def test_runner_turns_are_remembered_for_the_orchestrator(tmp_path):
+    service = BoundedMemoryService(str(tmp_path / "memory.db"))
+    previous = install_offline_model(orchestrator_agent)
+    try:
+        app = App(name="app", root_agent=orchestrator_agent, plugins=[RememberSessionsPlugin(service)])
+        runner = Runner(app=app, session_service=InMemorySessionService(), memory_service=service)
+        session = await runner.session_service.create_session(app_name="app", user_id="u")
+        for text in ["My name is Rifat.", "I am from Bangladesh."]:
+            message = types.Content(role="user", parts=[types.Part(text=text)])
+            async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+                pass
+            assert text in await recall(service, text)  # remembered as soon as the turn ends
+        assert "load_memory" in [getattr(tool, "name", None) for tool in orchestrator_agent.tools]
+    finally:
+        restore_models(previous)
+        service.close()
@@ -0,0 +1,91 @@
+"""
+test_model_pool.py
+
+Tests for the shared model factory and the process-wide adaptive rate limiter (agents/model_pool.py).
+Run from the project root: python -m pytest tests/test_model_pool.py
+"""
+
+import asyncio
+import time
+
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from google.genai.errors import ClientError
+
+from agents import model_pool
+from agents.model_pool import AdaptiveRateLimiter, SharedGemini, TokenBucket, get_model
+
+
+def test_agents_share_one_model_and_client(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(model_pool, "_CLIENT", None)
+    assert get_model() is get_model()
+    assert get_model().api_client is get_model().api_client
+
+    # Same HTTP options as ADK's own client, except that SharedGemini does the retrying
+    http_options = get_model().api_client._api_client._http_options
+    for header, value in Gemini(model="test")._tracking_headers.items():
+        assert value in http_options.headers[header]
+    assert http_options.retry_options.attempts == 1
+
+
+def test_token_bucket_reservations_queue_up():
+    bucket = TokenBucket(per_minute=60, capacity=2)  # one token per second
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == 0.0
+    assert 0.9 < bucket.reserve(1) <= 1.0
+    assert 1.9 < bucket.reserve(1) <= 2.0
+
+
+def test_limiter_smooths_bursts_and_reports_wait_time():
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, tokens_per_minute=1_000_000)
+    limiter.requests.capacity = 1  # no burst allowance: one call every 0.1s
+
+    async def burst():
+        start = time.perf_counter()
+        await asyncio.gather(*(limiter.acquire(10) for _ in range(4)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(burst())
+    assert 0.25 < elapsed < 0.6
+    assert limiter.metrics()["wait_seconds"] > 0.5  # 0 + 0.1 + 0.2 + 0.3
+
+
+def test_limiter_backs_off_on_429_and_recovers():
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, tokens_per_minute=60_000)
+    limiter.on_throttled()
+    limiter.on_throttled()
+    assert limiter.metrics()["rate_scale"] == 0.25
+    for _ in range(20):
+        limiter.on_complete(0.1, estimated_tokens=100, actual_tokens=80)
+    metrics = limiter.metrics()
+    assert metrics["rate_scale"] == 1.0
+    assert (metrics["calls"], metrics["throttled"], metrics["tokens"]) == (20, 2, 1600)
+
+
+def test_each_attempt_is_charged_and_only_success_counts(monkeypatch):
+    attempts = []
+
+    async def flaky(self, llm_request, stream=False):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ClientError(429, {"error": {"message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="ok")]))
+
+    monkeypatch.setattr(Gemini, "generate_content_async", flaky)
+    limiter = AdaptiveRateLimiter(requests_per_minute=60, tokens_per_minute=1_000_000)
+    monkeypatch.setattr(model_pool, "_LIMITER", limiter)
+    model = SharedGemini(model="test", retry_options=types.HttpRetryOptions(
+        attempts=5, initial_delay=0.01, max_delay=0.01, jitter=0, http_status_codes=[429]))
+
+    async def call():
+        request = LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text="hi")])])
+        return [r async for r in model.generate_content_async(request)]
+
+    assert len(asyncio.run(call())) == 1
+    metrics = limiter.metrics()
+    assert (metrics["calls"], metrics["throttled"], metrics["retries"]) == (1, 2, 2)
+    assert metrics["rate_scale"] == 0.3  # halved twice, then one additive step
+    assert 56.9 < limiter.requests._tokens < 57.5  # three attempts charged
@@ -0,0 +1,105 @@
+"""
+test_offline_model.py
+
+Tests for the offline scripted model (agents/offline_model.py) driving the real agents and tools.
+Run from the project root: python -m pytest tests/test_offline_model.py
+"""
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.offline_model import (
+    OfflineLlm, ReplayPolicy, RuleBasedPolicy, install_offline_model, iter_agents, restore_models,
+)
+from agents.orchestrator_agent import orchestrator_agent
+from runner.review_dispatch import deliver_review_decisions
+from tools import intent_router
+
+
+def make_runner(agent) -> Runner:
+    app = App(name="offline_test", root_agent=agent, resumability_config=ResumabilityConfig(is_resumable=True))
+    return Runner(app=app, session_service=InMemorySessionService())
+
+
+async def send(runner: Runner, session_id: str, content: types.Content, invocation_id: str = None) -> list:
+    events = []
+    async for event in runner.run_async(
+            user_id="u", session_id=session_id, new_message=content, invocation_id=invocation_id
+    ):
+        events.append(event)
+    return events
+
+
+def user_text(text: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def final_text(events: list) -> str:
+    return [part.text for e in events if e.content for part in e.content.parts or [] if part.text][-1]
+
+
+def calls(events: list) -> list:
+    return [call.name for event in events for call in event.get_function_calls()]
+
+
+def test_install_covers_agent_tools_and_restores():
+    originals = {agent.name: agent.model for agent in iter_agents(orchestrator_agent)}
+    previous = install_offline_model(orchestrator_agent)
+    try:
+        names = {agent.name for agent in iter_agents(orchestrator_agent)}
+        assert {"scholarship_agent", "google_search_scholarships", "sop_agent", "refiner_agent"} <= names
+        assert all(isinstance(agent.model, OfflineLlm) for agent in iter_agents(orchestrator_agent))
+    finally:
+        restore_models(previous)
+    assert {agent.name: agent.model for agent in iter_agents(orchestrator_agent)} == originals
+
+
+async def test_rules_drive_find_and_sop_review_pipeline(monkeypatch, review_queue_db):
+    monkeypatch.setattr(intent_router, "FAST_PATH_ENABLED", False)
+    policy = RuleBasedPolicy()
+    previous = install_offline_model(orchestrator_agent, policy)
+    try:
+        runner = make_runner(orchestrator_agent)
+        session = await runner.session_service.create_session(app_name="offline_test", user_id="u")
+
+        events = await send(runner, session.id, user_text("Find fully funded PhD scholarships in the UK"))
+        assert calls(events) == ["retrieve_userinfo", "scholarship_agent"]
+        assert "**Degrees**: PhD" in final_text(events)
+        assert policy.calls["scholarship_agent"] == 3  # retrieve, finder, final answer
+
+        events = await send(runner, session.id, user_text("Please write an SOP for a PhD at Oxford."))
+        assert calls(events) == ["write_document", "submit_draft_for_review"]
+        queued = [r.response for e in events for r in e.get_function_responses()][-1]
+        assert queued["status"] == "queued"
+
+        # The reviewer approves from the queue; the decision reaches the session without a model turn
+        model_calls = sum(policy.calls.values())
+        review_queue_db.decide([(queued["review_id"], True)])
+        assert (await deliver_review_decisions(runner))["approved"] == 1
+        assert sum(policy.calls.values()) == model_calls
+        session = await runner.session_service.get_session(app_name="offline_test", user_id="u", session_id=session.id)
+        assert session.state["user:last_sop"] == review_queue_db.draft_text(queued["draft_id"])
+        assert session.state["user:last_sop"].startswith("This statement of purpose")
+        assert "approved" in session.events[-1].content.parts[0].text
+    finally:
+        restore_models(previous)
+
+
+async def test_replay_policy_replays_recorded_turns_in_order():
+    agent = LlmAgent(name="replayed", model="unused", instruction="")
+    policy = ReplayPolicy({"replayed": [{"text": "first"}, {"text": "second"}]})
+    install_offline_model(agent, policy)
+    runner = make_runner(agent)
+    session = await runner.session_service.create_session(app_name="offline_test", user_id="u")
+
+    texts = []
+    for message in ("a", "b"):
+        events = await send(runner, session.id, user_text(message))
+        texts.append(final_text(events))
+    assert texts == ["first", "second"]
+    with pytest.raises(RuntimeError):
+        await send(runner, session.id, user_text("c"))
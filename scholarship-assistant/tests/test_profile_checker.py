@@ -0,0 +1,61 @@
+"""
+test_profile_checker.py
+
+Tests for the cached user-profile view behind save_userinfo/retrieve_userinfo (tools/profile_checker.py).
+Run from the project root: python -m pytest tests/test_profile_checker.py
+"""
+
+from types import SimpleNamespace
+
+from google.adk.sessions.state import State
+
+from tools import profile_checker
+from tools.profile_checker import PROFILE_VERSION_KEY, retrieve_userinfo, save_userinfo
+
+
+def make_context(value: dict = None, user_id: str = "u1"):
+    """Just the parts of a ToolContext the profile tools use."""
+    return SimpleNamespace(
+        state=State(dict(value or {}), {}),
+        user_id=user_id,
+        _invocation_context=SimpleNamespace(app_name="app"),
+    )
+
+
+def test_save_then_retrieve_uses_cached_view(monkeypatch):
+    context = make_context({"user:name": "Imon", "temp:other": 1})
+    assert retrieve_userinfo(context)["data"] == {"name": "Imon"}
+
+    result = save_userinfo(context, fields={"country": "Bangladesh"}, degree="PhD")
+    assert sorted(result["saved_fields"]) == ["country", "degree"]
+    assert context.state["user:country"] == "Bangladesh"
+
+    # The saved view is served from the cache: no state scan on retrieval
+    monkeypatch.setattr(profile_checker, "_build_view", None)
+    assert retrieve_userinfo(context)["data"] == {"name": "Imon", "country": "Bangladesh", "degree": "PhD"}
+
+
+def test_stale_cache_never_leaks_across_versions():
+    context = make_context()
+    save_userinfo(context, fields={"name": "Imon"})
+    other = make_context(dict(context.state.to_dict()))  # same user, another session's copy of the state
+    save_userinfo(other, fields={"name": "Rifat"})
+
+    assert retrieve_userinfo(context)["data"] == {"name": "Imon"}
+    assert retrieve_userinfo(other)["data"] == {"name": "Rifat"}
+    assert context.state[PROFILE_VERSION_KEY] != other.state[PROFILE_VERSION_KEY]
+
+
+def test_summary_truncates_long_values_and_fields_return_them_in_full():
+    draft = "word " * 500
+    context = make_context()
+    save_userinfo(context, fields={"name": "Imon", "last_sop": draft})
+
+    summary = retrieve_userinfo(context)
+    assert summary["truncated"] == ["last_sop"]
+    assert len(summary["data"]["last_sop"]) < 400 and summary["data"]["name"] == "Imon"
+    assert retrieve_userinfo(context, max_value_chars=0)["data"]["last_sop"] == draft
+
+    requested = retrieve_userinfo(context, fields=["last_sop", "country"])
+    assert requested["data"] == {"last_sop": draft}
+    assert requested["missing"] == ["country"]
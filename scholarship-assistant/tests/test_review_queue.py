@@ -0,0 +1,101 @@
+"""
+test_review_queue.py
+
+Tests for the durable review queue (tools/review_queue.py) and decision delivery (runner/review_dispatch.py).
+Run from the project root: python -m pytest tests/test_review_queue.py
+"""
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+from runner.review_dispatch import REVIEW_AUTHOR, deliver_review_decisions
+from tools.review_queue import APPROVED, PENDING, REJECTED, ReviewQueue
+
+DRAFT = "My research experience has prepared me for doctoral study.\n\nI want to join Oxford."
+
+
+def test_drafts_are_stored_once_by_content_hash(tmp_path):
+    queue = ReviewQueue(str(tmp_path / "reviews.db"))
+    first, second = queue.put_draft(DRAFT), queue.put_draft(DRAFT)
+    assert first == second and queue.draft_text(first) == DRAFT
+    assert queue._db.execute("SELECT COUNT(*) FROM drafts").fetchone()[0] == 1
+
+    review = queue.submit("app", "u", "s1", "SOP", first)
+    assert queue.submit("app", "u", "s1", "SOP", first)["review_id"] == review["review_id"]  # still pending
+    assert queue.submit("app", "u", "s2", "SOP", first)["review_id"] != review["review_id"]
+    queue.close()
+
+
+def test_batch_decisions_only_touch_pending_reviews(tmp_path):
+    queue = ReviewQueue(str(tmp_path / "reviews.db"))
+    draft_id = queue.put_draft(DRAFT)
+    ids = [queue.submit("app", "u", f"s{i}", "SOP", draft_id)["review_id"] for i in range(5)]
+
+    decided = queue.decide([(ids[0], True), (ids[1], False, "Shorter, please."), (ids[2], True)])
+    assert [(r["review_id"], r["status"]) for r in decided] == [(ids[0], APPROVED), (ids[1], REJECTED),
+                                                                (ids[2], APPROVED)]
+    assert queue.decide([(ids[0], False)]) == []  # already decided
+    assert [r["review_id"] for r in queue.pending()] == ids[3:]
+    assert queue.get(ids[1])["feedback"] == "Shorter, please."
+
+    assert [r["review_id"] for r in queue.undelivered("app")] == ids[:3]
+    queue.mark_delivered(ids[:2])
+    assert [r["review_id"] for r in queue.undelivered("app")] == [ids[2]]
+    assert queue.get(ids[3])["status"] == PENDING
+    queue.close()
+
+
+async def test_approvals_are_delivered_to_many_sessions_without_model_turns(review_queue_db):
+    agent = LlmAgent(name="never_called", model="unused", instruction="")
+    runner = Runner(app_name="app", agent=agent, session_service=InMemorySessionService())
+    draft_id = review_queue_db.put_draft(DRAFT)
+    sessions = [await runner.session_service.create_session(app_name="app", user_id=f"u{i}") for i in range(20)]
+    ids = [review_queue_db.submit("app", s.user_id, s.id, "SOP", draft_id, target="Oxford")["review_id"]
+           for s in sessions]
+    ids.append(review_queue_db.submit("app", "gone", "deleted-session", "CV", draft_id)["review_id"])
+
+    review_queue_db.decide([(review_id, review_id != ids[1]) for review_id in ids])
+    summary = await deliver_review_decisions(runner)
+    assert summary == {"approved": 20, "rejected": 1, "revision_turns": 0, "missing_sessions": 1}
+    assert review_queue_db.undelivered("app") == []
+
+    approved = await runner.session_service.get_session(app_name="app", user_id="u0", session_id=sessions[0].id)
+    assert approved.state["user:last_sop"] == DRAFT
+    assert approved.events[-1].author == REVIEW_AUTHOR
+    rejected = await runner.session_service.get_session(app_name="app", user_id="u1", session_id=sessions[1].id)
+    assert "user:last_sop" not in rejected.state
+    assert "rejected" in rejected.events[-1].content.parts[0].text
+
+
+async def test_delivery_failure_does_not_repeat_earlier_notices(review_queue_db):
+    agent = LlmAgent(name="never_called", model="unused", instruction="")
+    service = InMemorySessionService()
+    runner = Runner(app_name="app", agent=agent, session_service=service)
+    session = await service.create_session(app_name="app", user_id="u")
+    ids = [review_queue_db.submit("app", "u", session.id, kind, review_queue_db.put_draft(f"{kind}\n\n{DRAFT}"))["review_id"]
+           for kind in ("Cover Letter", "SOP", "CV")]
+    review_queue_db.decide([(review_id, True) for review_id in ids])
+
+    append_event = service.append_event
+    calls = []
+
+    async def flaky_append(session, event):
+        calls.append(event.invocation_id)
+        if len(calls) == 2:
+            raise ConnectionError("session store unavailable")
+        return await append_event(session, event)
+
+    service.append_event = flaky_append
+    with pytest.raises(ConnectionError):
+        await deliver_review_decisions(runner)
+    assert [r["review_id"] for r in review_queue_db.undelivered("app")] == ids[1:]
+
+    await deliver_review_decisions(runner)
+    assert review_queue_db.undelivered("app") == []
+    stored = await service.get_session(app_name="app", user_id="u", session_id=session.id)
+    assert [event.invocation_id for event in stored.events] == [f"review-{review_id}" for review_id in ids]
+    # Only SOPs and CVs have a profile field
+    assert stored.state["user:last_sop"] == f"SOP\n\n{DRAFT}" and stored.state["user:last_cv"] == f"CV\n\n{DRAFT}"
+    assert "user:last_cover letter" not in stored.state
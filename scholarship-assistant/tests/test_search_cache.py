@@ -0,0 +1,113 @@
+"""
+test_search_cache.py
+
+Unit tests for the Google search fallback cache and provisional ingestion (tools/search_cache.py).
+Run from the project root: python -m pytest tests/test_search_cache.py
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import tools.finder as finder
+import tools.search_cache as search_cache
+from tools.search_cache import SearchCache, ingest_provisional, normalize_query, parse_search_results
+
+SEARCH_ANSWER = """Here are some scholarships I found:
+- Mars Colony PhD Fellowship | PhD | Fully Funded | mars | 2099-01-31 | https://example.org/mars
+- Olympus Mons Masters Grant | Masters | $5,000 | mars | Not specified | https://example.org/olympus
+Let me know if you need more."""
+
+
+def test_normalized_queries_share_a_key():
+    assert normalize_query("PhD scholarships in the UK") == normalize_query("uk phd scholarship")
+
+
+def test_cache_ttl_and_lru_eviction(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.db"), ttl=60, max_entries=2)
+    assert cache.get("phd uk") is None
+    cache.put("phd uk", "answer 1")
+    cache.put("masters canada", "answer 2")
+    assert cache.get("UK PhD") == "answer 1"  # refreshes its LRU position
+    cache.put("bachelor india", "answer 3")
+    assert len(cache) == 2
+    assert cache.get("masters canada") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get("phd uk") is None
+    cache.close()
+
+
+def test_parse_search_results():
+    records = parse_search_results(SEARCH_ANSWER)
+    assert [r["title"] for r in records] == ["Mars Colony PhD Fellowship", "Olympus Mons Masters Grant"]
+    assert records[0]["date"] == "2099-01-31" and records[1]["date"] is None
+    assert records[1]["url"] == "https://example.org/olympus"
+
+
+async def test_callbacks_cache_answers_and_finder_serves_provisional_results(tmp_path, monkeypatch):
+    provisional = tmp_path / "provisional.json"
+    monkeypatch.setattr(search_cache, "_CACHE", SearchCache(str(tmp_path / "cache.db")))
+    monkeypatch.setattr(finder, "PROVISIONAL_DATASET_PATH", str(provisional))
+    monkeypatch.setattr(search_cache, "PROVISIONAL_DATASET_PATH", str(provisional))
+
+    profile = {"degree": "PhD", "country": "mars", "funding": "any"}
+    assert finder.agent_scholarship_finder(profile)["scholarships"] == []
+
+    tool = SimpleNamespace(name=search_cache.SEARCH_TOOL_NAME)
+    args = {"request": "PhD scholarships on Mars"}
+    assert await search_cache.search_cache_before_tool(tool, args, None) is None
+    await search_cache.search_cache_after_tool(tool, args, None, SEARCH_ANSWER)
+
+    hit = await search_cache.search_cache_before_tool(tool, {"request": "mars phd scholarship"}, None)
+    assert hit == {"result": SEARCH_ANSWER, "cached": True}
+
+    result = finder.agent_scholarship_finder(profile)
+    assert [s["title"] for s in result["scholarships"]] == ["Mars Colony PhD Fellowship"]
+    assert result["scholarships"][0]["provisional"] is True
+    assert "Provisional" in result["message"]
+
+
+def test_ingest_drops_expired_and_deduplicates(tmp_path):
+    path = tmp_path / "provisional.json"
+    path.write_text(json.dumps([
+        {"title": "Old", "degrees": "PhD", "funds": "", "date": None, "location": "x", "expires_at": "2000-01-01T00:00:00+00:00"},
+    ]))
+    records = parse_search_results(SEARCH_ANSWER)
+    assert ingest_provisional(records, str(path)) == 2
+    assert ingest_provisional(records[:1], str(path)) == 2
+    titles = [e["title"] for e in json.loads(path.read_text())]
+    assert titles == ["Olympus Mons Masters Grant", "Mars Colony PhD Fellowship"]
+
+
+def test_finder_skips_expired_entries_before_the_next_ingest(tmp_path, monkeypatch):
+    path = tmp_path / "provisional.json"
+    monkeypatch.setattr(finder, "PROVISIONAL_DATASET_PATH", str(path))
+    finder.finder_flight.clear()
+    ingest_provisional(parse_search_results(SEARCH_ANSWER), str(path), ttl=3600)
+    entries = json.loads(path.read_text())
+    entries[0]["expires_at"] = "2000-01-01T00:00:00+00:00"  # lapsed since it was written
+    path.write_text(json.dumps(entries))
+
+    profile = {"degree": "any", "country": "mars", "funding": "any"}
+    titles = [s["title"] for s in finder.agent_scholarship_finder(profile)["scholarships"]]
+    assert titles == ["Olympus Mons Masters Grant"]
+
+
+def test_failed_ingest_leaves_no_temporary_file(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    path = tmp_path / "data" / "provisional.json"
+    ingest_provisional(parse_search_results(SEARCH_ANSWER)[:1], str(path))
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(search_cache.os, "replace", fail)
+    with pytest.raises(OSError):
+        ingest_provisional(parse_search_results(SEARCH_ANSWER), str(path))
+    assert [p.name for p in path.parent.iterdir()] == ["provisional.json"]
+    assert len(json.loads(path.read_text())) == 1
@@ -0,0 +1,157 @@
+"""
+test_session_store.py
+
+Tests for the WAL-mode SQLite session store with batched writes and compaction (runner/session_store.py).
+Run from the project root: python -m pytest tests/test_session_store.py
+"""
+
+import asyncio
+import threading
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+
+from runner.session_store import SqliteSessionStore
+
+
+def make_event(invocation: int, text: str = "hello", author: str = "user", state: dict = None,
+               final: bool = True) -> Event:
+    part = types.Part(text=text) if final else types.Part(function_call=types.FunctionCall(name="tool", args={}))
+    return Event(
+        invocation_id=f"inv-{invocation}", author=author,
+        content=types.Content(role="user" if author == "user" else "model", parts=[part]),
+        actions=EventActions(state_delta=state or {}),
+    )
+
+
+async def test_state_scopes_round_trip_and_survive_reopen(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SqliteSessionStore(path)
+    session = await store.create_session(app_name="app", user_id="u", session_id="s1",
+                                         state={"app:theme": "dark", "user:name": "Imon", "step": 1, "temp:x": 1})
+    assert session.state == {"app:theme": "dark", "user:name": "Imon", "step": 1}
+    await store.append_event(session, make_event(1, state={"user:country": "BD", "step": 2, "temp:y": 2}))
+    store.close()
+
+    store = SqliteSessionStore(path)
+    loaded = await store.get_session(app_name="app", user_id="u", session_id="s1")
+    assert loaded.state == {"app:theme": "dark", "user:name": "Imon", "user:country": "BD", "step": 2}
+    assert [e.content.parts[0].text for e in loaded.events] == ["hello"]
+
+    # user: and app: state are shared with the user's other sessions
+    other = await store.create_session(app_name="app", user_id="u", session_id="s2")
+    assert other.state == {"app:theme": "dark", "user:name": "Imon", "user:country": "BD"}
+    assert {s.id for s in (await store.list_sessions(app_name="app", user_id="u")).sessions} == {"s1", "s2"}
+    store.close()
+
+
+async def test_events_are_written_once_per_turn(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"))
+    session = await store.create_session(app_name="app", user_id="u", session_id="s")
+    for _ in range(3):
+        await store.append_event(session, make_event(1, author="agent", final=False))
+    assert store.flushes == 0
+    await store.append_event(session, make_event(1, author="agent", text="done"))
+    assert store.flushes == 1
+
+    # Buffered events are flushed before any read
+    await store.append_event(session, make_event(2, author="agent", final=False))
+    loaded = await store.get_session(app_name="app", user_id="u", session_id="s")
+    assert len(loaded.events) == 5 and store.flushes == 2
+    recent = await store.get_session(app_name="app", user_id="u", session_id="s",
+                                     config=GetSessionConfig(num_recent_events=2))
+    assert [e.invocation_id for e in recent.events] == ["inv-1", "inv-2"]
+    store.close()
+
+
+async def test_compaction_archives_old_invocations_and_keeps_state(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"), compact_after=20, keep_events=5)
+    session = await store.create_session(app_name="app", user_id="u", session_id="s")
+    for invocation in range(10):
+        await store.append_event(session, make_event(invocation, final=False))
+        await store.append_event(session, make_event(invocation, state={"turn": invocation}))
+        await store.append_event(session, make_event(invocation, author="agent", text=f"reply {invocation}"))
+
+    loaded = await store.get_session(app_name="app", user_id="u", session_id="s")
+    assert store.compactions == 1
+    assert loaded.state == {"turn": 9}
+    # At 21 events the five most recent were kept, widened to whole invocations (5 and 6)
+    assert [e.invocation_id for e in loaded.events] == [f"inv-{i}" for i in range(5, 10) for _ in range(3)]
+    archived = store._db.execute("SELECT COUNT(*) FROM events_archive").fetchone()[0]
+    assert archived + len(loaded.events) == 30
+    store.close()
+
+
+async def test_duplicate_and_deleted_sessions(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"))
+    session = await store.create_session(app_name="app", user_id="u", session_id="s")
+    await store.append_event(session, make_event(1))
+    try:
+        await store.create_session(app_name="app", user_id="u", session_id="s")
+        assert False, "duplicate session id accepted"
+    except ValueError:
+        pass
+    await store.delete_session(app_name="app", user_id="u", session_id="s")
+    assert await store.get_session(app_name="app", user_id="u", session_id="s") is None
+    store.close()
+
+
+async def test_a_held_database_does_not_block_the_event_loop(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"))
+    session = await store.create_session(app_name="app", user_id="u", session_id="s")
+    held, release = threading.Event(), threading.Event()
+    timed_out = []
+
+    def hold():
+        with store._lock:  # stands in for a long write on another thread
+            held.set()
+            if not release.wait(timeout=2):
+                timed_out.append(1)  # the event loop was blocked: the ticker never ran
+
+    threading.Thread(target=hold).start()
+    held.wait()
+    ticks = []
+
+    async def ticker():
+        for _ in range(3):
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+        release.set()
+
+    loaded, _ = await asyncio.gather(
+        store.get_session(app_name="app", user_id="u", session_id="s"), ticker())
+    assert loaded.id == session.id and len(ticks) == 3 and not timed_out
+    store.close()
+
+
+class _FailingDeletes:
+    """Connection wrapper whose DELETE FROM sessions fails, to check the transaction is rolled back."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def execute(self, sql, *args):
+        if sql.startswith("DELETE FROM sessions"):
+            raise OSError("disk I/O error")
+        return self.db.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+async def test_failed_delete_rolls_back(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"))
+    session = await store.create_session(app_name="app", user_id="u", session_id="s")
+    await store.append_event(session, make_event(1))
+    store._db = _FailingDeletes(store._db)
+    try:
+        await store.delete_session(app_name="app", user_id="u", session_id="s")
+        assert False, "delete did not fail"
+    except OSError:
+        pass
+    store._db = store._db.db
+    assert len((await store.get_session(app_name="app", user_id="u", session_id="s")).events) == 1
+    await store.create_session(app_name="app", user_id="u", session_id="t")  # no transaction left open
+    store.close()
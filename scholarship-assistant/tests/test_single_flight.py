@@ -0,0 +1,118 @@
+"""
+test_single_flight.py
+
+Tests for request coalescing and result memoization (tools/single_flight.py) and its use by
+the finder and the search fallback tool.
+Run from the project root: python -m pytest tests/test_single_flight.py
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from google.adk.tools.agent_tool import AgentTool
+
+import tools.finder as finder
+import tools.search_cache as search_cache
+from agents.registry import get_agent
+from tools.single_flight import SingleFlight
+
+PROFILE = {"degree": "PhD", "country": "USA", "funding": "Fully Funded"}
+
+
+async def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight("test", ttl=60, max_entries=8)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"answer": 42}
+
+    results = await asyncio.gather(*(flight.run("key", compute) for _ in range(10)))
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert await flight.run("key", compute) == {"answer": 42}  # memoized
+    assert flight.stats()["misses"] == 1 and flight.stats()["coalesced"] == 9 and flight.stats()["hits"] == 1
+
+
+async def test_failures_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight("test", ttl=60, max_entries=8)
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        raise RuntimeError("search failed")
+
+    results = await asyncio.gather(*(flight.run("key", fail) for _ in range(3)), return_exceptions=True)
+    assert len(calls) == 1 and all(isinstance(r, RuntimeError) for r in results)
+    with pytest.raises(RuntimeError):
+        await flight.run("key", fail)
+    assert len(calls) == 2
+
+
+def test_threads_share_one_computation():
+    flight = SingleFlight("test", ttl=60, max_entries=8)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.run_sync("key", compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 8 and len(calls) == 1
+
+
+def test_ttl_expiry_and_lru_eviction():
+    flight = SingleFlight("test", ttl=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        flight.run_sync(key, lambda: key.upper())
+    assert flight.stats()["evictions"] == 1 and flight.stats()["size"] == 2
+    assert flight.run_sync("a", lambda: "recomputed") == "recomputed"
+
+    short = SingleFlight("test", ttl=0.01, max_entries=2)
+    short.run_sync("a", lambda: 1)
+    time.sleep(0.02)
+    assert short.run_sync("a", lambda: 2) == 2
+
+
+def test_finder_memo_returns_independent_copies():
+    finder.finder_flight.clear()
+    first = finder.agent_scholarship_finder(dict(PROFILE), include_expired=True, query="Fully funded PhD")
+    assert first["scholarships"]
+    first["scholarships"].clear()
+    # Same request with another key order and query spacing: answered from the memo, unaffected by the edit
+    second = finder.agent_scholarship_finder(dict(reversed(PROFILE.items())), include_expired=True,
+                                             query="fully  funded phd")
+    assert second["scholarships"]
+    assert finder.finder_flight.stats()["hits"] == 1
+    # Degree matching is case-sensitive, so differently cased values are separate entries
+    finder.agent_scholarship_finder({**PROFILE, "degree": "phd"}, include_expired=True, query="Fully funded PhD")
+    assert finder.finder_flight.stats()["misses"] == 2
+
+
+async def test_identical_fallback_searches_run_once(monkeypatch):
+    search_cache.search_flight.clear()
+    searches = []
+
+    async def fake_search(self, *, args, tool_context):
+        searches.append(args["request"])
+        await asyncio.sleep(0.05)
+        return "Mars Colony PhD Fellowship | PhD | Fully Funded | mars | 2099-01-31 | https://example.org/mars"
+
+    monkeypatch.setattr(AgentTool, "run_async", fake_search)
+    tool = search_cache.SearchFallbackTool(agent=get_agent("google_search_scholarships"))
+    requests = ["PhD scholarships on Mars", "phd scholarship on mars", "PhD  scholarships on Mars"]
+    results = await asyncio.gather(*(tool.run_async(args={"request": r}, tool_context=None) for r in requests))
+
+    assert len(searches) == 1
+    assert sum(isinstance(r, str) for r in results) == 1  # only the leader's answer is stored and ingested
+    assert all(r["cached"] for r in results if isinstance(r, dict))
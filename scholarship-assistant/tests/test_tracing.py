@@ -0,0 +1,78 @@
+"""
+test_tracing.py
+
+Tests for the span recorder and trace summaries (agents/tracing.py), on the offline model.
+Run from the project root: python -m pytest tests/test_tracing.py
+"""
+
+from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents import document_pipeline
+from agents.offline_model import RuleBasedPolicy, install_offline_model, restore_models
+from agents.orchestrator_agent import orchestrator_agent
+from agents.tracing import TracingPlugin, critical_path, load_traces, turn_summary
+
+SOP_REQUEST = "Please write an SOP for a PhD at Oxford."
+
+
+def span(span_id, parent, start, end, name=None, kind="internal"):
+    return {"trace_id": "t", "span_id": span_id, "parent_span_id": parent, "name": name or span_id, "kind": kind,
+            "start_time_unix_nano": int(start * 1e9), "end_time_unix_nano": int(end * 1e9),
+            "status": "OK", "attributes": {}}
+
+
+def test_critical_path_follows_the_blocking_children():
+    records = [
+        span("run", None, 0, 10, kind="run"),
+        span("plan", "run", 0, 2),
+        span("fast", "run", 2, 4),  # runs alongside "slow", which finishes later
+        span("slow", "run", 2, 9),
+        span("slow_model", "slow", 3, 8),
+    ]
+    path = critical_path(records)
+    assert [name for name, _ in path] == ["plan", "slow", "slow_model", "slow", "run"]
+    assert abs(sum(seconds for _, seconds in path) - 10) < 1e-6
+    assert dict(path)["slow_model"] == 5
+
+
+async def test_turn_spans_nest_pipeline_runs_under_the_tool_that_started_them(tmp_path):
+    document_pipeline.clear_refine_cache()
+    path = str(tmp_path / "traces.jsonl")
+    tracing = TracingPlugin(path)
+    previous = install_offline_model(orchestrator_agent, RuleBasedPolicy())
+    try:
+        app = App(name="trace_test", root_agent=orchestrator_agent, plugins=[tracing],
+                  resumability_config=ResumabilityConfig(is_resumable=True))
+        runner = Runner(app=app, session_service=InMemorySessionService())
+        session = await runner.session_service.create_session(app_name="trace_test", user_id="u")
+        for _ in range(2):
+            message = types.Content(role="user", parts=[types.Part(text=SOP_REQUEST)])
+            [e async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message)]
+    finally:
+        restore_models(previous)
+        tracing.shutdown()
+
+    traces = list(load_traces(path).values())
+    assert len(traces) == 2 and len(tracing.turns) == 2
+    records = traces[0]
+    by_id = {r["span_id"]: r for r in records}
+    roots = [r for r in records if r["parent_span_id"] is None]
+    assert [r["kind"] for r in roots] == ["run"]
+
+    tool = next(r for r in records if r["name"] == "execute_tool write_document")
+    refiner_calls = [r for r in records if r["name"] == "call_llm refiner_agent"]
+    assert len(refiner_calls) == 4
+    for call in refiner_calls:
+        ancestor = by_id[call["parent_span_id"]]
+        while ancestor["span_id"] != tool["span_id"]:
+            ancestor = by_id[ancestor["parent_span_id"]]
+    assert all(r["attributes"]["prompt_tokens"] > 0 for r in records if r["kind"] == "model")
+
+    first, second = tracing.turns
+    assert first == turn_summary(records)
+    assert first["cache_misses"] >= 4 and second.get("cache_hits", 0) >= 4  # the same SOP is refined from cache
+    assert abs(sum(seconds for _, seconds in first["critical_path"]) - first["seconds"]) < 0.05
+    assert "tool:execute_tool write_document" in tracing.stats()
@@ -0,0 +1,367 @@
+# tools/catalog.py
+
+import bisect
+import json
+import os
+import re
+import threading
+from array import array
+from datetime import date, datetime
+from types import MappingProxyType
+from typing import NamedTuple
+
+
+def normalize_funds(value) -> str:
+    """Lowercases a funding string and strips '$' and ',' so preferences compare as plain text."""
+    return str(value).lower().replace("$", "").replace(",", "")
+
+
+_AMOUNT_RE = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*(k\b)?\s*(%)?", re.IGNORECASE)
+_FULLY_FUNDED_RE = re.compile(r"fully[- ]funded|full[- ]funding|full cost|free of charge|100%", re.IGNORECASE)
+
+
+def parse_funds(value) -> tuple:
+    """
+    Parses a free-text funding field into (min_amount, max_amount, fully_funded).
+    Amounts are taken in the currency they are written in; percentages are not amounts.
+    e.g. "Up to $2,000" -> (2000.0, 2000.0, False), "Fully Funded" -> (None, None, True)
+    """
+    text = str(value or "")
+    amounts = []
+    for number, thousands, percent in _AMOUNT_RE.findall(text):
+        if percent:
+            continue
+        amount = float(number.replace(",", ""))
+        amounts.append(amount * 1000 if thousands else amount)
+
+    fully_funded = bool(_FULLY_FUNDED_RE.search(text))
+    if not amounts:
+        return None, None, fully_funded
+    return min(amounts), max(amounts), fully_funded
+
+
+def parse_deadline(value):
+    """Parses an ISO deadline ("2022-06-30") into a date, or None when missing or malformed."""
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+class ScholarshipRecord(NamedTuple):
+    """One scholarship with its matching fields normalized once at load time."""
+    index: int
+    source: MappingProxyType  # read-only view of the original JSON object
+    degrees: str  # kept case-sensitive, the finder matches degrees as given
+    degrees_lower: str
+    location_lower: str
+    funds_key: str
+    min_amount: float  # None when the funds text names no amount
+    max_amount: float
+    fully_funded: bool
+    deadline: date  # None when the dataset has no deadline
+
+
+class ValueIndex:
+    """
+    Inverted index from each distinct field value to the ids of the records holding it.
+    Substring queries only scan the distinct values (a handful of degree combinations,
+    countries or funding strings), never the records, and are memoized per needle.
+    `codes` gives each record's position in `values`; postings may be any int sequences
+    (lists, or memoryviews into a compiled catalog).
+    """
+
+    MAX_CACHED_QUERIES = 1024
+
+    def __init__(self, values: tuple, codes, postings: dict):
+        self.values = values
+        self.codes = codes
+        self.postings = postings
+        self._query_cache = {}
+
+    @classmethod
+    def build(cls, column) -> "ValueIndex":
+        postings = {}
+        value_codes = {}
+        codes = []
+        for record_id, value in enumerate(column):
+            codes.append(value_codes.setdefault(value, len(value_codes)))
+            postings.setdefault(value, []).append(record_id)
+        return cls(tuple(postings), array("i", codes), postings)
+
+    def containing(self, needle: str) -> frozenset:
+        """Ids of all records whose value contains `needle` (same semantics as `needle in value`)."""
+        ids = self._query_cache.get(needle)
+        if ids is None:
+            ids = frozenset().union(*(p for value, p in self.postings.items() if needle in value))
+            if len(self._query_cache) >= self.MAX_CACHED_QUERIES:
+                self._query_cache.clear()
+            self._query_cache[needle] = ids
+        return ids
+
+
+class SortedIndex:
+    """
+    Record ids sorted by a numeric key (an amount, a deadline ordinal), so range queries
+    are a bisection instead of a scan. Records without a key are kept aside in `missing`.
+    """
+
+    MAX_CACHED_QUERIES = 256
+
+    def __init__(self, keys, ids, missing: frozenset):
+        self.keys = keys
+        self.ids = ids
+        self.missing = missing
+        self._query_cache = {}
+
+    @classmethod
+    def build(cls, column, typecode: str) -> "SortedIndex":
+        pairs = sorted((key, record_id) for record_id, key in enumerate(column) if key is not None)
+        return cls(
+            array(typecode, [key for key, _ in pairs]),
+            array("i", [record_id for _, record_id in pairs]),
+            frozenset(record_id for record_id, key in enumerate(column) if key is None),
+        )
+
+    def at_least(self, low) -> frozenset:
+        """Ids of all records whose key is >= `low` (records without a key excluded)."""
+        ids = self._query_cache.get(low)
+        if ids is None:
+            ids = frozenset(self.ids[bisect.bisect_left(self.keys, low):])
+            if len(self._query_cache) >= self.MAX_CACHED_QUERIES:
+                self._query_cache.clear()
+            self._query_cache[low] = ids
+        return ids
+
+    def at_most(self, high) -> frozenset:
+        """Ids of all records whose key is <= `high` (not memoized: callers pass the current time)."""
+        return frozenset(self.ids[:bisect.bisect_right(self.keys, high)])
+
+
+class CatalogColumns:
+    """Columnar NumPy encoding of a catalog's matching fields, for vectorized batch matching."""
+
+    def __init__(self, catalog: "ScholarshipCatalog"):
+        import numpy as np
+
+        # Zero-copy views when the catalog is memory-mapped
+        self.size = len(catalog)
+        self.degree_codes = np.asarray(catalog.degree_index.codes, dtype=np.int32)
+        self.location_codes = np.asarray(catalog.location_index.codes, dtype=np.int32)
+        self.funds_codes = np.asarray(catalog.funds_index.codes, dtype=np.int32)
+        self.deadline_days = np.asarray(catalog.deadline_days, dtype=np.int64)
+
+
+def _build_record(index: int, item: dict) -> ScholarshipRecord:
+    min_amount, max_amount, fully_funded = parse_funds(item.get("funds"))
+    return ScholarshipRecord(
+        index=index,
+        source=MappingProxyType(dict(item)),
+        degrees=str(item.get("degrees") or ""),
+        degrees_lower=str(item.get("degrees") or "").lower(),
+        location_lower=str(item.get("location") or "").lower(),
+        funds_key=normalize_funds(item.get("funds", "")),
+        min_amount=min_amount,
+        max_amount=max_amount,
+        fully_funded=fully_funded,
+        deadline=parse_deadline(item.get("date")),
+    )
+
+
+def _expiry(source) -> float:
+    """A record's `expires_at` (ISO 8601) as Unix time, or None when absent or unreadable."""
+    try:
+        return datetime.fromisoformat(source.get("expires_at")).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def deadline_days(ordinals) -> array:
+    """Deadlines as days since the earliest one; undated records sort after every dated one."""
+    known = [o for o in ordinals if o is not None]
+    base = min(known, default=0)
+    undated = max(known, default=0) - base + 1
+    return array("q", [undated if o is None else o - base for o in ordinals])
+
+
+class ScholarshipCatalog:
+    """
+    Immutable, pre-normalized scholarship dataset.
+    A single instance is shared by every finder call (across asyncio tasks and threads),
+    so nothing here is ever mutated after construction (indexes only memoize query results).
+    The finder works purely on the indexes and columns below, so they can come either from
+    the JSON source or from a memory-mapped compiled catalog (see tools/compiled_catalog.py).
+    """
+
+    def __init__(
+            self,
+            sources,
+            degree_index: ValueIndex,
+            location_index: ValueIndex,
+            funds_index: ValueIndex,
+            amount_index: SortedIndex,
+            deadline_index: SortedIndex,
+            fully_funded_ids: frozenset,
+            deadline_days,
+            path: str = None,
+            signature: tuple = None,
+    ):
+        self.sources = sources  # sequence of record mappings, by id
+        self.degree_index = degree_index
+        self.location_index = location_index
+        self.funds_index = funds_index
+        self.amount_index = amount_index  # keyed by the upper award amount
+        self.deadline_index = deadline_index  # keyed by deadline date ordinal
+        self.fully_funded_ids = fully_funded_ids
+        self.deadline_days = deadline_days
+        self.path = path
+        self.signature = signature
+
+        self.all_ids = frozenset(range(len(sources)))
+        self._columns = None
+        self._text_index = None
+        self._expiry_index = None
+        self._lazy_lock = threading.Lock()
+
+    @classmethod
+    def from_items(cls, items: list, path: str = None, signature: tuple = None) -> "ScholarshipCatalog":
+        records = [_build_record(i, item) for i, item in enumerate(items)]
+        ordinals = [r.deadline.toordinal() if r.deadline else None for r in records]
+        return cls(
+            sources=tuple(r.source for r in records),
+            degree_index=ValueIndex.build(r.degrees for r in records),
+            location_index=ValueIndex.build(r.location_lower for r in records),
+            funds_index=ValueIndex.build(r.funds_key for r in records),
+            amount_index=SortedIndex.build([r.max_amount for r in records], "d"),
+            deadline_index=SortedIndex.build(ordinals, "q"),
+            fully_funded_ids=frozenset(r.index for r in records if r.fully_funded),
+            deadline_days=deadline_days(ordinals),
+            path=path,
+            signature=signature,
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "ScholarshipCatalog":
+        signature = file_signature(path)
+        with open(path, "r") as f:
+            items = json.load(f)
+        return cls.from_items(items, path, signature)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def open_on(self, day: date) -> frozenset:
+        """Ids still open on `day`: deadline on or after it, or no deadline at all."""
+        return self.deadline_index.at_least(day.toordinal()) | self.deadline_index.missing
+
+    def funded_at_least(self, amount: float) -> frozenset:
+        """Ids that may award at least `amount` (upper amount >= it) or are fully funded."""
+        return self.amount_index.at_least(amount) | self.fully_funded_ids
+
+    def expired_at(self, moment: float) -> frozenset:
+        """
+        Ids of provisional records whose `expires_at` is at or before `moment` (Unix time).
+        Records without an expiry never expire, so this is empty for the main dataset.
+        """
+        index = self._build_once(
+            "_expiry_index", lambda: SortedIndex.build([_expiry(self.sources[i]) for i in range(len(self))], "d"))
+        return index.at_most(moment) if index.ids else frozenset()
+
+    def _build_once(self, attribute: str, factory):
+        if getattr(self, attribute) is None:
+            with self._lazy_lock:
+                if getattr(self, attribute) is None:
+                    setattr(self, attribute, factory())
+        return getattr(self, attribute)
+
+    def columns(self) -> CatalogColumns:
+        """Columnar arrays for batch matching, built once on first use."""
+        return self._build_once("_columns", lambda: CatalogColumns(self))
+
+    def text_index(self):
+        """BM25 index over title, degrees and location, built once on first use."""
+        from tools.text_index import TextIndex
+
+        def documents():
+            for i in range(len(self)):
+                source = self.sources[i]
+                yield " ".join(str(source.get(field) or "") for field in ("title", "degrees", "location"))
+
+        return self._build_once("_text_index", lambda: TextIndex(documents()))
+
+    def result(self, index: int, **extra) -> dict:
+        """Returns a fresh, caller-owned copy of a record (plus per-query fields such as `score`)."""
+        return {**self.sources[index], **extra}
+
+
+def file_signature(path: str) -> tuple:
+    """(mtime_ns, size) of a file, used to detect when the dataset changed on disk."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def compiled_path(path: str) -> str:
+    """Location of the compiled artifact for a JSON dataset (same name, `.catalog` extension)."""
+    return os.path.splitext(path)[0] + ".catalog"
+
+
+def _signature(path: str) -> tuple:
+    """Signature of a dataset: its JSON source plus the compiled artifact, if one is present."""
+    try:
+        compiled = file_signature(compiled_path(path))
+    except OSError:
+        compiled = None
+    return file_signature(path), compiled
+
+
+def _load(path: str, signature: tuple) -> ScholarshipCatalog:
+    """Prefers the memory-mapped compiled catalog; falls back to parsing the JSON source."""
+    source, compiled = signature
+    # A compiled artifact older than its source is stale
+    if compiled is not None and compiled[0] >= source[0]:
+        from tools.compiled_catalog import load_compiled
+        try:
+            catalog = load_compiled(compiled_path(path), path=path)
+        except (OSError, ValueError):
+            catalog = None
+        if catalog is not None:
+            catalog.signature = signature
+            return catalog
+    catalog = ScholarshipCatalog.from_file(path)
+    catalog.signature = signature
+    return catalog
+
+
+# --- Process-wide cache (one catalog per dataset path) ---
+_CATALOGS: dict = {}
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_catalog(path: str) -> ScholarshipCatalog:
+    """
+    Returns the shared catalog for `path`, loading it on first use and
+    reloading it only when the file (or its compiled artifact) changes on disk.
+    """
+    path = os.path.abspath(path)
+    signature = _signature(path)
+
+    catalog = _CATALOGS.get(path)
+    if catalog is not None and catalog.signature == signature:
+        return catalog
+
+    with _CATALOG_LOCK:
+        # Another thread may have reloaded while we were waiting for the lock
+        catalog = _CATALOGS.get(path)
+        signature = _signature(path)
+        if catalog is None or catalog.signature != signature:
+            catalog = _load(path, signature)
+            _CATALOGS[path] = catalog
+        return catalog
+
+
+def clear_catalog_cache():
+    """Drops all cached catalogs (mainly for tests)."""
+    with _CATALOG_LOCK:
+        _CATALOGS.clear()
@@ -0,0 +1,206 @@
+# tools/compiled_catalog.py
+#
+# Compact columnar binary form of the scholarship catalog.
+# JSON stays the source format; `python -m tools.compiled_catalog` compiles it into
+# datasets/<name>.catalog, which worker processes memory-map instead of parsing JSON.
+# Every process then shares the same read-only pages through the OS page cache.
+#
+# Layout (native byte order, every section 8-byte aligned):
+#   MAGIC | header offset (u64) | header length (u64) | sections ... | header (JSON)
+# The header holds the string tables (distinct degrees/location/funds values) and,
+# for each named section, its [offset, item count, array typecode].
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from tools.catalog import ScholarshipCatalog, SortedIndex, ValueIndex, compiled_path
+
+MAGIC = b"SCHCAT\x00\x01"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<QQ")
+_DATA_START = len(MAGIC) + _PREFIX.size
+
+DEFAULT_SOURCE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets", "scholarships_clean.json"
+)
+
+
+class _RecordBlobs:
+    """Read-only sequence of records decoded on demand from the memory-mapped JSON blobs."""
+
+    def __init__(self, offsets, blobs):
+        self._offsets = offsets
+        self._blobs = blobs
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> dict:
+        return json.loads(bytes(self._blobs[self._offsets[index]:self._offsets[index + 1]]))
+
+
+def _value_sections(name: str, index: ValueIndex) -> dict:
+    postings = array("i")
+    offsets = array("q", [0])
+    for value in index.values:
+        postings.extend(index.postings[value])
+        offsets.append(len(postings))
+    return {
+        f"{name}_codes": array("i", index.codes),
+        f"{name}_postings": postings,
+        f"{name}_posting_offsets": offsets,
+    }
+
+
+def _sorted_sections(name: str, index: SortedIndex, typecode: str) -> dict:
+    return {
+        f"{name}_keys": array(typecode, index.keys),
+        f"{name}_ids": array("i", index.ids),
+        f"{name}_missing": array("i", sorted(index.missing)),
+    }
+
+
+def compile_catalog(source_path: str = DEFAULT_SOURCE, target_path: str = None) -> str:
+    """Compiles a JSON scholarship dataset into the binary catalog format. Returns the output path."""
+    target_path = target_path or compiled_path(source_path)
+    catalog = ScholarshipCatalog.from_file(source_path)
+
+    blobs = bytearray()
+    record_offsets = array("q", [0])
+    for source in catalog.sources:
+        blobs += json.dumps(dict(source), ensure_ascii=False).encode("utf-8")
+        record_offsets.append(len(blobs))
+
+    sections = {
+        "record_offsets": record_offsets,
+        "records": array("B", blobs),
+        **_value_sections("degrees", catalog.degree_index),
+        **_value_sections("location", catalog.location_index),
+        **_value_sections("funds", catalog.funds_index),
+        **_sorted_sections("amount", catalog.amount_index, "d"),
+        **_sorted_sections("deadline", catalog.deadline_index, "q"),
+        "fully_funded": array("i", sorted(catalog.fully_funded_ids)),
+        "deadline_days": array("q", catalog.deadline_days),
+    }
+    header = {
+        "version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "count": len(catalog),
+        "values": {
+            "degrees": list(catalog.degree_index.values),
+            "location": list(catalog.location_index.values),
+            "funds": list(catalog.funds_index.values),
+        },
+        "sections": {},
+    }
+
+    # Write to a temp file and rename, so processes mapping the old artifact keep a valid file
+    directory = os.path.dirname(os.path.abspath(target_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + _PREFIX.pack(0, 0))
+            offset = _DATA_START
+            for name, column in sections.items():
+                padding = -offset % 8
+                f.write(b"\0" * padding)
+                offset += padding
+                header["sections"][name] = [offset, len(column), column.typecode]
+                f.write(column.tobytes())
+                offset += len(column) * column.itemsize
+
+            header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+            f.write(header_bytes)
+            f.seek(len(MAGIC))
+            f.write(_PREFIX.pack(offset, len(header_bytes)))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return target_path
+
+
+def load_compiled(catalog_path: str, path: str = None) -> ScholarshipCatalog:
+    """
+    Memory-maps a compiled catalog. Columns and indexes are zero-copy views into the mapping;
+    only the small string tables are materialized. Raises ValueError for foreign/old formats
+    and for truncated or corrupt files.
+    """
+    with open(catalog_path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+
+    if len(view) < _DATA_START or bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"Not a compiled scholarship catalog: {catalog_path}")
+    header_offset, header_length = _PREFIX.unpack_from(view, len(MAGIC))
+    if header_offset + header_length > len(view):
+        raise ValueError(f"Truncated compiled catalog: {catalog_path}")
+    header = json.loads(bytes(view[header_offset:header_offset + header_length]))
+    if not isinstance(header, dict) or header.get("version") != FORMAT_VERSION \
+            or header.get("byteorder") != sys.byteorder:
+        raise ValueError(f"Incompatible compiled catalog format: {catalog_path}")
+
+    def entry(table: str, name: str):
+        try:
+            return header[table][name]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Compiled catalog {catalog_path} has no {table} entry {name!r}") from e
+
+    def section(name: str):
+        try:
+            offset, count, typecode = entry("sections", name)
+            size = count * array(typecode).itemsize
+            truncated = offset < _DATA_START or size < 0 or offset + size > header_offset
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Malformed section {name!r} in compiled catalog {catalog_path}") from e
+        if truncated:
+            raise ValueError(f"Truncated compiled catalog: {catalog_path}")
+        return view[offset:offset + size].cast(typecode)
+
+    def value_index(name: str) -> ValueIndex:
+        values = tuple(entry("values", name))
+        postings = section(f"{name}_postings")
+        offsets = section(f"{name}_posting_offsets")
+        if len(offsets) != len(values) + 1:
+            raise ValueError(f"Malformed {name} index in compiled catalog {catalog_path}")
+        return ValueIndex(
+            values,
+            section(f"{name}_codes"),
+            {value: postings[offsets[i]:offsets[i + 1]] for i, value in enumerate(values)},
+        )
+
+    def sorted_index(name: str) -> SortedIndex:
+        return SortedIndex(section(f"{name}_keys"), section(f"{name}_ids"), frozenset(section(f"{name}_missing")))
+
+    return ScholarshipCatalog(
+        sources=_RecordBlobs(section("record_offsets"), section("records")),
+        degree_index=value_index("degrees"),
+        location_index=value_index("location"),
+        funds_index=value_index("funds"),
+        amount_index=sorted_index("amount"),
+        deadline_index=sorted_index("deadline"),
+        fully_funded_ids=frozenset(section("fully_funded")),
+        deadline_days=section("deadline_days"),
+        path=path or catalog_path,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a scholarship JSON dataset into a memory-mappable catalog.")
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE, help="JSON dataset to compile")
+    parser.add_argument("-o", "--output", help="output path (default: <source>.catalog)")
+    args = parser.parse_args()
+
+    target = compile_catalog(args.source, args.output)
+    print(f"✅ Compiled {args.source} -> {target} ({os.path.getsize(target):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
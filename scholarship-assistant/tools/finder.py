@@ -1,62 +1,315 @@
 # tools/finder.py
 
-import json
+import copy
+import heapq
 import os
-from google.adk.tools import AgentTool  # though its not used here but needed
+import time
+from datetime import date
+from tools.catalog import file_signature, get_catalog, normalize_funds, parse_deadline
+from tools.single_flight import SingleFlight
+from tools.text_index import parse_query
+
 # these path can be chnage depend on dataset location
 DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets",
                             "scholarships_clean.json")
+# Scholarships learned from the Google search fallback (see tools/search_cache.py)
+PROVISIONAL_DATASET_PATH = os.path.join(os.path.dirname(DATASET_PATH), "provisional_scholarships.json")
+
+
+# Upper bound on profile x scholarship cells scored in one vectorized pass
+BATCH_CELLS = 4_000_000
+SORT_ORDERS = ("score", "deadline")
+
+# Identical finder calls from many sessions share one search (tools/single_flight.py).
+# Keys include both datasets' signatures and today's date, so a reloaded dataset or newly
+# ingested search results are never hidden behind a cached answer.
+FINDER_CACHE_TTL = 300  # seconds
+FINDER_CACHE_SIZE = 1024
+finder_flight = SingleFlight("finder", ttl=FINDER_CACHE_TTL, max_entries=FINDER_CACHE_SIZE)
+
+
+def _profile_filters(profile: dict) -> tuple:
+    """
+    Normalized (degree, country, funding) needles for a profile.
+    None means the preference is the "any" wildcard.
+    """
+    degree = profile.get("degree")
+    country = profile.get("country")
+    funding = normalize_funds(profile.get("funding", ""))
+    return (
+        None if str(degree).lower() == "any" else str(degree or ""),
+        None if str(country).lower() == "any" else str(country or "").lower(),
+        None if funding == "any" else funding,
+    )
+
+
+def _range_filter(catalog, min_amount: float, deadline_after, include_expired: bool) -> frozenset:
+    """
+    Ids passing the amount and deadline filters, resolved by bisection on the catalog's
+    sorted indexes. Scholarships whose deadline has passed are dropped unless
+    `include_expired` is set; an explicit `deadline_after` always applies. Provisional
+    entries past their `expires_at` are always dropped, even before the file is rewritten.
+    """
+    allowed = catalog.all_ids
+    stale = catalog.expired_at(time.time())
+    if stale:
+        allowed = allowed - stale
+    if deadline_after is not None:
+        cutoff = parse_deadline(deadline_after)
+        if cutoff is None:
+            raise ValueError(f"Invalid deadline_after date: {deadline_after!r} (expected YYYY-MM-DD)")
+        allowed = allowed & catalog.open_on(cutoff)
+    elif not include_expired:
+        allowed = allowed & catalog.open_on(date.today())
+    if min_amount:
+        allowed = allowed & catalog.funded_at_least(float(min_amount))
+    return allowed
+
+
+def _check_sort_by(sort_by: str):
+    if sort_by not in SORT_ORDERS:
+        raise ValueError(f"Invalid sort_by: {sort_by!r} (expected one of {', '.join(SORT_ORDERS)})")
 
 
-def find_scholarships(profile: dict, dataset_path: str, top_k: int = 5):
-    """Core logic to filter scholarships based on degree, country, and funding preference."""
+def find_scholarships(
+        profile: dict,
+        dataset_path: str,
+        top_k: int = 5,
+        min_amount: float = 0,
+        deadline_after: str = None,
+        include_expired: bool = False,
+        sort_by: str = "score",
+        query: str = None,
+):
+    """
+    Core logic to filter scholarships based on degree, country, and funding preference,
+    optionally restricted to a minimum award amount and to deadlines still open.
+    `sort_by="deadline"` returns the soonest deadlines first instead of the best score.
+    A free-text `query` fills in fields missing from the profile and ranks ties by BM25
+    relevance. A place the query names but the catalog does not know ("in Japan") is kept
+    as the country filter, so it matches nothing rather than every country, and countries
+    in a negated clause ("not in the USA") are left out. When the
+    filters match nothing, `scholarships` stays empty and the closest text matches are
+    listed separately under `related`; they are not matches.
+    """
     try:
-        # Load dataset from the specified path (which can be local or an absolute path)
-        with open(dataset_path, "r") as f:
-            scholarships = json.load(f)
+        # Shared, preloaded catalog; only re-parsed when the file changes on disk
+        catalog = get_catalog(dataset_path)
     except Exception as e:
         return {"status": "error", "error_message": f"Failed to load dataset: {str(e)}"}
 
-    eligible = []
+    # Free-text request: fill in fields the profile leaves open, keep the words for BM25
+    terms = None
+    excluded = ()
+    if query:
+        parsed = parse_query(query, catalog.location_index.values)
+        terms = parsed["terms"]
+        profile = {
+            **{key: parsed[key] for key in ("degree", "country", "funding") if key in parsed},
+            **({"country": parsed["unresolved_place"]} if "unresolved_place" in parsed else {}),
+            **{key: value for key, value in profile.items() if value not in (None, "")},
+        }
+        min_amount = min_amount or parsed.get("min_amount", 0)
+        excluded = parsed.get("excluded_countries", ())
 
-    # Clean up funding preference for comparison
-    funding_pref = str(profile.get("funding", "")).lower().replace("$", "").replace(",", "")
+    try:
+        _check_sort_by(sort_by)
+        allowed = _range_filter(catalog, min_amount, deadline_after, include_expired)
+    except ValueError as e:
+        return {"status": "error", "error_message": str(e)}
 
-    for s in scholarships:
-        # Degree check
-        degree_ok = (
-                str(profile.get("degree", "")).lower() == "any"
-                or profile.get("degree") in s.get("degrees", "")
-        )
+    for country in excluded:
+        allowed = allowed - catalog.location_index.containing(country)
 
-        # Country check
-        country_ok = (
-                str(profile.get("country", "")).lower() == "any"
-                or profile.get("country", "").lower() in s.get("location", "").lower()
-        )
+    degree_pref, country_pref, funding_pref = _profile_filters(profile)
 
-        if degree_ok and country_ok:
-            score = 0
+    # Degree and country checks are set lookups on the catalog's inverted indexes
+    eligible = allowed
+    if degree_pref is not None:
+        eligible = eligible & catalog.degree_index.containing(degree_pref)
+    if country_pref is not None:
+        eligible = eligible & catalog.location_index.containing(country_pref)
 
-            scholarship_funds_str = str(s.get("funds", "")).lower().replace("$", "").replace(",", "")
+    if not eligible:
+        response = {"status": "success", "scholarships": [], "message": "No matching scholarships found"}
+        if terms:
+            # Literal filters missed: list the closest text matches apart, so callers still
+            # see an empty result and fall back to the provisional data or a web search
+            nearby = catalog.text_index().scores(terms, allowed)
+            if nearby:
+                top = heapq.nsmallest(top_k, nearby, key=lambda i: (-nearby[i], i))
+                response["related"] = [catalog.result(i, score=0, relevance=round(nearby[i], 4)) for i in top]
+                response["message"] = ("No scholarships match the degree/country filters; `related` lists the "
+                                       "closest text matches, which do not meet them")
+        return response
 
-            # Simple scoring based on funding match
-            if funding_pref == "any" or funding_pref in scholarship_funds_str:
-                score += 1
+    relevance = catalog.text_index().scores(terms, eligible) if terms else {}
 
-            s["score"] = score
-            eligible.append(s)
+    # Simple scoring based on funding match
+    if funding_pref is None:
+        funded = eligible
+    else:
+        funded = eligible & catalog.funds_index.containing(funding_pref)
+
+    if sort_by == "deadline":
+        # Soonest deadline first (undated last), then funding matches, then relevance, then dataset order
+        days = catalog.deadline_days
+        top = heapq.nsmallest(top_k, eligible, key=lambda i: (days[i], i not in funded, -relevance.get(i, 0.0), i))
+        ranked = [(1 if index in funded else 0, index) for index in top]
+    elif relevance:
+        # Funding matches first, then BM25 relevance instead of plain file order
+        top = heapq.nsmallest(top_k, eligible, key=lambda i: (i not in funded, -relevance.get(i, 0.0), i))
+        ranked = [(1 if index in funded else 0, index) for index in top]
+    else:
+        # Bounded-heap top-k: funding matches first, dataset order within each score
+        ranked = [(1, index) for index in heapq.nsmallest(top_k, funded)]
+        if len(ranked) < top_k:
+            ranked += [(0, index) for index in heapq.nsmallest(top_k - len(ranked), eligible - funded)]
+
+    # Scores live on per-query copies, never on the shared catalog records
+    if terms:
+        results = [catalog.result(i, score=score, relevance=round(relevance.get(i, 0.0), 4)) for score, i in ranked]
+    else:
+        results = [catalog.result(index, score=score) for score, index in ranked]
+    return {"status": "success", "scholarships": results}
 
-    if not eligible:
-        return {"status": "success", "scholarships": [], "message": "No matching scholarships found"}
 
-    return {
-        "status": "success",
-        "scholarships": sorted(eligible, key=lambda x: x["score"], reverse=True)[:top_k]
-    }
+def _value_matrix(index, needles: list):
+    """Boolean matrix (profiles x distinct values) of which values each needle matches."""
+    import numpy as np
 
+    masks = {}
+    matrix = np.empty((len(needles), len(index.values)), dtype=bool)
+    for row, needle in enumerate(needles):
+        if needle not in masks:
+            if needle is None:
+                masks[needle] = np.ones(len(index.values), dtype=bool)
+            else:
+                masks[needle] = np.fromiter((needle in v for v in index.values), dtype=bool, count=len(index.values))
+        matrix[row] = masks[needle]
+    return matrix
 
-def agent_scholarship_finder(profile: dict, top_k: int = 5) -> dict:
-    """Wrapper function to find scholarships using the local dataset path."""
+
+def find_scholarships_batch(
+        profiles: list,
+        top_k: int = 5,
+        dataset_path: str = DATASET_PATH,
+        min_amount: float = 0,
+        deadline_after: str = None,
+        include_expired: bool = False,
+        sort_by: str = "score",
+) -> list:
+    """
+    Matches many profiles at once (e.g. nightly re-matching of saved profiles).
+    All profile x scholarship pairs are scored in vectorized NumPy passes over the catalog's
+    columnar encoding. Returns one result per profile, identical to `find_scholarships`.
+    """
+    import numpy as np
+
+    try:
+        catalog = get_catalog(dataset_path)
+    except Exception as e:
+        return [{"status": "error", "error_message": f"Failed to load dataset: {str(e)}"} for _ in profiles]
+
+    try:
+        _check_sort_by(sort_by)
+        allowed = _range_filter(catalog, min_amount, deadline_after, include_expired)
+    except ValueError as e:
+        return [{"status": "error", "error_message": str(e)} for _ in profiles]
+
+    columns = catalog.columns()
+    n = columns.size
+    allowed_mask = np.zeros(n, dtype=bool)
+    allowed_mask[list(allowed)] = True
+    filters = [_profile_filters(profile) for profile in profiles]
+    degree_ok = _value_matrix(catalog.degree_index, [f[0] for f in filters])
+    location_ok = _value_matrix(catalog.location_index, [f[1] for f in filters])
+    funds_ok = _value_matrix(catalog.funds_index, [f[2] for f in filters])
+
+    k = max(0, min(top_k, n))
+    ids = np.arange(n, dtype=np.int64)
+    # Rank key per cell is (days * 2 + unfunded) * n + id, so one sort orders by deadline
+    # (only for sort_by="deadline"), then funding match, then dataset order
+    days = columns.deadline_days if sort_by == "deadline" else np.zeros(n, dtype=np.int64)
+    funded_key = days * 2 * n + ids
+    ineligible_key = int(days.max(initial=0) + 1) * 2 * n
+    chunk = max(1, BATCH_CELLS // max(1, n))
+    results = []
+
+    for start in range(0, len(filters), chunk):
+        rows = slice(start, start + chunk)
+        eligible = degree_ok[rows][:, columns.degree_codes] & location_ok[rows][:, columns.location_codes]
+        eligible &= allowed_mask
+        funded = eligible & funds_ok[rows][:, columns.funds_codes]
+
+        keys = np.where(funded, funded_key, np.where(eligible, funded_key + n, ineligible_key))
+        if 0 < k < n:
+            keys = np.partition(keys, k - 1, axis=1)[:, :k]
+        keys = np.sort(keys, axis=1)[:, :k]
+
+        for row_keys, any_eligible in zip(keys.tolist(), eligible.any(axis=1).tolist()):
+            if not any_eligible:
+                results.append({"status": "success", "scholarships": [], "message": "No matching scholarships found"})
+                continue
+            results.append({
+                "status": "success",
+                "scholarships": [
+                    catalog.result(key % n, score=1 - (key // n) % 2)
+                    for key in row_keys if key < ineligible_key
+                ]
+            })
+
+    return results
+
+
+def agent_scholarship_finder(
+        profile: dict,
+        top_k: int = 5,
+        min_amount: float = 0,
+        include_expired: bool = False,
+        sort_by: str = "score",
+        query: str = "",
+) -> dict:
+    """
+    Wrapper function to find scholarships using the local dataset path.
+    profile: {"degree": ..., "country": ..., "funding": ...}; use "any" for no preference.
+    query: the user's request in their own words (e.g. "fully funded Management PhD in the UK");
+        used to fill in missing profile fields and to rank results by relevance.
+    min_amount: only scholarships that may award at least this amount (or are fully funded).
+    include_expired: also return scholarships whose deadline has already passed.
+    sort_by: "score" (best funding match first) or "deadline" (soonest deadline first).
+    """
     # Note: If running locally outside Kaggle, DATASET_PATH needs to be correct.
-    return find_scholarships(profile=profile, dataset_path=DATASET_PATH, top_k=top_k)
\ No newline at end of file
+    options = dict(top_k=top_k, min_amount=min_amount, include_expired=include_expired, sort_by=sort_by, query=query)
+    result = finder_flight.run_sync(_finder_key(profile, options), lambda: _find_with_fallback(profile, options))
+    return copy.deepcopy(result)  # callers may edit their copy; the cached one is shared
+
+
+def _dataset_version(path: str):
+    try:
+        return file_signature(path)
+    except OSError:
+        return None
+
+
+def _finder_key(profile: dict, options: dict) -> tuple:
+    """
+    Hashable form of the arguments. Profile values are kept verbatim (degree matching is
+    case-sensitive); only profile key order and the query's case and spacing are normalized.
+    """
+    preferences = tuple(sorted((str(k), repr(v)) for k, v in (profile or {}).items()))
+    return (preferences, int(options["top_k"]), float(options["min_amount"] or 0), bool(options["include_expired"]),
+            options["sort_by"], " ".join(str(options["query"] or "").lower().split()), date.today(),
+            _dataset_version(DATASET_PATH), _dataset_version(PROVISIONAL_DATASET_PATH))
+
+
+def _find_with_fallback(profile: dict, options: dict) -> dict:
+    result = find_scholarships(profile=profile, dataset_path=DATASET_PATH, **options)
+
+    # Nothing local: try results previously learned from the web search fallback
+    if result.get("status") == "success" and not result["scholarships"] and os.path.exists(PROVISIONAL_DATASET_PATH):
+        provisional = find_scholarships(profile=profile, dataset_path=PROVISIONAL_DATASET_PATH, **options)
+        if provisional.get("status") == "success" and provisional["scholarships"]:
+            provisional["message"] = "Provisional results from an earlier web search (verify details before applying)"
+            return provisional
+    return result
\ No newline at end of file
@@ -1,40 +1,66 @@
 # tools/hitl_reviewer.py
+#
+# Human-in-the-Loop review through the durable review queue (tools/review_queue.py).
+# Draft text lives only in the queue's content-addressed store; session state keeps
+# {document_type, target} per draft id. Submitting does not pause the invocation:
+# the decision is delivered to the session later by runner/review_dispatch.py.
 
 from google.adk.tools import ToolContext
 
+from tools.review_queue import get_review_queue
+
+DRAFT_PREFIX = "draft:"
+
+
+def save_draft(tool_context: ToolContext, document_type: str, target: str, text: str) -> str:
+    """
+    Stores a generated draft and returns its id (its content hash), so the exact text can be
+    submitted for review by id instead of being copied through the model.
+    """
+    draft_id = get_review_queue().put_draft(text)
+    tool_context.state[f"{DRAFT_PREFIX}{draft_id}"] = {"document_type": document_type, "target": target}
+    return draft_id
+
+
+def load_draft(tool_context: ToolContext, draft_id: str):
+    """{document_type, target, text} of a draft saved in this session, or None."""
+    draft = tool_context.state.get(f"{DRAFT_PREFIX}{draft_id}")
+    text = get_review_queue().draft_text(draft_id) if draft is not None else None
+    if text is None:
+        return None
+    return {**draft, "text": text}
+
 
 def submit_draft_for_review(
-        draft_text: str, document_type: str, tool_context: ToolContext
+        document_type: str, tool_context: ToolContext, draft_text: str = "", draft_id: str = ""
 ) -> dict:
     """
     Submits a draft (SOP or CV) for human review.
-    This tool PAUSES execution until the human approves or rejects (Human-in-the-Loop).
+    Pass the `draft_id` returned by write_document/revise_document/generate_application_documents
+    (preferred: the stored text is submitted exactly as the user saw it), or the full `draft_text`.
+    This tool does NOT wait: the draft joins the review queue and the reviewer's decision is
+    delivered to this conversation later. Submit several drafts one after another without waiting.
     """
-
-    # SCENARIO 1: First call - PAUSE for Human Review
-    if not tool_context.tool_confirmation:
-        # Request confirmation (PAUSE)
-        tool_context.request_confirmation(
-            hint=f"Review {document_type} Draft",
-            payload={
-                "document_type": document_type,
-                "draft_text": draft_text
-            },
-        )
-
-        return {
-            "status": "pending_review",
-            "message": f"Draft submitted. Waiting for human feedback on: {document_type}"
-        }
-
-    # SCENARIO 2: Resuming after Human Decision
-    if tool_context.tool_confirmation.confirmed:
-        return {
-            "status": "approved",
-            "message": "The human APPROVED the draft. You can now finalize formatting and output the result."
-        }
+    target = ""
+    if draft_id:
+        draft = load_draft(tool_context, draft_id)
+        if draft is None:
+            return {"status": "error", "error_message": f"Unknown draft_id '{draft_id}'."}
+        target = draft["target"]
+    elif draft_text:
+        draft_id = save_draft(tool_context, document_type, "", draft_text)
     else:
-        return {
-            "status": "rejected",
-            "message": "The human REJECTED the draft. Please ask the user for specific feedback on what to change."
-        }
\ No newline at end of file
+        return {"status": "error", "error_message": "Provide a draft_id or the draft_text to review."}
+
+    invocation_context = tool_context._invocation_context
+    review = get_review_queue().submit(
+        app_name=invocation_context.app_name, user_id=tool_context.user_id,
+        session_id=invocation_context.session.id, document_type=document_type, draft_id=draft_id, target=target,
+    )
+    return {
+        "status": "queued",
+        "review_id": review["review_id"],
+        "draft_id": draft_id,
+        "message": f"{document_type} draft queued for human review (#{review['review_id']}). "
+                   "The decision will be delivered to this conversation; tell the user and continue."
+    }
\ No newline at end of file
@@ -0,0 +1,229 @@
+# tools/intent_router.py
+#
+# Deterministic fast path in front of the orchestrator's LLM.
+# Common phrasings (stating profile facts, asking for scholarships) are recognised
+# with rules: the matching tools are called directly and the reply is rendered from
+# the scholarship agent's template, so those turns need no model call at all.
+# Everything else (documents, follow-ups, questions, a search with words the parser did
+# not understand, a place or degree the catalog does not know, a finder miss that needs
+# the web search fallback) goes to the orchestrator's LLM as before. Profile facts in such
+# a message are still saved first. Searches use the saved profile for the fields the
+# request leaves open.
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import NamedTuple
+
+from google.genai import types
+
+from tools.catalog import get_catalog
+from tools.finder import DATASET_PATH, agent_scholarship_finder
+from tools.profile_checker import profile_view, save_userinfo
+from tools.text_index import parse_query, tokenize
+
+FAST_PATH_ENABLED = os.environ.get("SCHOLARSHIP_FAST_PATH", "1") != "0"
+MAX_TOP_K = 20
+
+INTENT_PROFILE = "save_profile"
+INTENT_FIND = "find_scholarships"
+INTENT_DOCUMENT = "document"
+INTENT_LLM = "llm"  # the rest of the message needs the orchestrator's LLM
+
+_NAME_RE = re.compile(r"\b(?i:my name is|call me) ([A-Z][\w'-]*(?: [A-Z][\w'-]*)*)")
+_COUNTRY_RE = re.compile(r"\b(?i:i am from|i'm from|i come from) ([A-Z][\w-]*(?: [A-Z][\w-]*)*)")
+_BACKGROUND_RE = re.compile(
+    r"\bI have an? ((?:[\w.]+ ){0,3}?(?:MBA|BBA|B\.?Sc|M\.?Sc|B\.?A|M\.?A|PhD|degree|diploma|bachelor'?s?|master'?s?)"
+    r"\b[\w. ]*?)(?: and |[.,]|$)",
+    re.IGNORECASE,
+)
+_TARGET_RE = re.compile(r"\bapply for an? ([\w. ]+?)(?:[.,]|$)", re.IGNORECASE)
+_PROFILE_PATTERNS = (("name", _NAME_RE), ("country", _COUNTRY_RE),
+                     ("background", _BACKGROUND_RE), ("target_degree", _TARGET_RE))
+
+_SCHOLARSHIP_RE = re.compile(r"\b(scholarships?|fellowships?|grants?|bursar(?:y|ies)|funding opportunit(?:y|ies))\b",
+                             re.IGNORECASE)
+_DOCUMENT_RE = re.compile(r"\b(sop|statement of purpose|cv|resume|curriculum vitae|cover letter|essay)\b",
+                          re.IGNORECASE)
+# References to earlier turns or open questions need the conversation, i.e. the LLM
+_FOLLOW_UP_RE = re.compile(
+    r"\b(those|them|these|that one|the (?:first|second|third|last|above|previous)|previous|earlier|"
+    r"more|another|other|else|instead|again|why|how|which|compare|difference|eligib\w*|requirements?)\b",
+    re.IGNORECASE,
+)
+_TOP_K_RE = re.compile(r"\b(?:top\s+)?(\d{1,2})\s+(?:[\w-]+\s+){0,5}?(?:scholarships?|options|results)\b",
+                       re.IGNORECASE)
+_DEADLINE_RE = re.compile(r"\b(deadlines?|closing soon|due soon|soonest|upcoming)\b", re.IGNORECASE)
+# Words left around profile facts that ask for nothing ("Hi, my name is Imon. Thanks!")
+_CHATTER = frozenset("hi hello hey thanks thank you ok okay also so well yes im".split())
+
+_STATS = Counter()
+_STATS_LOCK = threading.Lock()
+
+
+class Intent(NamedTuple):
+    name: str
+    slots: dict
+
+
+def profile_facts(text: str) -> dict:
+    """Profile fields stated in the message ("My name is ...", "I am from ...", "I have an MBA")."""
+    facts = {}
+    for key, pattern in _PROFILE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            facts[key] = match.group(1).strip()
+    return facts
+
+
+def without_facts(text: str) -> str:
+    """The message with its recognised profile fact phrases removed."""
+    for _, pattern in _PROFILE_PATTERNS:
+        text = pattern.sub(" ", text, count=1)
+    return text
+
+
+def _locations() -> tuple:
+    try:
+        return get_catalog(DATASET_PATH).location_index.values
+    except (OSError, ValueError):
+        return ()
+
+
+def classify(text: str) -> list:
+    """
+    Intents of a message, in the order they should run, or [] when the message needs the LLM.
+    Find slots are the finder's arguments: top_k, min_amount, sort_by and the free-text query.
+    A search is only routed when it names at least a degree, country, funding type or amount,
+    every other word of it was understood, and it names no place or degree that the catalog
+    cannot resolve. When the profile facts are not the whole message, the facts are followed
+    by a document or INTENT_LLM intent, so they are saved before the LLM takes the rest.
+    """
+    text = str(text or "").strip()
+    if not text:
+        return []
+    facts = profile_facts(text)
+    rest = without_facts(text)
+    saved = [Intent(INTENT_PROFILE, facts)] if facts else []
+    if _DOCUMENT_RE.search(rest):
+        return saved + [Intent(INTENT_DOCUMENT, {"document_type": "CV" if re.search(r"\b(cv|resume|curriculum)", rest, re.I)
+                                                 else "SOP"})]
+    handoff = saved + [Intent(INTENT_LLM, {})] if saved else []
+    if _FOLLOW_UP_RE.search(rest):
+        return handoff
+
+    if not _SCHOLARSHIP_RE.search(rest):
+        # Anything besides the facts and small talk is a request the rules do not know
+        leftover = [token for token in tokenize(rest) if token not in _CHATTER]
+        return handoff if leftover or not saved else saved
+
+    fields = parse_query(rest, _locations())
+    if not {"degree", "country", "funding", "min_amount"} & fields.keys():
+        return handoff  # too vague to filter on: the LLM asks or searches the web
+    if {"unresolved_place", "unresolved_degree", "unparsed"} & fields.keys():
+        return handoff  # not fully understood, or not in the local catalog: the LLM takes it
+    slots = {"query": " ".join(rest.split()).strip(" .,;"), "sort_by": "deadline" if _DEADLINE_RE.search(rest) else "score"}
+    match = _TOP_K_RE.search(rest)
+    if match:
+        slots["top_k"] = max(1, min(MAX_TOP_K, int(match.group(1))))
+    if fields.get("min_amount"):
+        slots["min_amount"] = fields["min_amount"]
+    return saved + [Intent(INTENT_FIND, slots)]
+
+
+def format_scholarships(scholarships: list) -> str:
+    """The scholarship agent's output template, one block per scholarship."""
+    lines = []
+    for s in scholarships:
+        lines += [
+            f"**{s.get('title') or 'Not specified'}**",
+            f"* **Degrees**: {s.get('degrees') or 'Not specified'}",
+            f"* **Funds**: {s.get('funds') or 'Not specified'}",
+            f"* **Country**: {s.get('location') or 'Not specified'}",
+            f"* **Deadline**: {s.get('date') or 'Not specified'}",
+            "",
+        ]
+    return "\n".join(lines).rstrip()
+
+
+def saved_preferences(profile: dict, query: str) -> dict:
+    """
+    Finder profile from the saved fields the request leaves open, as the LLM path would
+    retrieve them: the target degree and any saved funding or preferred country. The saved
+    `country` is where the user is from, not where they want to study, so it is not used.
+    """
+    fields = parse_query(query, _locations())
+    preferences = {}
+    degree = profile.get("degree") or profile.get("target_degree")
+    if degree and "degree" not in fields:
+        degree = parse_query(str(degree)).get("degree")
+        if degree:
+            preferences["degree"] = degree
+    country = profile.get("preferred_country") or profile.get("target_country")
+    if country and "country" not in fields:
+        preferences["country"] = country
+    if profile.get("funding") and "funding" not in fields:
+        preferences["funding"] = profile["funding"]
+    return preferences
+
+
+def _match_reason(query: str, preferences: dict) -> str:
+    fields = {**preferences, **parse_query(query, _locations())}
+    wanted = [fields[key] for key in ("funding", "degree") if key in fields]
+    where = f" in {fields['country']}" if "country" in fields else ""
+    if not wanted and not where:
+        return "These scholarships are the closest matches to your request."
+    return f"These scholarships match your request for {' '.join(wanted) or 'any'} scholarships{where}."
+
+
+def record(outcome: str):
+    with _STATS_LOCK:
+        _STATS[outcome] += 1
+
+
+def router_stats() -> dict:
+    """How many messages the fast path answered, and why the others went to the LLM."""
+    with _STATS_LOCK:
+        return dict(_STATS)
+
+
+def fast_path_before_agent(callback_context):
+    """
+    before_agent_callback for the orchestrator: answers recognised intents without the LLM.
+    Returns the reply Content, or None to let the LLM handle the turn (state saved so far is kept).
+    """
+    if not FAST_PATH_ENABLED:
+        return None
+    content = callback_context.user_content
+    text = " ".join(p.text for p in (content.parts if content else None) or [] if p.text)
+    intents = classify(text)
+    if not intents:
+        record("llm")
+        return None
+
+    replies = []
+    for intent in intents:
+        if intent.name in (INTENT_DOCUMENT, INTENT_LLM):
+            record("llm")  # facts before it are saved; the LLM answers the rest of the message
+            return None
+        if intent.name == INTENT_PROFILE:
+            save_userinfo(callback_context, fields=intent.slots)
+            replies.append(f"Thanks! I've saved your {', '.join(f.replace('_', ' ') for f in intent.slots)}.")
+        elif intent.name == INTENT_FIND:
+            profile = profile_view(callback_context)
+            preferences = saved_preferences(profile, intent.slots["query"])
+            result = agent_scholarship_finder(profile=dict(preferences), **intent.slots)
+            if result.get("status") != "success" or not result["scholarships"] or "related" in result:
+                record("llm_finder_miss")  # the LLM runs the web search fallback
+                return None
+            replies.append(format_scholarships(result["scholarships"]))
+            if result.get("message"):
+                replies.append(f"_{result['message']}_")
+            replies.append(_match_reason(intent.slots["query"], preferences))
+            missing = [field for field in ("name", "country") if field not in profile]
+            if missing:
+                replies.append(f"To personalise these recommendations, could you tell me your {' and '.join(missing)}?")
+
+    record("fast_path")
+    return types.Content(role="model", parts=[types.Part(text="\n\n".join(replies))])
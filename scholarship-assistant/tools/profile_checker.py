@@ -1,39 +1,119 @@
 # tools/profile_checker.py
+#
+# User profile stored in session state under the `user:` prefix.
+# Every save also writes a fresh `user:_profile_version` token, and the clean
+# {field: value} view of the profile is cached per (app, user, version). Retrieval is
+# then a dict lookup instead of merging and scanning the whole state, and saves
+# update the cached view incrementally. Long values (stored drafts) are truncated in
+# the default summary so they are not echoed back into the model context every turn.
+
+import threading
+import uuid
+from collections import OrderedDict
 
 from google.adk.tools import ToolContext
 
+from agents.tracing import annotate
+
+USER_PREFIX = "user:"
+PROFILE_VERSION_KEY = "user:_profile_version"
+PROFILE_VALUE_CHARS = 300  # summary cap per value; request a field by name for the full text
+PROFILE_VIEW_CACHE_SIZE = 1024
+
+_VIEWS = OrderedDict()  # (app_name, user_id, version) -> {field: value}
+_VIEWS_LOCK = threading.Lock()
+
+
+def _view_key(tool_context: ToolContext, version: str) -> tuple:
+    return tool_context._invocation_context.app_name, tool_context.user_id, version
+
+
+def _build_view(state) -> dict:
+    """Full scan of the state: only needed once per profile version."""
+    return {
+        key[len(USER_PREFIX):]: value
+        for key, value in state.to_dict().items()
+        if key.startswith(USER_PREFIX) and key != PROFILE_VERSION_KEY
+    }
+
+
+def _cache_view(key: tuple, view: dict):
+    with _VIEWS_LOCK:
+        _VIEWS[key] = view
+        _VIEWS.move_to_end(key)
+        while len(_VIEWS) > PROFILE_VIEW_CACHE_SIZE:
+            _VIEWS.popitem(last=False)
+
+
+def profile_view(tool_context: ToolContext) -> dict:
+    """The session's {field: value} profile (read-only: shared with the cache)."""
+    version = tool_context.state.get(PROFILE_VERSION_KEY)
+    if version is None:
+        # Profile never saved through save_userinfo: nothing to key a cache entry on
+        return _build_view(tool_context.state)
+
+    key = _view_key(tool_context, version)
+    with _VIEWS_LOCK:
+        view = _VIEWS.get(key)
+        if view is not None:
+            _VIEWS.move_to_end(key)
+    annotate(**{"cache_hits" if view is not None else "cache_misses": 1})
+    if view is not None:
+        return view
+    view = _build_view(tool_context.state)
+    _cache_view(key, view)
+    return view
+
+
+def clear_profile_cache():
+    with _VIEWS_LOCK:
+        _VIEWS.clear()
+
+
+def _summarize(value, max_chars: int):
+    if max_chars and isinstance(value, str) and len(value) > max_chars:
+        return f"{value[:max_chars]}… [{len(value)} chars; request this field for the full text]"
+    return value
+
 
 def save_userinfo(
-        tool_context: ToolContext, **kwargs
+        tool_context: ToolContext, fields: dict = None, **kwargs
 ) -> dict[str, any]:
     """
     Flexible tool to save ANY user information into session state.
+    fields: {name: value} to store, e.g. {"name": "Rifat", "country": "Bangladesh"} or {"last_sop": "..."}.
     All keys are auto-prefixed with 'user:'.
     """
-    # Store all passed keyword arguments
-    for key, value in kwargs.items():
-        namespaced_key = f"user:{key}"
+    updates = {**(fields or {}), **kwargs}
+    previous = profile_view(tool_context)
+
+    for key, value in updates.items():
+        namespaced_key = f"{USER_PREFIX}{key}"
         tool_context.state[namespaced_key] = value
 
-    return {"status": "success", "saved_fields": list(kwargs.keys())}
+    # New version token; the cached view is updated in place of a rescan
+    version = uuid.uuid4().hex
+    tool_context.state[PROFILE_VERSION_KEY] = version
+    _cache_view(_view_key(tool_context, version), {**previous, **updates})
+
+    return {"status": "success", "saved_fields": list(updates.keys())}
 
 
-def retrieve_userinfo(tool_context: ToolContext) -> dict[str, any]:
+def retrieve_userinfo(
+        tool_context: ToolContext, fields: list[str] = None, max_value_chars: int = PROFILE_VALUE_CHARS
+) -> dict[str, any]:
     """
-    Flexible tool to retrieve ALL user-related info
-    (keys starting with 'user:') from session state.
+    Flexible tool to retrieve user-related info (keys starting with 'user:') from session state.
     Returns a clean dictionary without the prefix.
+    fields: only return these fields (e.g. ["last_sop"]), in full. Omit to get a summary of every
+        field, where long values such as stored drafts are cut to `max_value_chars` (0 = no limit).
     """
-    user_data = {}
-
-    # Access the State object's combined dictionary safely
-    # Note: In a live ADK environment, checking tool_context.state should be enough.
-    # We include the internal dictionary access for robustness as seen in the notebook.
-    current_state = {**tool_context.state._value, **tool_context.state._delta}
-
-    for key, value in current_state.items():
-        if key.startswith("user:"):
-            clean_key = key.replace("user:", "")
-            user_data[clean_key] = value
+    view = profile_view(tool_context)
+    if fields:
+        data = {field: view[field] for field in fields if field in view}
+        missing = [field for field in fields if field not in view]
+        return {"status": "success", "data": data, **({"missing": missing} if missing else {})}
 
-    return {"status": "success", "data": user_data}
\ No newline at end of file
+    data = {field: _summarize(value, max_value_chars) for field, value in view.items()}
+    truncated = [field for field in data if data[field] is not view[field]]
+    return {"status": "success", "data": data, **({"truncated": truncated} if truncated else {})}
\ No newline at end of file
@@ -0,0 +1,201 @@
+# tools/review_queue.py
+#
+# Durable human review queue; SQLite is the local stand-in for a hosted queue.
+# - Drafts are stored once, content-addressed by SHA-256: the id a draft is known by
+#   everywhere (session state, tool calls, reviews) is its hash, never its text.
+# - Submitting a draft enqueues a review and returns at once; no invocation is kept
+#   paused. Reviewers list pending reviews and approve or reject any number of them in
+#   one transaction; runner/review_dispatch.py then delivers the decisions to the
+#   sessions they belong to.
+#
+# Reviewer CLI, from the project root:
+#   python -m tools.review_queue list
+#   python -m tools.review_queue approve 3 4 7
+#   python -m tools.review_queue reject 5 --feedback "Mention my MBA thesis in paragraph 2."
+
+import argparse
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+REVIEW_DB_PATH = os.environ.get("SCHOLARSHIP_REVIEW_DB", "review_queue.db")
+DRAFT_ID_CHARS = 20  # hex digits of the SHA-256 used as the draft id
+
+PENDING = "pending"
+APPROVED = "approved"
+REJECTED = "rejected"
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    draft_id TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS reviews (
+    review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    draft_id TEXT NOT NULL REFERENCES drafts (draft_id),
+    app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL,
+    document_type TEXT NOT NULL, target TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'pending', feedback TEXT NOT NULL DEFAULT '',
+    submitted_at REAL NOT NULL, decided_at REAL, delivered_at REAL);
+CREATE INDEX IF NOT EXISTS reviews_by_status ON reviews (status, review_id);
+CREATE INDEX IF NOT EXISTS reviews_undelivered ON reviews (app_name, delivered_at, status);
+"""
+
+_COLUMNS = ("review_id", "draft_id", "app_name", "user_id", "session_id", "document_type", "target",
+            "status", "feedback", "submitted_at", "decided_at", "delivered_at")
+
+
+def draft_id_for(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:DRAFT_ID_CHARS]
+
+
+class ReviewQueue:
+    """SQLite-backed review queue: content-addressed drafts plus one row per review."""
+
+    def __init__(self, path: str = REVIEW_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        for pragma in PRAGMAS:
+            self._db.execute(pragma)
+        self._db.executescript(SCHEMA)
+        atexit.register(self.close)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _rows(self, sql: str, params: tuple = ()) -> list:
+        return [dict(zip(_COLUMNS, row)) for row in self._db.execute(sql, params).fetchall()]
+
+    # --- Drafts ---
+    def put_draft(self, text: str) -> str:
+        """Stores `text` unless an identical draft exists; returns its draft id."""
+        draft_id = draft_id_for(text)
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO drafts (draft_id, text, created_at) VALUES (?, ?, ?)",
+                             (draft_id, text, time.time()))
+        return draft_id
+
+    def draft_text(self, draft_id: str):
+        with self._lock:
+            row = self._db.execute("SELECT text FROM drafts WHERE draft_id = ?", (draft_id,)).fetchone()
+        return row[0] if row else None
+
+    # --- Reviews ---
+    def submit(self, app_name: str, user_id: str, session_id: str, document_type: str, draft_id: str,
+               target: str = "") -> dict:
+        """Queues a review of a stored draft; re-submitting a draft that is still pending is a no-op."""
+        with self._lock:
+            pending = self._rows(
+                f"SELECT {', '.join(_COLUMNS)} FROM reviews WHERE draft_id = ? AND app_name = ? AND user_id = ? "
+                "AND session_id = ? AND status = ?", (draft_id, app_name, user_id, session_id, PENDING))
+            if pending:
+                return pending[0]
+            cursor = self._db.execute(
+                "INSERT INTO reviews (draft_id, app_name, user_id, session_id, document_type, target, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (draft_id, app_name, user_id, session_id, document_type, target, time.time()))
+            return self._rows(f"SELECT {', '.join(_COLUMNS)} FROM reviews WHERE review_id = ?",
+                              (cursor.lastrowid,))[0]
+
+    def get(self, review_id: int):
+        with self._lock:
+            rows = self._rows(f"SELECT {', '.join(_COLUMNS)} FROM reviews WHERE review_id = ?", (review_id,))
+        return rows[0] if rows else None
+
+    def pending(self, limit: int = 100) -> list:
+        """Pending reviews, oldest first."""
+        with self._lock:
+            return self._rows(f"SELECT {', '.join(_COLUMNS)} FROM reviews WHERE status = ? "
+                              "ORDER BY review_id LIMIT ?", (PENDING, limit))
+
+    def decide(self, decisions) -> list:
+        """
+        Applies many decisions in one transaction. `decisions` holds (review_id, approved) or
+        (review_id, approved, feedback) tuples; reviews that are not pending are left alone.
+        Returns the reviews that were decided.
+        """
+        now = time.time()
+        rows = [(APPROVED if d[1] else REJECTED, d[2] if len(d) > 2 else "", now, d[0], PENDING)
+                for d in decisions]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany("UPDATE reviews SET status = ?, feedback = ?, decided_at = ? "
+                                     "WHERE review_id = ? AND status = ?", rows)
+                decided = self._rows(
+                    f"SELECT {', '.join(_COLUMNS)} FROM reviews WHERE decided_at = ? AND review_id IN "
+                    f"({', '.join('?' * len(rows))})", (now, *(row[3] for row in rows))) if rows else []
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return decided
+
+    def undelivered(self, app_name: str, limit: int = 500) -> list:
+        """Decided reviews of `app_name` whose session has not been told yet, oldest first."""
+        with self._lock:
+            return self._rows(f"SELECT {', '.join(_COLUMNS)} FROM reviews WHERE app_name = ? AND status != ? "
+                              "AND delivered_at IS NULL ORDER BY review_id LIMIT ?", (app_name, PENDING, limit))
+
+    def mark_delivered(self, review_ids: list):
+        now = time.time()
+        with self._lock:
+            self._db.executemany("UPDATE reviews SET delivered_at = ? WHERE review_id = ?",
+                                 [(now, review_id) for review_id in review_ids])
+
+
+_QUEUE = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_review_queue() -> ReviewQueue:
+    """The process-wide queue at REVIEW_DB_PATH, opened on first use."""
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = ReviewQueue(REVIEW_DB_PATH)
+        return _QUEUE
+
+
+def set_review_queue(queue: ReviewQueue):
+    global _QUEUE
+    with _QUEUE_LOCK:
+        _QUEUE = queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Review queued SOP/CV drafts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("list", help="show pending reviews")
+    listing.add_argument("--full", action="store_true", help="print each draft in full")
+    for name in ("approve", "reject"):
+        command = commands.add_parser(name, help=f"{name} pending reviews")
+        command.add_argument("review_ids", type=int, nargs="+")
+        command.add_argument("--feedback", default="", help="what should change (sent to the session)")
+    args = parser.parse_args()
+
+    queue = get_review_queue()
+    if args.command == "list":
+        for review in queue.pending(limit=1000):
+            text = queue.draft_text(review["draft_id"]) or ""
+            print(f"#{review['review_id']} {review['document_type']} for {review['target'] or '-'} "
+                  f"(session {review['session_id']}, draft {review['draft_id']})")
+            print(text if args.full else f"  {text[:200]}…" if len(text) > 200 else f"  {text}")
+        return
+    decided = queue.decide([(review_id, args.command == "approve", args.feedback) for review_id in args.review_ids])
+    print(f"{len(decided)} review(s) {APPROVED if args.command == 'approve' else REJECTED}; run `python -m runner.main --deliver-reviews` to notify sessions.")
+
+
+if __name__ == "__main__":
+    main()
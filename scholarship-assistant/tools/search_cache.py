@@ -0,0 +1,235 @@
+# tools/search_cache.py
+#
+# Persistent cache in front of the `google_search_scholarships` fallback agent.
+# Every fallback costs a full LLM round trip plus search grounding, so its answers are
+# stored on disk (SQLite) keyed by the normalized query, with a TTL and LRU eviction.
+# Scholarships listed in an answer are also ingested as provisional entries into a
+# side dataset that the local finder consults, so similar queries never reach the
+# fallback again while those entries are fresh.
+# Identical fallback searches already in flight are shared rather than repeated
+# (SearchFallbackTool, through tools/single_flight.py).
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from google.adk.tools.agent_tool import AgentTool
+
+from agents.tracing import annotate
+from tools.finder import PROVISIONAL_DATASET_PATH
+from tools.single_flight import SingleFlight
+from tools.text_index import tokenize
+
+SEARCH_TOOL_NAME = "google_search_scholarships"
+SEARCH_CACHE_PATH = os.environ.get("SCHOLARSHIP_SEARCH_CACHE_DB", "search_cache.db")
+SEARCH_CACHE_TTL = 7 * 24 * 3600  # seconds
+SEARCH_CACHE_MAX_ENTRIES = 1000
+PROVISIONAL_MAX_ENTRIES = 5000
+# In-process: fallback searches in flight, plus the latest answers until the disk cache has them
+SEARCH_FLIGHT_TTL = 600  # seconds
+SEARCH_FLIGHT_SIZE = 256
+
+# One result per line, as requested in the search agent's instruction:
+# Title | Degrees | Funds | Country | Deadline (YYYY-MM-DD) | URL
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_PROVISIONAL_LOCK = threading.Lock()
+
+
+def normalize_query(text: str) -> str:
+    """Cache key: the query's distinct folded tokens, sorted ("UK PhD" == "phd in the uk")."""
+    return " ".join(sorted(set(tokenize(text))))
+
+
+class SearchCache:
+    """SQLite-backed TTL + LRU cache of fallback search answers. Safe to share across threads."""
+
+    def __init__(self, path: str = SEARCH_CACHE_PATH, ttl: float = SEARCH_CACHE_TTL,
+                 max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " key TEXT PRIMARY KEY, query TEXT, response TEXT, created_at REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS search_cache_last_used ON search_cache(last_used)")
+
+    def get(self, query: str):
+        """Cached answer for `query`, or None if missing or older than the TTL."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created_at FROM search_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self.misses += 1
+                annotate(cache_misses=1)
+                return None
+            self._db.execute("UPDATE search_cache SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        annotate(cache_hits=1)
+        return row[0]
+
+    def put(self, query: str, response: str):
+        """Stores an answer, then drops expired rows and the least recently used overflow."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)",
+                (normalize_query(query), query, response, now, now),
+            )
+            self._db.execute("DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl,))
+            self._db.execute(
+                "DELETE FROM search_cache WHERE key IN ("
+                " SELECT key FROM search_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def parse_search_results(text: str) -> list:
+    """Parses "Title | Degrees | Funds | Country | Deadline | URL" lines into dataset-shaped records."""
+    records = []
+    for line in str(text or "").splitlines():
+        cells = [c.strip(" *") for c in _BULLET_RE.sub("", line).strip().strip("|").split("|")]
+        # Skip prose, markdown table headers and separator rows
+        if len(cells) < 5 or cells[0].strip("-: ") == "" or cells[0].lower() == "title":
+            continue
+        deadline = cells[4] if re.fullmatch(r"\d{4}-\d{2}-\d{2}", cells[4]) else None
+        records.append({
+            "title": cells[0],
+            "degrees": cells[1],
+            "funds": cells[2],
+            "date": deadline,
+            "location": cells[3],
+            "url": cells[5] if len(cells) > 5 else None,
+        })
+    return records
+
+
+def ingest_provisional(records: list, path: str = None, ttl: float = SEARCH_CACHE_TTL) -> int:
+    """
+    Adds search results to the provisional dataset (deduplicated by title, expired entries dropped).
+    The file is replaced atomically, so the finder's hot reload picks it up safely. Returns the entry count.
+    """
+    path = path or PROVISIONAL_DATASET_PATH
+    now = datetime.now(timezone.utc)
+    expires_at = datetime.fromtimestamp(now.timestamp() + ttl, timezone.utc).isoformat()
+    with _PROVISIONAL_LOCK:
+        try:
+            with open(path) as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            existing = []
+
+        entries = {}
+        for entry in existing:
+            if entry.get("expires_at", "") > now.isoformat():
+                entries[entry["title"].lower()] = entry
+        for record in records:
+            # Re-inserting moves refreshed titles to the end, so the size cap drops the oldest
+            entries.pop(record["title"].lower(), None)
+            entries[record["title"].lower()] = {**record, "provisional": True, "expires_at": expires_at}
+
+        kept = list(entries.values())[-PROVISIONAL_MAX_ENTRIES:]
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(kept, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return len(kept)
+
+
+# --- Shared instance and agent callbacks ---
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = SearchCache()
+    return _CACHE
+
+
+def _store_answer(query: str, answer: str):
+    get_search_cache().put(query, answer)
+    records = parse_search_results(answer)
+    if records:
+        ingest_provisional(records)
+
+
+async def search_cache_before_tool(tool, args: dict, tool_context):
+    """before_tool_callback: answers the search fallback from the cache when possible."""
+    if tool.name != SEARCH_TOOL_NAME:
+        return None
+    # SQLite runs in a worker thread so a slow disk does not stall the event loop
+    cached = await asyncio.to_thread(lambda: get_search_cache().get(args.get("request", "")))
+    if cached is None:
+        return None
+    return {"result": cached, "cached": True}
+
+
+async def search_cache_after_tool(tool, args: dict, tool_context, tool_response):
+    """after_tool_callback: stores fresh search answers and ingests the scholarships they list."""
+    if tool.name != SEARCH_TOOL_NAME:
+        return None
+    if isinstance(tool_response, dict):
+        if tool_response.get("cached"):
+            return None
+        tool_response = tool_response.get("result")
+    if not tool_response:
+        return None
+
+    await asyncio.to_thread(_store_answer, args.get("request", ""), str(tool_response))
+    return None
+
+
+search_flight = SingleFlight("search_fallback", ttl=SEARCH_FLIGHT_TTL, max_entries=SEARCH_FLIGHT_SIZE)
+
+
+class SearchFallbackTool(AgentTool):
+    """
+    AgentTool for the search fallback agent: concurrent requests with the same normalized
+    query share one search. Only the call that ran the search returns the raw answer;
+    the others get it marked as cached, so the answer is stored and ingested once.
+    """
+
+    async def run_async(self, *, args: dict, tool_context):
+        ran = []
+
+        async def search():
+            ran.append(True)
+            return await AgentTool.run_async(self, args=args, tool_context=tool_context)
+
+        result = await search_flight.run(normalize_query(args.get("request", "")), search)
+        if ran:
+            return result
+        return {"result": result, "cached": True}
@@ -0,0 +1,171 @@
+# tools/single_flight.py
+#
+# Request coalescing for calls that many sessions make with the same arguments at the
+# same time (the local finder, the web search fallback).
+# - A call whose key is already being computed waits for that computation instead of
+#   starting its own ("single flight"): asyncio callers await the leader's future,
+#   threads wait on its event. Failures are never cached; waiters get the leader's error.
+# - Completed results are kept in a small LRU with a TTL, so a burst of identical calls
+#   right after the first one is answered from memory.
+# - Counters per flight (hits, misses = computations started, coalesced, evictions) are
+#   reported by `single_flight_stats`.
+# Cached results are shared between callers: treat them as read-only or copy them.
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class _ThreadFlight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key and memoizes their results (bounded LRU + TTL)."""
+
+    def __init__(self, name: str, ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._results = OrderedDict()  # key -> (expires_at, value)
+        self._futures = {}  # key -> asyncio.Future of the leading coroutine
+        self._threads = {}  # key -> _ThreadFlight of the leading thread
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = self.evictions = 0
+        with _FLIGHTS_LOCK:
+            _FLIGHTS.append(self)
+
+    # --- Result cache ---
+    def _lookup(self, key):
+        """Cached value (counted as a hit) or _MISSING; call with the lock held."""
+        entry = self._results.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[0] < time.monotonic():
+            del self._results[key]
+            return _MISSING
+        self._results.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def _store(self, key, value):
+        with self._lock:
+            self._results[key] = (time.monotonic() + self.ttl, value)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+                self.evictions += 1
+
+    # --- Calls ---
+    async def run(self, key, compute):
+        """Result of `await compute()` for `key`: cached, shared with an identical call in flight, or computed."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            flight = self._futures.get(key)
+            leading = flight is None or flight.get_loop() is not loop
+            if leading:
+                flight = loop.create_future()
+                # Marks the exception as retrieved when nobody was waiting for it
+                flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+                self._futures[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leading:
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if flight.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.run(key, compute)  # the leader was cancelled, not us: retry
+                raise
+
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            self._store(key, value)
+            flight.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                if self._futures.get(key) is flight:
+                    del self._futures[key]
+
+    def run_sync(self, key, compute):
+        """Thread-safe `run` for a plain function: `compute()` runs at most once at a time per key."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            flight = self._threads.get(key)
+            leading = flight is None
+            if leading:
+                flight = self._threads[key] = _ThreadFlight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leading:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            self._store(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._threads[key]
+            flight.done.set()
+
+    # --- Reports ---
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "size": len(self._results),
+                "saved": round((self.hits + self.coalesced) / calls, 3) if calls else 0.0,
+            }
+
+    def clear(self):
+        """Drops cached results and resets the counters (mainly for tests and benchmarks)."""
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = self.coalesced = self.evictions = 0
+
+
+_FLIGHTS = []
+_FLIGHTS_LOCK = threading.Lock()
+
+
+def single_flight_stats() -> dict:
+    """{flight name: counters} for every SingleFlight in the process."""
+    with _FLIGHTS_LOCK:
+        flights = list(_FLIGHTS)
+    return {flight.name: flight.stats() for flight in flights}
@@ -0,0 +1,215 @@
+# tools/text_index.py
+#
+# Local lexical relevance for the scholarship finder: a BM25 inverted index over each
+# scholarship's title, degrees and location, plus a parser that pulls structured
+# fields (degree, country, funding, minimum amount) out of a free-text request such as
+# "fully funded Management PhD in the UK, at least $10k".
+
+import math
+import re
+from array import array
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and any are as at be by for from i in is it me my of on or the to with want "
+    "find looking need please scholarship scholarships program programs".split()
+)
+# Query and document words mapped onto one form, so "UK" finds "united-kingdom"
+_SYNONYMS = {
+    "uk": "united kingdom", "britain": "united kingdom", "england": "united kingdom",
+    "us": "usa", "america": "usa",
+    "doctorate": "phd", "doctoral": "phd",
+    "masters": "master", "msc": "master", "postgraduate": "master",
+    "bachelors": "bachelor", "undergraduate": "bachelor", "bsc": "bachelor",
+    "courses": "course",
+}
+
+DEGREE_TERMS = {"phd": "PhD", "master": "Masters", "bachelor": "Bachelor", "course": "Course"}
+# Degree words the catalog has no category for
+OTHER_DEGREE_TERMS = frozenset("postdoc postdoctoral mba md llm diploma certificate associate residency".split())
+FUNDING_PHRASES = (
+    (re.compile(r"\bfull(?:y)?[- ]?fund(?:ed|ing)\b|\bfull scholarship\b", re.IGNORECASE), "Fully Funded"),
+    (re.compile(r"\bpartial(?:ly)?[- ]?fund(?:ed|ing)\b|\bpartial scholarship\b", re.IGNORECASE), "Partially Funded"),
+)
+# "in Germany", "at Oxford": the place a request names, up to the next clause word or punctuation
+_PLACE_RE = re.compile(
+    r"\b(?:in|at|within)\s+(?:the\s+)?([a-z][a-z'.-]*(?:\s+[a-z][a-z'.-]*){0,2}?)"
+    r"(?=\s+(?:for|with|and|or|in|at|by|from|starting|next|this|that|who|which|where|please)\b|\s*[,.;:!?)]|\s*$)",
+    re.IGNORECASE,
+)
+COUNTRY_NAMES = frozenset(name.strip() for name in """
+    afghanistan, albania, algeria, andorra, angola, argentina, armenia, australia, austria, azerbaijan, bahamas,
+    bahrain, bangladesh, barbados, belarus, belgium, belize, benin, bhutan, bolivia, bosnia, botswana, brazil,
+    brunei, bulgaria, burkina faso, burundi, cambodia, cameroon, canada, chad, chile, china, colombia, congo,
+    costa rica, croatia, cuba, cyprus, czechia, czech republic, denmark, djibouti, dominican republic, ecuador,
+    egypt, el salvador, eritrea, estonia, eswatini, ethiopia, fiji, finland, france, gabon, gambia, georgia,
+    germany, ghana, greece, guatemala, guinea, guyana, haiti, honduras, hong kong, hungary, iceland, india,
+    indonesia, iran, iraq, ireland, israel, italy, ivory coast, jamaica, japan, jordan, kazakhstan, kenya, korea,
+    south korea, north korea, kosovo, kuwait, kyrgyzstan, laos, latvia, lebanon, lesotho, liberia, libya,
+    liechtenstein, lithuania, luxembourg, madagascar, malawi, malaysia, maldives, mali, malta, mauritania,
+    mauritius, mexico, moldova, monaco, mongolia, montenegro, morocco, mozambique, myanmar, namibia, nepal,
+    netherlands, new zealand, nicaragua, niger, nigeria, north macedonia, norway, oman, pakistan, palestine,
+    panama, papua new guinea, paraguay, peru, philippines, poland, portugal, qatar, romania, russia, rwanda,
+    saudi arabia, senegal, serbia, sierra leone, singapore, slovakia, slovenia, somalia, south africa,
+    south sudan, spain, sri lanka, sudan, suriname, sweden, switzerland, syria, taiwan, tajikistan, tanzania,
+    thailand, togo, trinidad and tobago, tunisia, turkey, turkmenistan, uganda, ukraine, united arab emirates,
+    uae, united kingdom, uk, britain, england, scotland, wales, united states, usa, us, america, uruguay,
+    uzbekistan, venezuela, vietnam, yemen, zambia, zimbabwe,
+    africa, asia, europe, latin america, middle east, north america, oceania, scandinavia, south america
+""".split(","))
+# A phrase that is not a country only counts as a place when it names one ("University of Tokyo");
+# otherwise it is usually a field of study ("PhD in Management"), left to the unparsed words
+_PLACE_NOUNS = frozenset("university universities college institute school city state province region campus".split())
+# Words a search request is phrased with that carry no constraint of their own
+_REQUEST_WORDS = frozenset("""
+    am im hi hello show give list get search help top best some available options results result opportunities
+    opportunity fellowship fellowships grant grants bursary bursaries funding funded fully full partial partially
+    level degree degrees country countries study studying abroad worth least minimum min over more than deadline
+    deadlines soon soonest upcoming closing due sorted sort
+""".split())
+# "not in the USA", "except Canada": the clause after one of these is excluded, not wanted
+_NEGATION_RE = re.compile(r"\b(not|except|excluding|outside(?: of)?|other than)\b([^,.;:!?]*)", re.IGNORECASE)
+_MIN_AMOUNT_RE = re.compile(
+    r"(?:at least|minimum(?: of)?|min\.?|over|more than)\s*(?:us)?[$£€]?\s*(\d[\d,]*(?:\.\d+)?)\s*(k\b)?",
+    re.IGNORECASE,
+)
+
+
+def tokenize(text) -> list:
+    """Lowercased word tokens with stopwords dropped and synonyms/plurals folded."""
+    tokens = []
+    for token in _TOKEN_RE.findall(str(text or "").lower()):
+        token = _SYNONYMS.get(token, token)
+        for part in token.split():
+            if part not in _STOPWORDS:
+                tokens.append(part)
+    return tokens
+
+
+class TextIndex:
+    """BM25 inverted index: term -> parallel arrays of record ids and term frequencies."""
+
+    def __init__(self, documents):
+        postings = {}
+        lengths = array("i")
+        for record_id, text in enumerate(documents):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                ids, tfs = postings.setdefault(token, (array("i"), array("i")))
+                ids.append(record_id)
+                tfs.append(tf)
+
+        n = len(lengths)
+        self.size = n
+        self.postings = postings
+        avg_length = (sum(lengths) / n) if n else 0.0
+        # Per-record length normalisation, precomputed once
+        self.norms = array("d", (
+            BM25_K1 * (1 - BM25_B + BM25_B * (length / avg_length if avg_length else 0)) for length in lengths
+        ))
+        self.idf = {
+            token: math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5)) for token, (ids, _) in postings.items()
+        }
+
+    def scores(self, terms: list, candidates=None) -> dict:
+        """BM25 score per record id for the query terms, restricted to `candidates` if given."""
+        scores = {}
+        for term in dict.fromkeys(terms):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            idf = self.idf[term]
+            norms = self.norms
+            for record_id, tf in zip(*entry):
+                if candidates is not None and record_id not in candidates:
+                    continue
+                scores[record_id] = scores.get(record_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norms[record_id])
+        return scores
+
+
+def parse_query(text: str, locations=()) -> dict:
+    """
+    Extracts finder fields from a free-text request. Only unambiguous fields are returned:
+    "PhD or Masters" yields no degree, "USA or UK" no country.
+    `locations` are the catalog's distinct location values (e.g. "united-kingdom").
+    When no known country is named but the request names a place ("in Japan"), that
+    phrase is returned as `unresolved_place`, so callers do not widen the search to
+    every country; likewise a degree with no catalog category ("postdoc") is returned as
+    `unresolved_degree`. A negated clause ("not in the USA") is left out of every field and
+    its known countries are returned as `excluded_countries`. Words that set no field are
+    returned as `unparsed` (negation words always are), so callers can tell whether the
+    whole request was understood. Always returns the BM25 `terms` of the wanted part.
+    """
+    text = str(text or "")
+    negated = [match.group(2) for match in _NEGATION_RE.finditer(text)]
+    wanted = _NEGATION_RE.sub(" , ", text)
+    terms = tokenize(wanted)
+    fields = {"terms": terms}
+    consumed = set()
+
+    degrees = {DEGREE_TERMS[t] for t in terms if t in DEGREE_TERMS}
+    if len(degrees) == 1:
+        fields["degree"] = degrees.pop()
+    elif not degrees:
+        other = next((t for t in terms if t in OTHER_DEGREE_TERMS), None)
+        if other:
+            fields["unresolved_degree"] = other
+            consumed.add(other)
+    if "degree" in fields:
+        consumed.update(t for t in terms if t in DEGREE_TERMS)
+
+    countries = _named_locations(wanted, locations)
+    if len(countries) == 1:
+        fields["country"] = next(iter(countries))
+        consumed.update(tokenize(fields["country"]))
+    elif not countries:
+        place = _unresolved_place(wanted)
+        if place:
+            fields["unresolved_place"] = place
+            consumed.update(tokenize(place))
+    excluded = sorted({location for clause in negated for location in _named_locations(clause, locations)})
+    if excluded:
+        fields["excluded_countries"] = excluded
+
+    for pattern, funding in FUNDING_PHRASES:
+        if pattern.search(wanted):
+            fields["funding"] = funding
+            break
+
+    match = _MIN_AMOUNT_RE.search(wanted)
+    if match:
+        amount = float(match.group(1).replace(",", ""))
+        fields["min_amount"] = amount * 1000 if match.group(2) else amount
+
+    unparsed = [
+        word for word in dict.fromkeys(_TOKEN_RE.findall(text.lower()))
+        if _NEGATION_RE.fullmatch(word) or not (
+            word in _STOPWORDS or word in _REQUEST_WORDS or re.fullmatch(r"\d+k?", word)
+            or all(part in consumed for part in tokenize(word))
+        )
+    ]
+    if unparsed:
+        fields["unparsed"] = unparsed
+    return fields
+
+
+def _named_locations(text: str, locations) -> set:
+    """Catalog locations whose words appear together in the text ("the UK" -> {"united-kingdom"})."""
+    phrase = f" {' '.join(tokenize(text))} "
+    return {location for location in locations if location and f" {' '.join(tokenize(location))} " in phrase}
+
+
+def _unresolved_place(text: str):
+    """First place phrase of the request ("in Japan" -> "japan"): a country or region, or a named institution."""
+    for match in _PLACE_RE.finditer(text):
+        phrase = " ".join(match.group(1).lower().split())
+        if phrase in COUNTRY_NAMES or _PLACE_NOUNS & set(phrase.split()):
+            return phrase
+    return None